@@ -0,0 +1,187 @@
+"""
+AutoClip 命令行批处理 (无需 GUI / PyQt5)
+
+用法:
+    python src/cli.py manifest.json [--workers 4] [--report report.json]
+
+清单文件 (JSON 或 YAML) 示例:
+
+    {
+      "output_dir": "out",
+      "workers": 4,
+      "stage_limits": {"detect_person": 2, "encode": 2},
+      "defaults": {"operation": "smart_remove", "params": {}},
+      "inputs": ["videos/*.mp4"],
+      "jobs": [
+        {"input": "talk.mp4", "operation": "keep_voice", "output": "out/talk_voice.mp4"},
+        {"input": "talk.mp4", "operation": "subtitles", "params": {"model_name": "small"}},
+        {"input": "talk.mp4", "operation": "burn", "params": {"style": {"fontsize": 36}}}
+      ]
+    }
+
+- 支持的操作: keep_voice, smart_remove, subtitles (输出 SRT), burn (生成并烧录字幕),
+  keep_voice_burn (只保留人声片段并烧录字幕，一次编码完成)
+- inputs 中的每个文件 (支持通配符) 使用 defaults 中的操作和参数
+- 未指定 output 时，输出到 output_dir 下，文件名为 "<原文件名>_<后缀><扩展名>"
+- 清单中的相对路径相对于清单文件所在目录
+- 中断后重新运行同一个清单时，上次已成功的文件会被跳过 (--no-resume 可以关闭)
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from core import instrumentation
+from core.batch_engine import BatchEngine
+from core.pipeline import OPERATIONS
+
+# 各操作默认输出文件名的后缀和扩展名 (None 表示沿用输入文件的扩展名)
+_OUTPUT_NAMING = {
+    'keep_voice': ('_voice_kept', None),
+    'smart_remove': ('_smart_removed', None),
+    'subtitles': ('', '.srt'),
+    'burn': ('_subtitled', None),
+    'keep_voice_burn': ('_voice_kept_subtitled', None),
+}
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """读取 JSON 或 YAML 格式的清单文件。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("读取 YAML 清单需要安装 PyYAML (pip install pyyaml)，或改用 JSON 格式。")
+        manifest = yaml.safe_load(text)
+    else:
+        manifest = json.loads(text)
+    if not isinstance(manifest, dict):
+        raise SystemExit(f"清单格式错误: {path}")
+    return manifest
+
+
+def build_jobs(manifest: Dict[str, Any], base_dir: str, output_dir: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """根据清单展开任务列表，并检查操作名称和输入文件。"""
+    defaults = manifest.get('defaults', {})
+    entries = []
+    for pattern in manifest.get('inputs', []):
+        matches = sorted(glob.glob(os.path.join(base_dir, pattern)))
+        if not matches:
+            raise SystemExit(f"没有匹配的输入文件: {pattern}")
+        entries.extend({'input': path} for path in matches)
+    entries.extend(manifest.get('jobs', []))
+
+    jobs = []
+    for entry in entries:
+        operation = entry.get('operation', defaults.get('operation'))
+        if operation not in OPERATIONS:
+            raise SystemExit(f"未知的操作 '{operation}'，可用的操作: {', '.join(OPERATIONS)}")
+        input_path = os.path.join(base_dir, entry['input'])
+        if not os.path.exists(input_path):
+            raise SystemExit(f"输入文件不存在: {input_path}")
+
+        output_path = entry.get('output')
+        if output_path:
+            output_path = os.path.join(base_dir, output_path)
+        else:
+            suffix, ext = _OUTPUT_NAMING[operation]
+            name, input_ext = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(output_dir, f"{name}{suffix}{ext or input_ext}")
+
+        params = {**defaults.get('params', {}), **entry.get('params', {})}
+        if not use_cache:
+            params['use_cache'] = False
+        jobs.append({'operation': operation, 'input': os.path.abspath(input_path),
+                     'output': os.path.abspath(output_path), 'params': params})
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AutoClip 命令行批处理")
+    parser.add_argument('manifest', help="JSON 或 YAML 格式的任务清单")
+    parser.add_argument('-w', '--workers', type=int, help="并行工作进程数 (覆盖清单中的 workers)")
+    parser.add_argument('-o', '--output-dir', help="默认输出目录 (覆盖清单中的 output_dir)")
+    parser.add_argument('-r', '--report', help="JSON 报告的保存路径 (默认: 输出目录下的 autoclip_report.json)")
+    parser.add_argument('--no-cache', action='store_true', help="不使用分析结果缓存")
+    parser.add_argument('--no-resume', action='store_true', help="不跳过上次运行中已成功的文件，全部重新处理")
+    parser.add_argument('--trace', help="把各阶段的耗时记录追加到该 JSON lines 文件")
+    parser.add_argument('--metrics', help="结束时把汇总指标写入该 Prometheus 文本文件")
+    parser.add_argument('--profile', help="对每个阶段运行 cProfile，结果保存到该目录")
+    args = parser.parse_args(argv)
+    # 在启动工作进程之前设置，工作进程通过环境变量继承
+    instrumentation.configure(trace_path=args.trace and os.path.abspath(args.trace),
+                              profile_dir=args.profile and os.path.abspath(args.profile))
+
+    manifest_path = os.path.abspath(args.manifest)
+    manifest = load_manifest(manifest_path)
+    base_dir = os.path.dirname(manifest_path)
+    output_dir = os.path.abspath(args.output_dir or os.path.join(base_dir, manifest.get('output_dir', '.')))
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = build_jobs(manifest, base_dir, output_dir, use_cache=not args.no_cache)
+    for job in jobs:
+        os.makedirs(os.path.dirname(job['output']), exist_ok=True)
+    workers = args.workers or manifest.get('workers')
+
+    def _on_event(event):
+        if event['type'] == 'started':
+            print(f"[{event['index'] + 1}/{len(jobs)}] 开始: {event['input']}", flush=True)
+        elif event['type'] == 'finished':
+            result = event['result']
+            detail = f" ({result['error']})" if result['error'] else ""
+            if result.get('resumed'):
+                detail += " (上次运行中已完成)"
+            print(f"[{event['index'] + 1}/{len(jobs)}] {result['status']}: {result['input']}"
+                  f" -> {result['output']} ({result['elapsed']:.1f} 秒){detail}", flush=True)
+
+    engine = BatchEngine(max_workers=workers, stage_limits=manifest.get('stage_limits'), on_event=_on_event,
+                         resume=not args.no_resume)
+    started = time.time()
+    try:
+        results = engine.run(jobs)
+    except KeyboardInterrupt:
+        engine.cancel()
+        raise
+
+    report = {
+        'manifest': manifest_path,
+        'started': started,
+        'elapsed': time.time() - started,
+        'workers': engine.max_workers,
+        'stage_limits': engine.stage_limits,
+        'summary': {status: sum(1 for r in results if r['status'] == status) for status in ('ok', 'error', 'cancelled')},
+        'metrics': instrumentation.merge_summaries([(r['result'] or {}).get('metrics') for r in results]),
+        'jobs': [],
+    }
+    for job, result in zip(jobs, results):
+        details = dict(result['result'] or {})
+        report['jobs'].append({
+            'operation': job['operation'],
+            'input': job['input'],
+            'output': job['output'],
+            'params': job['params'],
+            'status': result['status'],
+            'error': result['error'],
+            'elapsed': result['elapsed'],
+            'resumed': result.get('resumed', False),
+            'stages': details.pop('stage_timings', {}),
+            'result': details,
+        })
+
+    if args.metrics:
+        instrumentation.write_metrics(os.path.abspath(args.metrics), report['metrics'])
+    report_path = os.path.abspath(args.report or os.path.join(output_dir, 'autoclip_report.json'))
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"完成: 成功 {report['summary']['ok']}，失败 {report['summary']['error']}，"
+          f"取消 {report['summary']['cancelled']}。报告已保存至: {report_path}")
+    return 0 if report['summary']['error'] == 0 and report['summary']['cancelled'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import inspect
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.audio_processing import get_voice_segments
+from core.disk_cache import DiskCache, file_fingerprint, get_cache_dir
+from core.subtitle_processing import generate_subtitles
+from core.video_processing import get_person_segments
+
+# --- 分析结果缓存 ---
+# 人声检测、人物检测和字幕识别的结果按 (输入文件指纹, 影响结果的全部参数) 缓存在磁盘上，
+# 只修改输出方式或重试导出时不需要重新运行 VAD / YOLO / Whisper。
+# 缓存大小上限可通过环境变量 AUTOCLIP_ANALYSIS_CACHE_MB 配置，超出时按 LRU 淘汰。
+_DEFAULT_ANALYSIS_CACHE_MB = 256
+# 修改分析算法或默认模型时递增，使旧的缓存条目失效
+_CACHE_VERSION = 1
+# 只影响速度、不影响结果的参数，不计入缓存键
+_PERFORMANCE_ONLY_PARAMS = {'batch_size', 'pipelined', 'device', 'streaming', 'block_seconds', 'workers', 'threads',
+                            'checkpoint'}
+
+_cache: Optional[DiskCache] = None
+
+
+def get_analysis_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        max_mb = int(os.environ.get('AUTOCLIP_ANALYSIS_CACHE_MB', _DEFAULT_ANALYSIS_CACHE_MB))
+        _cache = DiskCache(get_cache_dir('analysis'), max_bytes=max_mb * 1024 * 1024)
+    return _cache
+
+
+def cached_voice_segments(media_path: str, audio: Optional[np.ndarray] = None, use_cache: bool = True,
+                          **params) -> List[Dict[str, float]]:
+    """
+    带缓存的 get_voice_segments。
+
+    :param media_path: 输入文件路径，用于计算缓存键
+    :param audio: 可选，已解码的音频；未命中缓存时使用，避免重复解码
+    :param params: 传给 get_voice_segments 的参数
+    """
+    return _cached('voice_segments', media_path, get_voice_segments, params,
+                   lambda: get_voice_segments(audio if audio is not None else media_path, **params),
+                   use_cache)
+
+
+def cached_person_segments(video_path: str, use_cache: bool = True, **params) -> List[Dict[str, float]]:
+    """带缓存的 get_person_segments，params 为传给 get_person_segments 的参数。"""
+    return _cached('person_segments', video_path, get_person_segments, params,
+                   lambda: get_person_segments(video_path, **params),
+                   use_cache)
+
+
+def cached_subtitles(media_path: str, audio: Optional[np.ndarray] = None, use_cache: bool = True,
+                     **params) -> Optional[List[Dict[str, Any]]]:
+    """带缓存的 generate_subtitles，audio 与 params 的含义同 cached_voice_segments。"""
+    return _cached('subtitles', media_path, generate_subtitles, params,
+                   lambda: generate_subtitles(audio if audio is not None else media_path, **params),
+                   use_cache)
+
+
+def invalidate_analysis_cache(media_path: Optional[str] = None, kind: Optional[str] = None) -> int:
+    """
+    使缓存条目失效。
+
+    :param media_path: 只删除该文件的分析结果；为 None 时不按文件过滤
+    :param kind: 只删除某一类结果 ('voice_segments', 'person_segments', 'subtitles')
+    :return: 删除的条目数
+    """
+    fingerprint = file_fingerprint(media_path) if media_path else None
+    return get_analysis_cache().invalidate(fingerprint=fingerprint, kind=kind)
+
+
+def _cache_params(func: Callable, params: Dict[str, Any]) -> Dict[str, Any]:
+    """补全函数的默认参数，使显式传入默认值与省略参数得到相同的缓存键。"""
+    bound = inspect.signature(func).bind_partial(**params)
+    bound.apply_defaults()
+    key_params = {name: value for name, value in bound.arguments.items()
+                  if name not in _PERFORMANCE_ONLY_PARAMS}
+    key_params['_version'] = _CACHE_VERSION
+    return key_params
+
+
+def _cached(kind: str, media_path: str, func: Callable, params: Dict[str, Any],
+            compute: Callable[[], Any], use_cache: bool) -> Any:
+    if not use_cache:
+        return compute()
+    try:
+        fingerprint = file_fingerprint(media_path)
+    except OSError as e:
+        print(f"无法计算文件指纹，跳过分析缓存: {e}")
+        return compute()
+
+    cache = get_analysis_cache()
+    key_params = _cache_params(func, params)
+    value = cache.get(kind, fingerprint, key_params)
+    if value is not None:
+        print(f"使用缓存的分析结果 ({kind}): {os.path.basename(media_path)}")
+        return value
+
+    value = compute()
+    # 空结果可能来自模型不可用或处理出错，不写入缓存，以免把失败结果固化下来
+    if value:
+        try:
+            cache.put(kind, fingerprint, key_params, value)
+        except Exception as e:
+            print(f"写入分析缓存失败: {e}")
+    return value
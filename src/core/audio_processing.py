@@ -1,11 +1,25 @@
-import torch
 import os
-import torchaudio
+import subprocess
+from array import array
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from core.ffmpeg_utils import get_ffmpeg_exe
+from core.instrumentation import count, span
+from core.model_registry import registry
+
+# Silero VAD 与 Whisper 都使用 16 kHz 单声道音频
+SAMPLE_RATE = 16000
+# Silero VAD 在 16 kHz 下每次处理 512 个采样点 (32 毫秒)
+VAD_WINDOW_SAMPLES = 512
 
 # 【最终正确版 - V2 恢复】
 # 在干净的环境下，这是最标准、最高效的实现方式。
+# torch 的导入和 Silero VAD 模型的加载都推迟到第一次检测人声时进行，避免拖慢 GUI 启动。
 
-try:
+def _load_silero_vad():
+    import torch
     # force_reload=False 确保在干净的环境下，优先使用本地缓存，避免网络问题。
     model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
                                   model='silero_vad',
@@ -14,38 +28,224 @@ try:
     
     (get_speech_timestamps, _, read_audio, _, _) = utils
     print("Silero VAD 模型已从本地 pip 包成功加载。")
+    return model, get_speech_timestamps, read_audio
+
+
+registry.register('silero_vad', _load_silero_vad)
+
+
+def load_audio(media_path: str, cache_path: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    使用 ffmpeg 将媒体文件的音轨直接解码为 16 kHz 单声道 float32 数组，不经过临时 WAV 文件。
+    返回的数组可以同时交给 get_voice_segments 和 generate_subtitles 使用。
+
+    :param media_path: 视频或音频文件路径
+    :param cache_path: 可选，原始 float32 数据的缓存文件路径。适合很长的输入：
+                       ffmpeg 直接写入该文件，返回内存映射数组而不是把整段音频读入内存；
+                       缓存文件比源文件新时直接复用
+    :return: 音频数组；没有音轨或解码失败时返回 None
+    """
+    with span('load_audio', file=media_path):
+        audio = _decode_audio(media_path, cache_path)
+    if audio is not None:
+        count('audio_seconds_decoded', len(audio) / SAMPLE_RATE)
+    return audio
+
+
+def _audio_decode_command(media_path: str):
+    return [get_ffmpeg_exe(), '-hide_banner', '-nostdin', '-loglevel', 'error',
+            '-i', media_path, '-vn', '-sn', '-dn',
+            '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 'f32le']
+
+
+def iter_audio_blocks(media_path: str, block_samples: int) -> Iterator[np.ndarray]:
+    """
+    以固定长度的块流式解码音轨 (16 kHz 单声道 float32)，内存占用与文件长度无关。
+    除最后一块外，每块恰好包含 block_samples 个采样点。
+
+    :raises RuntimeError: ffmpeg 解码失败
+    """
+    process = subprocess.Popen(_audio_decode_command(media_path) + ['-'],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    block_bytes = block_samples * 4
+    try:
+        while True:
+            buffer = bytearray(block_bytes)
+            view = memoryview(buffer)
+            filled = 0
+            while filled < block_bytes:
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            # float32 需要按 4 字节对齐
+            filled -= filled % 4
+            if filled:
+                yield np.frombuffer(buffer, dtype=np.float32, count=filled // 4)
+            if filled < block_bytes:
+                break
+        stderr = process.stderr.read()
+        process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"解码音频失败 '{os.path.basename(media_path)}': {stderr.decode('utf-8', 'replace').strip()}")
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stderr.close()
+
+
+def _decode_audio(media_path: str, cache_path: Optional[str]) -> Optional[np.ndarray]:
+    command = _audio_decode_command(media_path)
+    try:
+        if cache_path:
+            return _load_audio_cached(command, media_path, cache_path)
+
+        process = subprocess.Popen(command + ['-'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        buffer = bytearray()
+        while True:
+            chunk = process.stdout.read(1 << 20)
+            if not chunk:
+                break
+            buffer += chunk
+        stderr = process.stderr.read()
+        process.wait()
+        if process.returncode != 0 or not buffer:
+            print(f"解码音频失败 '{os.path.basename(media_path)}': {stderr.decode('utf-8', 'replace').strip()}")
+            return None
+        # 由 bytearray 构造的数组可写，且不会再复制一份数据
+        return np.frombuffer(buffer, dtype=np.float32)
+    except Exception as e:
+        print(f"解码音频时出错: {e}")
+        return None
 
-except Exception as e:
-    print(f"加载 Silero VAD 模型失败。错误: {e}")
-    model, get_speech_timestamps, read_audio = None, None, None
 
-def get_voice_segments(audio_path, 
+def _load_audio_cached(command, media_path: str, cache_path: str) -> Optional[np.ndarray]:
+    if not (os.path.exists(cache_path) and os.path.getsize(cache_path) > 0
+            and os.path.getmtime(cache_path) >= os.path.getmtime(media_path)):
+        temp_path = cache_path + '.part'
+        process = subprocess.run(command + ['-y', temp_path], capture_output=True)
+        if process.returncode != 0 or not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            print(f"解码音频失败 '{os.path.basename(media_path)}': {process.stderr.decode('utf-8', 'replace').strip()}")
+            return None
+        os.replace(temp_path, cache_path)
+    # 'c' (copy-on-write) 模式得到可写视图，但不会修改缓存文件
+    return np.memmap(cache_path, dtype=np.float32, mode='c')
+
+
+def get_voice_segments(audio: Union[str, np.ndarray],
                        threshold=0.5, 
                        min_speech_duration_ms=250, 
-                       min_silence_duration_ms=100):
+                       min_silence_duration_ms=100,
+                       streaming: bool = False,
+                       block_seconds: float = 30.0):
     """
     使用高阶函数 get_speech_timestamps 分析音频，返回所有人声片段。
+
+    :param audio: 媒体文件路径，或 load_audio 返回的 16 kHz 单声道 float32 数组
+    :param streaming: 仅当 audio 为文件路径时有效。True 则按块流式解码并逐块运行模型，
+                      内存占用不随音频长度增长，结果与非流式完全一致
+    :param block_seconds: 流式模式下每次解码的音频长度（秒）
     """
-    if not all([model, read_audio, get_speech_timestamps]):
+    vad = registry.get('silero_vad')
+    if vad is None:
         print("Silero VAD 模型或工具函数不可用，无法处理音频。")
         return []
+    model, get_speech_timestamps, _ = vad
+
+    if streaming and isinstance(audio, str):
+        return _get_voice_segments_streaming(audio, model, get_speech_timestamps, block_seconds,
+                                             threshold=threshold,
+                                             min_speech_duration_ms=min_speech_duration_ms,
+                                             min_silence_duration_ms=min_silence_duration_ms)
 
     try:
-        wav, sample_rate = torchaudio.load(audio_path)
-        if wav.shape[0] > 1:
-            wav = torch.mean(wav, dim=0, keepdim=True)
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-            wav = resampler(wav)
+        import torch
+        if isinstance(audio, str):
+            name = os.path.basename(audio)
+            audio = load_audio(audio)
+            if audio is None:
+                return []
+        else:
+            name = "音频数据"
+        wav = torch.from_numpy(np.asarray(audio, dtype=np.float32))
         
-        speech_timestamps = get_speech_timestamps(wav, model, 
-                                                  sampling_rate=16000,
-                                                  threshold=threshold,
-                                                  min_speech_duration_ms=min_speech_duration_ms,
-                                                  min_silence_duration_ms=min_silence_duration_ms,
-                                                  return_seconds=True)
+        with span('vad', file=name):
+            speech_timestamps = get_speech_timestamps(wav, model, 
+                                                      sampling_rate=SAMPLE_RATE,
+                                                      threshold=threshold,
+                                                      min_speech_duration_ms=min_speech_duration_ms,
+                                                      min_silence_duration_ms=min_silence_duration_ms,
+                                                      return_seconds=True)
+        count('audio_seconds_vad', len(wav) / SAMPLE_RATE)
         
-        print(f"在 '{os.path.basename(audio_path)}' 中检测到 {len(speech_timestamps)} 个人声片段。")
+        print(f"在 '{name}' 中检测到 {len(speech_timestamps)} 个人声片段。")
+        return speech_timestamps
+
+    except Exception as e:
+        print(f"处理音频时出错: {e}")
+        return []
+
+class _ReplayVADModel:
+    """按顺序返回预先计算好的语音概率，用来把流式计算的概率交给 get_speech_timestamps 处理。"""
+
+    def __init__(self, probabilities):
+        self._probabilities = probabilities
+        self._position = 0
+
+    def reset_states(self, *args, **kwargs):
+        self._position = 0
+
+    def __call__(self, chunk, sampling_rate):
+        import torch
+        probability = self._probabilities[self._position]
+        self._position += 1
+        return torch.tensor(probability)
+
+
+def _get_voice_segments_streaming(media_path: str, model, get_speech_timestamps, block_seconds: float, **params):
+    """
+    流式 VAD：逐块解码音频，按 512 个采样点的窗口依次送入模型。
+
+    Silero 模型是有状态的，按原顺序逐窗口调用时，状态（以及 ONNX 版本保留的上下文采样点）
+    自然地跨块延续，因此块与块之间无需重叠，算出的每个窗口的概率与一次性处理整段音频完全相同。
+    内存中只保留概率序列（每 32 毫秒一个 float32），再交给 get_speech_timestamps 做同样的后处理，
+    跨块的人声片段也因此被完整地拼接起来。
+    """
+    import torch
+    name = os.path.basename(media_path)
+    # 块长度取窗口长度的整数倍，除最后一块外不会出现不完整的窗口
+    windows_per_block = max(1, int(block_seconds * SAMPLE_RATE) // VAD_WINDOW_SAMPLES)
+    probabilities = array('f')
+    total_samples = 0
+
+    try:
+        with span('vad', file=name, streaming=True):
+            model.reset_states()
+            for block in iter_audio_blocks(media_path, windows_per_block * VAD_WINDOW_SAMPLES):
+                total_samples += len(block)
+                if len(block) % VAD_WINDOW_SAMPLES:
+                    # 与 get_speech_timestamps 一致：最后一个不完整的窗口补零
+                    block = np.pad(block, (0, VAD_WINDOW_SAMPLES - len(block) % VAD_WINDOW_SAMPLES))
+                wav = torch.from_numpy(block)
+                for start in range(0, len(block), VAD_WINDOW_SAMPLES):
+                    probabilities.append(model(wav[start:start + VAD_WINDOW_SAMPLES], SAMPLE_RATE).item())
+            if not total_samples:
+                print(f"解码音频失败 '{name}': 没有音频数据")
+                return []
+
+            # 长度为 total_samples 的零步长张量不占用内存，仅用于让 get_speech_timestamps 按原逻辑分窗
+            placeholder = torch.zeros(1).expand(total_samples)
+            speech_timestamps = get_speech_timestamps(placeholder, _ReplayVADModel(probabilities),
+                                                      sampling_rate=SAMPLE_RATE,
+                                                      return_seconds=True,
+                                                      **params)
+        count('audio_seconds_decoded', total_samples / SAMPLE_RATE)
+        count('audio_seconds_vad', total_samples / SAMPLE_RATE)
+        print(f"在 '{name}' 中检测到 {len(speech_timestamps)} 个人声片段。")
         return speech_timestamps
 
     except Exception as e:
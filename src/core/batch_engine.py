@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from core import pipeline
+from core.checkpoint import get_journal
+
+# --- 批处理引擎 ---
+# 在工作进程池中并行执行批处理任务，不依赖 PyQt5。
+#
+# 任务是一个字典: {'operation': 'smart_remove', 'input': 输入路径, 'output': 输出路径, 'params': {...}}
+# 进度通过 on_event 回调上报（在调用 run() 的线程中调用），事件是一个字典:
+#   {'type': 'started',  'index': i, 'input': 路径}
+#   {'type': 'stage',    'index': i, 'stage': 阶段名称}
+#   {'type': 'finished', 'index': i, 'result': 结果字典}
+# 结果字典包含 index, input, output, status ('ok' | 'error' | 'cancelled'), error, result, elapsed，
+# 从上次运行的进度日志中恢复的结果额外包含 resumed: True。
+#
+# 每个文件完成后立即把结果写入进度日志 (core.checkpoint)。崩溃或取消后重新运行同一批任务时，
+# 上次已成功且输出文件仍然存在的文件直接使用记录的结果，只执行其余的文件；全部成功后删除日志。
+
+
+def default_stage_limits(max_workers: int) -> Dict[str, int]:
+    """
+    CPU 密集阶段的默认并发上限：人物检测和编码本身就是多线程的，
+    全部工作进程同时执行这些阶段只会互相争抢 CPU。
+    """
+    cpu_count = os.cpu_count() or 1
+    return {
+        'detect_person': max(1, min(max_workers, cpu_count // 4)),
+        'encode': max(1, min(max_workers, cpu_count // 2)),
+    }
+
+
+class BatchEngine:
+    def __init__(self, max_workers: Optional[int] = None, stage_limits: Optional[Dict[str, int]] = None,
+                 on_event: Optional[Callable[[Dict[str, Any]], None]] = None, resume: bool = True):
+        """
+        :param max_workers: 工作进程数，默认 CPU 核数的一半
+        :param stage_limits: {阶段名称: 最大并发数}，默认见 default_stage_limits
+        :param on_event: 进度事件回调
+        :param resume: 是否记录进度并跳过上次运行中已成功的文件
+        """
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.stage_limits = stage_limits if stage_limits is not None else default_stage_limits(self.max_workers)
+        self.on_event = on_event
+        self.resume = resume
+        self._cancel_requested = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def cancel(self) -> None:
+        """请求取消：尚未开始的任务不再执行，正在执行的任务在下一个阶段开始前停止。可在任意线程调用。"""
+        self._cancel_requested.set()
+
+    def terminate(self) -> None:
+        """
+        取消并立即结束所有工作进程，不等待正在执行的阶段结束（例如程序退出时）。可在任意线程调用。
+        被结束的任务记为取消，run() 随后很快返回。
+        """
+        self.cancel()
+        executor = self._executor
+        if executor is None:
+            return
+        # ProcessPoolExecutor 没有公开结束工作进程的接口
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            if process.is_alive():
+                process.terminate()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def run(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """执行所有任务并阻塞直到完成或取消，返回与 jobs 顺序一致的结果列表。"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        if not jobs:
+            return []
+
+        journal = get_journal('batch', jobs) if self.resume else None
+        for index, result in self._load_finished(journal, jobs).items():
+            results[index] = result
+            self._emit({'type': 'finished', 'index': index, 'result': result})
+        remaining = [index for index, result in enumerate(results) if result is None]
+        if not remaining:
+            if journal is not None:
+                journal.clear()
+            return results
+
+        # spawn 方式创建的子进程不会继承 GUI 线程、CUDA 上下文等状态
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager:
+            events = manager.Queue()
+            cancel_event = manager.Event()
+            semaphores = {name: manager.Semaphore(limit) for name, limit in self.stage_limits.items() if limit}
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.max_workers)
+
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(semaphores, cancel_event, events, threads_per_worker)) as executor:
+                self._executor = executor
+                futures = {executor.submit(_run_job, index, jobs[index]): index for index in remaining}
+                pending = set(futures)
+                while pending:
+                    if self._cancel_requested.is_set() and not cancel_event.is_set():
+                        cancel_event.set()
+                        for future in pending:
+                            future.cancel()
+                    done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    self._drain_events(events)
+                    for future in done:
+                        index = futures[future]
+                        results[index] = self._collect_result(future, index, jobs[index])
+                        self._save_finished(journal, results)
+                        self._emit({'type': 'finished', 'index': index, 'result': results[index]})
+                self._executor = None
+            self._drain_events(events)
+
+        if journal is not None and all(result['status'] == 'ok' for result in results):
+            journal.clear()
+        return results
+
+    def _load_finished(self, journal, jobs: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """从进度日志中读取上次已成功、输出文件仍然存在的文件的结果。"""
+        state = journal.load() if journal is not None else None
+        if not state:
+            return {}
+        finished = {}
+        for key, result in state.get('results', {}).items():
+            index = int(key)
+            if index < len(jobs) and result['status'] == 'ok' and os.path.exists(jobs[index]['output']):
+                finished[index] = {**result, 'resumed': True}
+        if finished:
+            print(f"从进度日志恢复: {len(finished)}/{len(jobs)} 个文件在上次运行中已完成，跳过。")
+        return finished
+
+    def _save_finished(self, journal, results: List[Optional[Dict[str, Any]]]) -> None:
+        if journal is None:
+            return
+        finished = {str(index): result for index, result in enumerate(results)
+                    if result is not None and result['status'] == 'ok'}
+        try:
+            journal.save({'results': finished}, force=True)
+        except Exception as e:
+            # 进度日志只用于恢复，写入失败不影响本次批处理
+            print(f"保存批处理进度失败: {e}")
+
+    def _collect_result(self, future, index: int, job: Dict[str, Any]) -> Dict[str, Any]:
+        if future.cancelled():
+            return _make_result(index, job, 'cancelled')
+        try:
+            return future.result()
+        except Exception as e:
+            if self.cancelled:
+                # 取消后被 terminate() 结束的工作进程
+                return _make_result(index, job, 'cancelled')
+            # 工作进程异常退出等无法在进程内捕获的错误
+            return _make_result(index, job, 'error', error=str(e))
+
+    def _drain_events(self, events) -> None:
+        while True:
+            try:
+                event = events.get_nowait()
+            except Exception:
+                return
+            self._emit(event)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event:
+            self.on_event(event)
+
+
+def _make_result(index: int, job: Dict[str, Any], status: str, error: Optional[str] = None,
+                 result: Optional[Dict[str, Any]] = None, elapsed: float = 0.0) -> Dict[str, Any]:
+    return {
+        'index': index, 'input': job.get('input'), 'output': job.get('output'),
+        'status': status, 'error': error, 'result': result, 'elapsed': elapsed,
+    }
+
+
+# --- 工作进程 ---
+_events = None
+
+
+def _init_worker(semaphores, cancel_event, events, threads_per_worker: int) -> None:
+    global _events
+    _events = events
+    # torch / OpenCV 默认会占用所有核心，多个工作进程同时运行时限制每个进程的线程数。
+    # 模型都是延迟导入的，因此在这里设置环境变量仍然有效。
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(name, str(threads_per_worker))
+    pipeline.configure_worker(semaphores, cancel_event)
+
+
+def _run_job(index: int, job: Dict[str, Any]) -> Dict[str, Any]:
+    def _on_stage(stage_name: str) -> None:
+        _events.put({'type': 'stage', 'index': index, 'stage': stage_name})
+
+    pipeline.set_stage_callback(_on_stage)
+    _events.put({'type': 'started', 'index': index, 'input': job['input']})
+
+    start = time.perf_counter()
+    try:
+        result = pipeline.run_operation(job['operation'], job['input'], job['output'], **job.get('params', {}))
+    except pipeline.JobCancelled:
+        return _make_result(index, job, 'cancelled', elapsed=time.perf_counter() - start)
+    except Exception as e:
+        traceback.print_exc()
+        return _make_result(index, job, 'error', error=str(e), elapsed=time.perf_counter() - start)
+
+    elapsed = time.perf_counter() - start
+    # cut_video_by_segments 出错时只打印错误信息，这里通过输出文件是否存在来判断是否成功
+    if not os.path.exists(job['output']):
+        return _make_result(index, job, 'error', error="输出文件未生成", result=result, elapsed=elapsed)
+    return _make_result(index, job, 'ok', result=result, elapsed=elapsed)
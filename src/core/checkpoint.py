@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from core.disk_cache import get_cache_dir, make_key
+
+# --- 断点续传日志 ---
+# 长时间运行的任务（长视频的人物检测、批处理）定期把进度写入一个小的 JSON 日志，
+# 崩溃或取消后重新运行同一个任务时从最后一次保存的进度继续，而不是从头开始。
+# 日志按 (任务类型, 决定任务内容的全部参数) 命名，保存在缓存目录的 checkpoints 子目录中，任务完成后删除。
+# 保存间隔（秒）可通过环境变量 AUTOCLIP_CHECKPOINT_SECONDS 配置。
+_DEFAULT_CHECKPOINT_SECONDS = 30.0
+
+
+class Journal:
+    """
+    一个任务的进度日志。写入使用临时文件 + 原子替换，进程在写入过程中崩溃也不会留下损坏的日志。
+    """
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """返回上次保存的状态，没有日志（或日志无法读取）时返回 None。"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, state: Dict[str, Any], force: bool = False) -> bool:
+        """
+        保存状态。距离上次保存不足保存间隔时直接返回 False，调用方可以在每一步都调用。
+
+        :param force: 忽略保存间隔，立即写入
+        """
+        now = time.monotonic()
+        if not force and now - self._last_save < self.interval:
+            return False
+        directory = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._last_save = now
+        return True
+
+    def clear(self) -> None:
+        """任务完成后删除日志。"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def get_journal(kind: str, *key_parts: Any) -> Journal:
+    """
+    返回任务的进度日志。
+
+    :param kind: 任务类型
+    :param key_parts: 决定任务内容的全部参数（可 JSON 序列化），相同的参数对应同一个日志
+    """
+    interval = float(os.environ.get('AUTOCLIP_CHECKPOINT_SECONDS', _DEFAULT_CHECKPOINT_SECONDS))
+    path = os.path.join(get_cache_dir('checkpoints'), f"{kind}_{make_key(kind, *key_parts)}.json")
+    return Journal(path, interval)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+from typing import Any, List, Optional
+
+from core.disk_cache import get_cache_dir, make_key, prune_directory, touch
+
+# --- 已编码片段缓存 ---
+# 智能剪辑时每个需要重编码的子片段（剪辑点附近不完整的 GOP）按 (源文件指纹, 起止时间, 编码参数) 缓存在磁盘上。
+# 调整阈值或某个剪辑点后重新导出，未变化的子片段直接复用，只编码新增或改变的部分，最后无损拼接。
+# 流复制的子片段本身没有编码开销，不缓存，避免在缓存中复制一份源文件。
+# 总大小上限可通过环境变量 AUTOCLIP_CHUNK_CACHE_MB 配置，超出时按 LRU 淘汰。
+_DEFAULT_CHUNK_CACHE_MB = 2048
+# 修改片段的封装格式或编码流程时递增，使旧的缓存条目失效
+_CHUNK_CACHE_VERSION = 2
+CHUNK_SUFFIX = '.nut'
+
+
+class ChunkCache:
+    """
+    以文件形式保存已编码片段的缓存。写入使用临时文件 + 原子替换，多个进程同时使用同一个缓存目录是安全的。
+
+    淘汰不在写入时进行，而是由调用方在一次导出结束后调用 prune()：
+    否则同一次导出中先生成的片段可能在拼接前就被淘汰。
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, fingerprint: str, start: float, end: float, settings: List[Any]) -> str:
+        """
+        :param settings: 影响编码结果的全部参数（通常就是不含输入、输出路径的 ffmpeg 参数列表）
+        """
+        return make_key(_CHUNK_CACHE_VERSION, fingerprint, f"{start:.6f}", f"{end:.6f}", settings)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key + CHUNK_SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """返回已缓存的片段路径，未命中时返回 None。"""
+        path = self.path(key)
+        if os.path.exists(path):
+            touch(path)
+            return path
+        return None
+
+    def temp_path(self) -> str:
+        """返回缓存目录中的一个临时文件路径，编码完成后用 put() 移入缓存。"""
+        fd, path = tempfile.mkstemp(dir=self.root, suffix=CHUNK_SUFFIX + '.part')
+        os.close(fd)
+        return path
+
+    def put(self, key: str, temp_path: str) -> str:
+        """把编码完成的临时文件移入缓存，返回缓存中的路径。"""
+        path = self.path(key)
+        os.replace(temp_path, path)
+        return path
+
+    def prune(self) -> int:
+        """按最近使用时间淘汰，直到总大小不超过上限，返回删除的片段数。"""
+        return prune_directory(self.root, self.max_bytes, suffixes=(CHUNK_SUFFIX,))
+
+
+_cache: Optional[ChunkCache] = None
+
+
+def get_chunk_cache() -> ChunkCache:
+    global _cache
+    if _cache is None:
+        max_mb = int(os.environ.get('AUTOCLIP_CHUNK_CACHE_MB', _DEFAULT_CHUNK_CACHE_MB))
+        _cache = ChunkCache(get_cache_dir('chunks'), max_bytes=max_mb * 1024 * 1024)
+    return _cache
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# 所有磁盘缓存的根目录，可通过环境变量 AUTOCLIP_CACHE_DIR 修改
+_DEFAULT_CACHE_ROOT = os.path.join(os.path.expanduser('~'), '.autoclip', 'cache')
+# 指纹采样块大小：只读取文件开头、中间和结尾各一块，长视频也能在毫秒级完成
+_FINGERPRINT_BLOCK_SIZE = 1 << 20
+
+
+def get_cache_dir(name: str) -> str:
+    """返回（并创建）名为 name 的缓存子目录。"""
+    root = os.environ.get('AUTOCLIP_CACHE_DIR', _DEFAULT_CACHE_ROOT)
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    计算文件内容的快速指纹：文件大小 + 开头、中间、结尾三块数据的哈希。
+    不依赖文件名和修改时间，文件被移动或复制后指纹不变。
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= 3 * _FINGERPRINT_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            for offset in (0, size // 2, size - _FINGERPRINT_BLOCK_SIZE):
+                f.seek(offset)
+                digest.update(f.read(_FINGERPRINT_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """将任意可 JSON 序列化的内容组合为稳定的缓存键。"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+
+def touch(path: str) -> None:
+    """更新文件的访问/修改时间，用于 LRU 淘汰。"""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def prune_directory(root: str, max_bytes: int, suffixes: Optional[tuple] = None) -> int:
+    """
+    按最近使用时间 (mtime) 淘汰 root 下的缓存文件，直到总大小不超过 max_bytes。
+
+    :param suffixes: 只统计并淘汰这些后缀的文件，默认所有文件
+    :return: 删除的文件数
+    """
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if suffixes and not filename.endswith(suffixes):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+class DiskCache:
+    """
+    以 JSON 文件保存在磁盘上的键值缓存。
+
+    每个条目记录所属的类别 (kind)、源文件指纹和参数，可以按源文件或类别批量失效；
+    总大小超出 max_bytes 时按最近使用时间淘汰。写入使用临时文件 + 原子替换，
+    多个进程同时读写同一个缓存目录是安全的。
+    """
+
+    _SUFFIX = '.json'
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key + self._SUFFIX)
+
+    def get(self, kind: str, fingerprint: str, params: Dict[str, Any]) -> Optional[Any]:
+        path = self._entry_path(make_key(kind, fingerprint, params))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return entry.get('value')
+
+    def put(self, kind: str, fingerprint: str, params: Dict[str, Any], value: Any) -> None:
+        entry = {'kind': kind, 'fingerprint': fingerprint, 'params': params,
+                 'created': time.time(), 'value': value}
+        path = self._entry_path(make_key(kind, fingerprint, params))
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        prune_directory(self.root, self.max_bytes, suffixes=(self._SUFFIX,))
+
+    def invalidate(self, fingerprint: Optional[str] = None, kind: Optional[str] = None) -> int:
+        """
+        删除匹配的条目。两个参数都为 None 时清空整个缓存。
+
+        :return: 删除的条目数
+        """
+        removed = 0
+        for path in self._entry_paths():
+            if fingerprint is not None or kind is not None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = {}
+                if fingerprint is not None and entry.get('fingerprint') != fingerprint:
+                    continue
+                if kind is not None and entry.get('kind') != kind:
+                    continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def total_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in self._entry_paths() if os.path.exists(path))
+
+    def _entry_paths(self) -> List[str]:
+        return [os.path.join(self.root, name) for name in os.listdir(self.root) if name.endswith(self._SUFFIX)]
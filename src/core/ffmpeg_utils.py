@@ -0,0 +1,107 @@
+import re
+import subprocess
+from typing import Any, Dict, List
+
+import imageio_ffmpeg
+
+# imageio-ffmpeg 只附带 ffmpeg，没有 ffprobe，
+# 因此这里通过解析 `ffmpeg -i` 的 stderr 输出来获取媒体信息。
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_START_RE = re.compile(r"start:\s*(-?\d+(?:\.\d+)?)")
+_VIDEO_RE = re.compile(r"Stream #\d+:\d+.*?: Video: (\w+)(.*)")
+_AUDIO_RE = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+)(.*)")
+_SIZE_RE = re.compile(r"\b(\d{2,5})x(\d{2,5})\b")
+_FPS_RE = re.compile(r"(\d+(?:\.\d+)?) fps")
+_PIX_FMT_RE = re.compile(r",\s*((?:yuv|nv|rgb|bgr|gray|p01)\w*)")
+_SAMPLE_RATE_RE = re.compile(r"(\d+) Hz")
+_CHANNELS_RE = re.compile(r"Hz,\s*(mono|stereo|(\d+)(?:\.(\d+))?)")
+_PTS_TIME_RE = re.compile(r"pts_time:(-?\d+(?:\.\d+)?)")
+
+
+def get_ffmpeg_exe() -> str:
+    """返回 imageio-ffmpeg 附带的 ffmpeg 可执行文件路径。"""
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """
+    执行一条 ffmpeg 命令（自动补上可执行文件和 -hide_banner）。
+    失败时抛出 subprocess.CalledProcessError，由调用方决定如何处理。
+    """
+    command = [get_ffmpeg_exe(), '-hide_banner', '-nostdin'] + list(args)
+    return subprocess.run(command, check=True, capture_output=True, text=True,
+                          encoding='utf-8', errors='replace', **kwargs)
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """
+    获取媒体文件的基本信息。
+
+    :param path: 媒体文件路径
+    :return: 包含 duration, start_time, video_codec, width, height, fps, pix_fmt,
+             audio_codec, sample_rate, channels 的字典；不存在的流对应的字段为 None
+    """
+    # `ffmpeg -i` 不指定输出时返回码非 0，这是正常现象，因此不检查返回码
+    process = subprocess.run([get_ffmpeg_exe(), '-hide_banner', '-nostdin', '-i', path],
+                             capture_output=True, text=True, encoding='utf-8', errors='replace')
+    stderr = process.stderr
+
+    info: Dict[str, Any] = {
+        'duration': None, 'start_time': 0.0,
+        'video_codec': None, 'width': None, 'height': None, 'fps': None, 'pix_fmt': None,
+        'audio_codec': None, 'sample_rate': None, 'channels': None,
+    }
+
+    match = _DURATION_RE.search(stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        info['duration'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = _START_RE.search(stderr)
+    if match:
+        info['start_time'] = float(match.group(1))
+
+    for line in stderr.splitlines():
+        video = _VIDEO_RE.search(line)
+        if video and info['video_codec'] is None:
+            info['video_codec'] = video.group(1)
+            rest = video.group(2)
+            size = _SIZE_RE.search(rest)
+            if size:
+                info['width'], info['height'] = int(size.group(1)), int(size.group(2))
+            fps = _FPS_RE.search(rest)
+            if fps:
+                info['fps'] = float(fps.group(1))
+            pix_fmt = _PIX_FMT_RE.search(rest)
+            if pix_fmt:
+                info['pix_fmt'] = pix_fmt.group(1)
+            continue
+        audio = _AUDIO_RE.search(line)
+        if audio and info['audio_codec'] is None:
+            info['audio_codec'] = audio.group(1)
+            rest = audio.group(2)
+            rate = _SAMPLE_RATE_RE.search(rest)
+            if rate:
+                info['sample_rate'] = int(rate.group(1))
+            channels = _CHANNELS_RE.search(rest)
+            if channels:
+                layout, main, lfe = channels.groups()
+                if layout in ('mono', 'stereo'):
+                    info['channels'] = 1 if layout == 'mono' else 2
+                else:
+                    info['channels'] = int(main) + int(lfe or 0)
+
+    if info['duration'] is None and info['video_codec'] is None and info['audio_codec'] is None:
+        raise ValueError(f"无法解析媒体文件: {path}")
+    return info
+
+
+def get_keyframe_times(path: str) -> List[float]:
+    """
+    返回视频流中所有关键帧的时间戳（秒，已排序）。
+    只解码关键帧 (-skip_frame nokey)，即使是长视频也很快。
+    """
+    process = run_ffmpeg(['-nostats', '-skip_frame', 'nokey', '-i', path,
+                          '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-'])
+    times = [float(t) for t in _PTS_TIME_RE.findall(process.stderr)]
+    return sorted(set(times))
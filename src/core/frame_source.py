@@ -0,0 +1,76 @@
+import subprocess
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from core.ffmpeg_utils import get_ffmpeg_exe, probe_media
+from core.instrumentation import count
+
+
+def get_scaled_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """按最长边不超过 max_side 等比缩放（不放大），返回偶数的 (宽, 高)。"""
+    scale = min(1.0, max_side / max(width, height))
+    scaled_width = max(2, int(round(width * scale / 2)) * 2)
+    scaled_height = max(2, int(round(height * scale / 2)) * 2)
+    return scaled_width, scaled_height
+
+
+def iter_sampled_frames(video_path: str, sample_rate: float, max_side: int = 640,
+                        start_time: float = 0.0, media_info: Optional[Dict] = None) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    让 ffmpeg 按固定采样率解码并缩放视频帧，通过 rawvideo 管道逐帧读取。
+
+    与 cv2.VideoCapture + CAP_PROP_POS_FRAMES 跳帧相比，ffmpeg 在解码端按时间抽帧，
+    不会在每一步都触发一次关键帧定位；缩放也在解码端完成，模型无需再处理全分辨率帧。
+
+    :param video_path: 视频文件路径
+    :param sample_rate: 每秒采样的帧数
+    :param max_side: 输出帧最长边的像素数，一般设为模型的输入尺寸
+    :param start_time: 从该时间点（秒）开始采样
+    :param media_info: 可选，预先通过 probe_media 获取的媒体信息
+    :return: 生成 (时间戳, BGR 帧) 元组；帧直接引用读取缓冲区，不做额外拷贝
+    """
+    if sample_rate <= 0:
+        raise ValueError("sample_rate 必须大于 0")
+    if media_info is None:
+        media_info = probe_media(video_path)
+    if not media_info['width'] or not media_info['height']:
+        raise ValueError(f"无法获取视频 '{video_path}' 的分辨率。")
+
+    width, height = get_scaled_size(media_info['width'], media_info['height'], max_side)
+    frame_size = width * height * 3
+
+    command = [get_ffmpeg_exe(), '-hide_banner', '-nostdin', '-loglevel', 'error']
+    if start_time > 0:
+        command += ['-ss', f"{start_time:.6f}"]
+    command += ['-i', video_path, '-an', '-sn', '-dn',
+                '-vf', f"fps={sample_rate},scale={width}:{height}",
+                '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame_size)
+    try:
+        sample_index = 0
+        while True:
+            buffer = bytearray(frame_size)
+            if not _read_exactly(process.stdout, memoryview(buffer)):
+                break
+            frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+            count('frames_decoded')
+            yield start_time + sample_index / sample_rate, frame
+            sample_index += 1
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def _read_exactly(stream, view: memoryview) -> bool:
+    """将管道中的数据直接读入 view，读满返回 True，遇到 EOF 返回 False。"""
+    offset = 0
+    while offset < len(view):
+        count = stream.readinto(view[offset:])
+        if not count:
+            return False
+        offset += count
+    return True
@@ -0,0 +1,250 @@
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# --- 性能埋点 ---
+# 记录各处理阶段的耗时 (span)、计数器 (解码帧数、推理帧数、处理的音频秒数、写入字节数) 和峰值内存。
+#
+# 默认只在内存中汇总，供 summary() / format_summary() 使用；以下环境变量可以开启更多输出
+# (也可以调用 configure() 设置，批处理工作进程会继承环境变量):
+#   AUTOCLIP_TRACE=路径      每个 span 结束时向该文件追加一行 JSON
+#   AUTOCLIP_METRICS=路径    调用 write_metrics() 时写出 Prometheus 文本格式的指标
+#   AUTOCLIP_PROFILE=目录    对每个 span 运行 cProfile，结果保存为 <目录>/<span>-<pid>-<序号>.prof
+#
+# 每个阶段都是一个独立的具名函数调用，py-spy 等采样分析器 (py-spy record --pid <pid>) 的火焰图中
+# 可以直接按 span 名称对应的函数定位耗时；cProfile 开销较大，只在排查问题时开启。
+
+_lock = threading.Lock()
+_local = threading.local()
+
+_trace_path: Optional[str] = os.environ.get('AUTOCLIP_TRACE') or None
+_metrics_path: Optional[str] = os.environ.get('AUTOCLIP_METRICS') or None
+_profile_dir: Optional[str] = os.environ.get('AUTOCLIP_PROFILE') or None
+
+# span 名称 -> {'count': 次数, 'total': 累计秒数, 'max': 最长一次的秒数}
+_spans: Dict[str, Dict[str, float]] = {}
+_counters: Dict[str, float] = {}
+_profile_sequence = 0
+
+
+def configure(trace_path: Optional[str] = None, metrics_path: Optional[str] = None,
+              profile_dir: Optional[str] = None) -> None:
+    """
+    设置输出位置，参数为 None 的项保持不变。同时写入环境变量，使之后启动的工作进程使用相同设置。
+
+    :param trace_path: JSON lines 格式的 span 记录文件
+    :param metrics_path: Prometheus 文本格式的指标文件
+    :param profile_dir: cProfile 结果目录
+    """
+    global _trace_path, _metrics_path, _profile_dir
+    for env_name, value in (('AUTOCLIP_TRACE', trace_path), ('AUTOCLIP_METRICS', metrics_path),
+                            ('AUTOCLIP_PROFILE', profile_dir)):
+        if value is not None:
+            os.environ[env_name] = value
+    if trace_path is not None:
+        _trace_path = trace_path
+    if metrics_path is not None:
+        _metrics_path = metrics_path
+    if profile_dir is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        _profile_dir = profile_dir
+
+
+def reset() -> None:
+    """清空内存中汇总的 span 和计数器（不影响已写入 trace 文件的记录）。"""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def count(name: str, value: float = 1) -> None:
+    """累加计数器。"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值内存占用 (MB)，无法获取时返回 None。"""
+    try:
+        import resource
+    except ImportError:
+        # Windows 上没有 resource 模块，安装了 psutil 时使用其记录的峰值工作集
+        try:
+            import psutil
+            memory = psutil.Process().memory_info()
+            return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextmanager
+def span(name: str, file: Optional[str] = None, **attrs: Any):
+    """
+    记录一个阶段的耗时。span 可以嵌套，trace 记录中的 parent 为外层 span 的名称。
+
+    :param name: 阶段名称，如 'vad'、'detect_person'
+    :param file: 正在处理的文件，trace 中只记录文件名
+    :param attrs: 写入 trace 记录的其它属性，span 内可以通过 yield 出的字典继续补充
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    stack.append(name)
+
+    profiler = _start_profiler()
+    record_attrs = dict(attrs)
+    start_wall = time.time()
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield record_attrs
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        _stop_profiler(profiler, name)
+        with _lock:
+            stats = _spans.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+        if _trace_path:
+            _write_trace({
+                'name': name, 'parent': parent, 'file': os.path.basename(file) if file else None,
+                'start': start_wall, 'duration': elapsed, 'status': status,
+                'pid': os.getpid(), 'thread': threading.current_thread().name,
+                'peak_rss_mb': peak_rss_mb(), **record_attrs,
+            })
+
+
+def summary() -> Dict[str, Any]:
+    """返回内存中汇总的 span、计数器和峰值内存，结果可以直接 JSON 序列化。"""
+    with _lock:
+        return {
+            'spans': {name: dict(stats) for name, stats in _spans.items()},
+            'counters': dict(_counters),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多个 summary()（例如批处理中各工作进程的结果），峰值内存取最大值。"""
+    merged = {'spans': {}, 'counters': {}, 'peak_rss_mb': None}
+    for item in summaries:
+        if not item:
+            continue
+        for name, stats in item.get('spans', {}).items():
+            target = merged['spans'].setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            target['count'] += stats['count']
+            target['total'] += stats['total']
+            target['max'] = max(target['max'], stats['max'])
+        for name, value in item.get('counters', {}).items():
+            merged['counters'][name] = merged['counters'].get(name, 0) + value
+        if item.get('peak_rss_mb') is not None:
+            merged['peak_rss_mb'] = max(merged['peak_rss_mb'] or 0.0, item['peak_rss_mb'])
+    return merged
+
+
+def format_summary(data: Optional[Dict[str, Any]] = None, max_spans: int = 4) -> str:
+    """把 summary 格式化为一行简短的文字，用于状态栏。"""
+    data = data if data is not None else summary()
+    spans = sorted(data['spans'].items(), key=lambda item: item[1]['total'], reverse=True)[:max_spans]
+    parts = [f"{name} {stats['total']:.1f}s" for name, stats in spans]
+    counters = data['counters']
+    if counters.get('frames_inferred'):
+        parts.append(f"推理 {int(counters['frames_inferred'])} 帧")
+    if counters.get('frames_motion_skipped'):
+        parts.append(f"门控跳过 {int(counters['frames_motion_skipped'])} 帧")
+    if counters.get('chunks_reused'):
+        parts.append(f"复用 {int(counters['chunks_reused'])} 个已编码片段")
+    if counters.get('bytes_written'):
+        parts.append(f"写入 {counters['bytes_written'] / (1024 * 1024):.1f} MB")
+    if data.get('peak_rss_mb'):
+        parts.append(f"峰值内存 {data['peak_rss_mb']:.0f} MB")
+    return "耗时: " + ", ".join(parts) if parts else ""
+
+
+def write_metrics(path: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    以 Prometheus 文本格式写出指标 (适用于 node_exporter 的 textfile collector)。
+
+    :param path: 输出路径，默认使用 configure() / AUTOCLIP_METRICS 设置的路径；都未设置时不写出
+    :return: 写出的文件路径
+    """
+    path = path or _metrics_path
+    if not path:
+        return None
+    data = data if data is not None else summary()
+    lines = [
+        '# HELP autoclip_stage_seconds_total 各阶段累计耗时（秒）',
+        '# TYPE autoclip_stage_seconds_total counter',
+    ]
+    lines += [f'autoclip_stage_seconds_total{{stage="{name}"}} {stats["total"]:.6f}'
+              for name, stats in sorted(data['spans'].items())]
+    lines += ['# HELP autoclip_stage_runs_total 各阶段执行次数', '# TYPE autoclip_stage_runs_total counter']
+    lines += [f'autoclip_stage_runs_total{{stage="{name}"}} {stats["count"]}'
+              for name, stats in sorted(data['spans'].items())]
+    for name, value in sorted(data['counters'].items()):
+        metric = 'autoclip_' + re.sub(r'[^a-zA-Z0-9_]', '_', name) + '_total'
+        lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+    if data.get('peak_rss_mb') is not None:
+        lines += ['# TYPE autoclip_peak_rss_bytes gauge', f'autoclip_peak_rss_bytes {int(data["peak_rss_mb"] * 1024 * 1024)}']
+
+    # textfile collector 可能随时读取，先写临时文件再原子替换
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_path, path)
+    return path
+
+
+def _write_trace(record: Dict[str, Any]) -> None:
+    line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+    try:
+        # 追加模式下单次写入一整行，多个工作进程写同一个文件时记录不会交错
+        with open(_trace_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    except OSError as e:
+        print(f"写入性能记录失败: {e}")
+
+
+def _start_profiler() -> Optional[cProfile.Profile]:
+    # 只对最外层的 span 运行 cProfile，Python 不支持同一线程中同时运行多个 profiler
+    if not _profile_dir or getattr(_local, 'profiling', False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # 其它线程或调用方已经启用了 profiler
+        return None
+    _local.profiling = True
+    return profiler
+
+
+def _stop_profiler(profiler: Optional[cProfile.Profile], name: str) -> None:
+    global _profile_sequence
+    if profiler is None:
+        return
+    profiler.disable()
+    _local.profiling = False
+    with _lock:
+        _profile_sequence += 1
+        sequence = _profile_sequence
+    path = os.path.join(_profile_dir, f'{name}-{os.getpid()}-{sequence}.prof')
+    try:
+        profiler.dump_stats(path)
+    except OSError as e:
+        print(f"保存性能分析结果失败: {e}")
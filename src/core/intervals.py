@@ -0,0 +1,156 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# 片段可以是 {'start': s, 'end': e} 字典，也可以是 (s, e) 元组
+SegmentLike = Union[Dict[str, float], Tuple[float, float]]
+
+
+def to_tuples(segments: Iterable[SegmentLike]) -> List[Tuple[float, float]]:
+    """将片段列表统一转换为 (开始, 结束) 元组列表，丢弃长度不大于 0 的片段。"""
+    return _to_list(as_array(segments))
+
+
+def to_dicts(segments: Iterable[Tuple[float, float]]) -> List[Dict[str, float]]:
+    return [{'start': start, 'end': end} for start, end in segments]
+
+
+# --- 基于 NumPy 的片段运算 ---
+# 片段在内部表示为形状 (n, 2) 的 float64 数组，每行为 [开始, 结束)。检测结果可能有成百上千个片段，
+# 所有运算都是排序 + 向量化操作，不逐个片段循环。对外的函数仍然接受字典或元组，返回元组列表。
+
+def as_array(segments: Iterable[SegmentLike]) -> np.ndarray:
+    """转换为 (n, 2) 数组（不排序、不合并），丢弃长度不大于 0 的片段。"""
+    if isinstance(segments, np.ndarray):
+        array = segments.astype(np.float64, copy=False).reshape(-1, 2)
+    else:
+        pairs = [(segment['start'], segment['end']) if isinstance(segment, dict) else segment
+                 for segment in segments]
+        array = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+    return array[array[:, 1] > array[:, 0]]
+
+
+def merge(segments: np.ndarray, gap: float = 0.0) -> np.ndarray:
+    """
+    排序并合并重叠、首尾相接或间隔不超过 gap 秒的片段，返回互不重叠的有序数组。
+    """
+    if len(segments) == 0:
+        return segments.reshape(0, 2)
+    segments = segments[np.argsort(segments[:, 0], kind='stable')]
+    # 到前一个片段为止的最大结束时间；开始时间超过它 + gap 的片段开启新的一组
+    running_end = np.maximum.accumulate(segments[:, 1])
+    new_group = np.empty(len(segments), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = segments[1:, 0] > running_end[:-1] + gap
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], len(segments)) - 1
+    return np.column_stack([segments[group_starts, 0], running_end[group_ends]])
+
+
+def union_segments(*segment_lists: Sequence[SegmentLike]) -> List[Tuple[float, float]]:
+    """求多个片段列表的并集，重叠或首尾相接的片段会被合并，结果按时间排序。"""
+    arrays = [as_array(segments) for segments in segment_lists]
+    return _to_list(merge(np.concatenate(arrays) if arrays else np.empty((0, 2))))
+
+
+def intersect_segments(a: Sequence[SegmentLike], b: Sequence[SegmentLike]) -> List[Tuple[float, float]]:
+    """求两个片段列表的交集，结果按时间排序。"""
+    return _to_list(_intersect(merge(as_array(a)), merge(as_array(b))))
+
+
+def _intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) == 0 or len(b) == 0:
+        return np.empty((0, 2))
+    # 两组都有序且互不重叠：与 a[i] 相交的 b 是下标 [lo[i], hi[i]) 的连续一段
+    lo = np.searchsorted(b[:, 1], a[:, 0], side='right')
+    hi = np.searchsorted(b[:, 0], a[:, 1], side='left')
+    counts = np.maximum(hi - lo, 0)
+    a_index = np.repeat(np.arange(len(a)), counts)
+    # 为每个相交对生成 b 的下标：每段从 lo[i] 开始连续递增
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    b_index = np.repeat(lo, counts) + offsets
+    result = np.column_stack([np.maximum(a[a_index, 0], b[b_index, 0]), np.minimum(a[a_index, 1], b[b_index, 1])])
+    return result[result[:, 1] > result[:, 0]]
+
+
+def complement_segments(segments: Sequence[SegmentLike], duration: float) -> List[Tuple[float, float]]:
+    """求片段在 [0, duration] 范围内的补集。"""
+    return _to_list(_complement(merge(as_array(segments)), duration))
+
+
+def _complement(merged: np.ndarray, duration: float) -> np.ndarray:
+    merged = np.clip(merged, 0.0, duration)
+    starts = np.concatenate([[0.0], merged[:, 1]])
+    ends = np.concatenate([merged[:, 0], [float(duration)]])
+    result = np.column_stack([starts, ends])
+    return result[result[:, 1] > result[:, 0]]
+
+
+def clean_segments(segments: Sequence[SegmentLike], duration: Optional[float] = None, min_gap: float = 0.0,
+                   min_length: float = 0.0, padding: float = 0.0) -> List[Tuple[float, float]]:
+    """
+    剪辑前的片段后处理，依次：
+      1. 合并间隔短于 min_gap 秒的片段（检测结果中短暂的中断）
+      2. 丢弃短于 min_length 秒的片段（偶发的误检）
+      3. 两端各扩展 padding 秒，重新合并并限制在 [0, duration] 内
+
+    得到数量更少、更完整的片段，剪辑时需要处理的片段数随之减少。
+    """
+    merged = merge(as_array(segments), gap=min_gap)
+    merged = merged[merged[:, 1] - merged[:, 0] >= min_length]
+    if padding:
+        merged = merge(merged + np.array([-padding, padding]))
+    merged = np.maximum(merged, 0.0)
+    if duration is not None:
+        merged = np.minimum(merged, duration)
+    return _to_list(merged[merged[:, 1] > merged[:, 0]])
+
+
+def _to_list(segments: np.ndarray) -> List[Tuple[float, float]]:
+    return [(start, end) for start, end in segments.tolist()]
+
+
+class IntervalIndex:
+    """
+    按开始时间排序的片段索引，用二分查找定位某一时刻所在的片段。
+
+    lookup() 同时返回结果保持不变的时间窗口 [下一个边界之前]，播放时只要当前时间
+    仍在窗口内就无需再次查找。片段之间允许重叠，此时返回开始时间最晚的那个片段。
+    """
+
+    def __init__(self, segments: Sequence[SegmentLike]):
+        """:param segments: 片段列表，lookup 返回的是片段在该列表中的下标"""
+        spans = []
+        for index, segment in enumerate(segments):
+            start, end = (segment['start'], segment['end']) if isinstance(segment, dict) else segment
+            spans.append((float(start), float(end), index))
+        spans.sort()
+        self._starts = [start for start, _, _ in spans]
+        self._ends = [end for _, end, _ in spans]
+        self._indices = [index for _, _, index in spans]
+        # 前缀最大结束时间：向前回溯重叠片段时，一旦它不超过查询时刻就可以停止
+        self._max_ends = list(accumulate(self._ends, max))
+        self._boundaries = sorted(set(self._starts) | set(self._ends))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def find(self, time: float) -> int:
+        """返回包含 time 的片段下标 (start <= time < end)，不在任何片段内时返回 -1。"""
+        position = bisect_right(self._starts, time) - 1
+        while position >= 0 and self._max_ends[position] > time:
+            if self._ends[position] > time:
+                return self._indices[position]
+            position -= 1
+        return -1
+
+    def lookup(self, time: float) -> Tuple[int, float, float]:
+        """
+        :return: (片段下标或 -1, 窗口开始, 窗口结束)。在 [窗口开始, 窗口结束) 内 find() 的结果都相同
+        """
+        position = bisect_right(self._boundaries, time)
+        window_start = self._boundaries[position - 1] if position > 0 else float('-inf')
+        window_end = self._boundaries[position] if position < len(self._boundaries) else float('inf')
+        return self.find(time), window_start, window_end
@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class ModelRegistry:
+    """
+    模型注册表：各模块注册模型的加载函数，模型在第一次被用到时才导入并加载。
+
+    - get() 是线程安全的，同一个模型只会被加载一次，并发调用会等待正在进行的加载。
+    - 加载失败时返回 None 并记录错误，与之前模块级加载失败时的行为保持一致。
+    - warm_up() 可以在后台线程中提前加载模型，例如在主窗口显示之后。
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """注册模型加载函数。重复注册会覆盖之前的加载函数并丢弃已加载的模型。"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+            self._errors.pop(name, None)
+
+    def get(self, name: str) -> Optional[Any]:
+        """返回已加载的模型，必要时先加载。加载失败返回 None。"""
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"未注册的模型: {name}")
+            model_lock = self._locks[name]
+
+        with model_lock:
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors:
+                return None
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                print(f"加载模型 '{name}' 失败: {e}")
+                self._errors[name] = e
+                return None
+            self._models[name] = model
+            return model
+
+    def is_registered(self, name: str) -> bool:
+        with self._lock:
+            return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get_error(self, name: str) -> Optional[Exception]:
+        return self._errors.get(name)
+
+    def unload(self, name: str) -> None:
+        """释放已加载的模型，并清除失败记录，下次 get() 时重新加载。"""
+        with self._lock:
+            model_lock = self._locks.get(name)
+        if model_lock is None:
+            return
+        with model_lock:
+            self._models.pop(name, None)
+            self._errors.pop(name, None)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None,
+                on_finished: Optional[Callable[[Dict[str, bool]], None]] = None) -> threading.Thread:
+        """
+        在后台线程中依次加载模型。
+
+        :param names: 要加载的模型名称，默认加载所有已注册的模型
+        :param on_finished: 全部加载完成后在后台线程中调用，参数为 {模型名称: 是否加载成功}
+        :return: 已启动的后台线程
+        """
+        with self._lock:
+            names = list(names) if names is not None else list(self._loaders)
+
+        def _run():
+            status = {name: self.get(name) is not None for name in names}
+            if on_finished:
+                on_finished(status)
+
+        thread = threading.Thread(target=_run, name='autoclip-model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+
+class LRUModelCache:
+    """
+    按键缓存多个同类模型（例如不同名称/设备的 Whisper 模型），总内存超出预算时淘汰最久未使用的模型。
+
+    - loader(key) 负责加载模型，size_of(model) 返回模型占用的字节数。
+    - 刚加载的模型即使单独超出预算也会保留（否则无法使用），此时其它模型都会被淘汰。
+    - 同一个键的并发 get() 只会加载一次。
+    - on_evict(key) 在模型被淘汰后调用，可用于释放显存等资源。
+    """
+
+    def __init__(self, loader: Callable[[Hashable], Any], max_bytes: int,
+                 size_of: Callable[[Any], int], on_evict: Optional[Callable[[Hashable], None]] = None):
+        self._loader = loader
+        self._size_of = size_of
+        self._on_evict = on_evict
+        self._max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+    def keys(self) -> List[Hashable]:
+        """按从最久未使用到最近使用的顺序返回已缓存的键。"""
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Any:
+        """返回缓存中的模型，必要时先加载。加载失败时抛出异常。"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key][0]
+            model = self._loader(key)
+            size = self._size_of(model)
+            with self._lock:
+                self._entries[key] = (model, size)
+                evicted = self._evict_locked(keep=key)
+        self._notify_evicted(evicted)
+        return model
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """调整内存预算，超出部分立即淘汰。"""
+        with self._lock:
+            self._max_bytes = max_bytes
+            evicted = self._evict_locked()
+        self._notify_evicted(evicted)
+
+    def evict(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._notify_evicted([(key, entry[0])])
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = [(key, model) for key, (model, _) in self._entries.items()]
+            self._entries.clear()
+        self._notify_evicted(evicted)
+
+    def _evict_locked(self, keep: Optional[Hashable] = None) -> List[Tuple[Hashable, Any]]:
+        evicted = []
+        total = sum(size for _, size in self._entries.values())
+        for key in list(self._entries):
+            if total <= self._max_bytes:
+                break
+            if key == keep:
+                continue
+            model, size = self._entries.pop(key)
+            total -= size
+            evicted.append((key, model))
+        return evicted
+
+    def _notify_evicted(self, evicted: List[Tuple[Hashable, Any]]) -> None:
+        # 先丢弃对模型的引用再调用 on_evict，使其可以真正回收内存（例如清空 CUDA 缓存）
+        while evicted:
+            key, model = evicted.pop(0)
+            del model
+            print(f"已从模型缓存中释放: {key}")
+            if self._on_evict:
+                self._on_evict(key)
+
+
+# 全局共享的模型注册表
+registry = ModelRegistry()
@@ -0,0 +1,236 @@
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.disk_cache import get_cache_dir
+from core.model_registry import registry
+
+# --- ONNX Runtime 人物检测后端 ---
+# 没有 GPU 的渲染节点上，ultralytics 的 PyTorch 推理是最慢的选择。这里把 YOLOv8 导出为 ONNX，
+# 在 CPU 上用 ONNX Runtime 推理，可选 INT8 量化，输入尺寸和线程数可配置。
+#
+# OnnxPersonDetector 的调用方式与 ultralytics 的 YOLO 模型一致 (model(frames, classes=[0], conf=..., imgsz=...))，
+# 返回的每个结果都有 boxes 属性，video_processing 中的批量检测代码不需要区分后端。
+# 导出和量化后的模型保存在缓存目录的 models 子目录中，只需生成一次；导出需要安装 ultralytics，
+# 量化需要安装 onnx，推理只需要 onnxruntime。
+DEFAULT_WEIGHTS = 'yolov8n.pt'
+# 与 ultralytics 预测时的默认值一致
+_IOU_THRESHOLD = 0.7
+_PAD_VALUE = 114
+_PERSON_CLASS = 0
+
+_register_lock = threading.Lock()
+
+
+class Detections(NamedTuple):
+    # 形状为 (n, 5) 的数组：原始帧坐标下的 x1, y1, x2, y2 和置信度
+    boxes: np.ndarray
+
+
+def default_threads() -> int:
+    """
+    推理线程数：环境变量 AUTOCLIP_ONNX_THREADS，其次 OMP_NUM_THREADS
+    （批处理引擎会按工作进程数为每个进程设置），都未设置时使用全部核心。
+    """
+    for name in ('AUTOCLIP_ONNX_THREADS', 'OMP_NUM_THREADS'):
+        value = os.environ.get(name)
+        if value and value.isdigit() and int(value) > 0:
+            return int(value)
+    return os.cpu_count() or 1
+
+
+def export_onnx_model(weights: str = DEFAULT_WEIGHTS, input_size: int = 640) -> str:
+    """
+    将 ultralytics 权重导出为 ONNX（批大小可变），已导出时直接返回路径。
+
+    :param weights: ultralytics 权重文件
+    :param input_size: 模型输入尺寸（正方形边长，必须是 32 的倍数）
+    :return: ONNX 模型路径
+    """
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    output_path = os.path.join(get_cache_dir('models'), f"{stem}_{input_size}.onnx")
+    if os.path.exists(output_path):
+        return output_path
+
+    from ultralytics import YOLO
+    print(f"正在导出 ONNX 模型: {weights} (输入尺寸 {input_size})")
+    exported = YOLO(weights).export(format='onnx', imgsz=input_size, dynamic=True, simplify=True)
+    # export 把结果写在权重文件旁边，移动到缓存目录，避免不同输入尺寸的导出结果互相覆盖
+    temp_path = output_path + '.part'
+    shutil.move(str(exported), temp_path)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def quantize_onnx_model(onnx_path: str, calibration_frames: Optional[Iterable[np.ndarray]] = None) -> str:
+    """
+    INT8 量化，已量化时直接返回路径。
+
+    提供校准帧（BGR 图像）时使用静态量化 (QDQ，激活值也量化)，速度提升更明显；
+    否则使用动态量化，只量化权重，不需要校准数据。
+
+    :return: 量化后的模型路径
+    """
+    suffix = '_int8_static' if calibration_frames is not None else '_int8'
+    output_path = os.path.splitext(onnx_path)[0] + suffix + '.onnx'
+    if os.path.exists(output_path):
+        return output_path
+
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    temp_path = output_path + '.part.onnx'
+    print(f"正在量化 ONNX 模型: {os.path.basename(onnx_path)}")
+    if calibration_frames is None:
+        quantize_dynamic(onnx_path, temp_path, weight_type=QuantType.QUInt8)
+    else:
+        quantize_static(onnx_path, temp_path, _CalibrationReader(onnx_path, calibration_frames),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class OnnxPersonDetector:
+    """在 CPU 上用 ONNX Runtime 运行 YOLOv8 (ultralytics 导出的 ONNX 模型) 的人物检测器。"""
+
+    def __init__(self, model_path: str, input_size: int = 640, threads: Optional[int] = None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads or default_threads()
+        # 单个模型内没有可并行的分支，inter-op 线程只会与 intra-op 线程争抢核心
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_size = input_size
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        # 导出时未开启 dynamic 的模型批大小固定为 1，只能逐帧推理
+        batch_dim = model_input.shape[0]
+        self._max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+        self._lock = threading.Lock()
+
+    def __call__(self, frames: List[np.ndarray], classes: Optional[List[int]] = None, conf: float = 0.25,
+                 imgsz: Optional[int] = None, verbose: bool = False) -> List[Detections]:
+        """
+        检测人物。参数与 ultralytics 的预测接口一致；模型的输入尺寸在导出时已确定，imgsz 被忽略，
+        classes 只支持人物 (0)。
+
+        :param frames: BGR 图像列表
+        """
+        if classes is not None and list(classes) != [_PERSON_CLASS]:
+            raise ValueError("ONNX 后端只支持检测人物 (classes=[0])")
+        results = []
+        step = self._max_batch or len(frames) or 1
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            inputs, transforms = zip(*(letterbox(frame, self.input_size) for frame in chunk))
+            # InferenceSession.run 本身是线程安全的，这里串行化是为了不让多个调用同时占满所有线程
+            with self._lock:
+                outputs = self.session.run(None, {self._input_name: np.stack(inputs)})[0]
+            results += [Detections(_postprocess(prediction, transform, conf))
+                        for prediction, transform in zip(outputs, transforms)]
+        return results
+
+
+def letterbox(frame: np.ndarray, size: int) -> Tuple[np.ndarray, Tuple[float, float, float]]:
+    """
+    等比缩放并居中填充到 size x size，返回 (CHW float32 RGB 输入, (缩放比例, 左边距, 上边距))。
+    """
+    import cv2
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    left, top = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.full((size, size, 3), _PAD_VALUE, dtype=np.uint8)
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR) \
+        if (new_width, new_height) != (width, height) else frame
+    canvas[top:top + new_height, left:left + new_width] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor), (scale, left, top)
+
+
+def _postprocess(prediction: np.ndarray, transform: Tuple[float, float, float], conf: float) -> np.ndarray:
+    """
+    解析单帧的 YOLOv8 输出 (4 + 类别数, 候选框数)：取人物类别的置信度，过滤、NMS 后换算回原始帧坐标。
+    """
+    scores = prediction[4 + _PERSON_CLASS]
+    keep = scores >= conf
+    if not keep.any():
+        return np.zeros((0, 5), dtype=np.float32)
+    cx, cy, w, h = prediction[:4, keep]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    scores = scores[keep]
+    kept = _nms(boxes, scores, _IOU_THRESHOLD)
+    boxes, scores = boxes[kept], scores[kept]
+    scale, left, top = transform
+    boxes = (boxes - np.array([left, top, left, top], dtype=np.float32)) / scale
+    return np.concatenate([boxes, scores[:, None]], axis=1).astype(np.float32)
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """贪心非极大值抑制，返回保留的下标（按置信度从高到低）。"""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    kept = []
+    while order.size:
+        best = order[0]
+        kept.append(best)
+        rest = order[1:]
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(kept, dtype=np.int64)
+
+
+class _CalibrationReader:
+    """为静态量化逐帧提供校准输入。"""
+
+    def __init__(self, onnx_path: str, frames: Iterable[np.ndarray]):
+        import onnxruntime as ort
+        model_input = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0]
+        self._input_name = model_input.name
+        size = model_input.shape[2] if isinstance(model_input.shape[2], int) else 640
+        self._inputs = iter([letterbox(frame, size)[0][None] for frame in frames])
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        tensor = next(self._inputs, None)
+        return None if tensor is None else {self._input_name: tensor}
+
+
+def _load_onnx_detector(input_size: int, quantize: bool, threads: Optional[int]) -> OnnxPersonDetector:
+    model_path = export_onnx_model(DEFAULT_WEIGHTS, input_size)
+    if quantize:
+        model_path = quantize_onnx_model(model_path)
+    detector = OnnxPersonDetector(model_path, input_size, threads)
+    print(f"ONNX 人物检测模型加载成功: {os.path.basename(model_path)}")
+    return detector
+
+
+def get_person_detector(backend: str = 'torch', input_size: int = 640, quantize: bool = False,
+                        threads: Optional[int] = None) -> Optional[Any]:
+    """
+    返回指定后端的人物检测模型，加载失败时返回 None。
+
+    :param backend: 'torch' (ultralytics 默认路径) 或 'onnx' (ONNX Runtime CPU)
+    :param input_size: ONNX 模型的输入尺寸，不同尺寸分别导出
+    :param quantize: ONNX 后端是否使用 INT8 动态量化模型
+    :param threads: ONNX Runtime 的推理线程数，默认见 default_threads()
+    """
+    if backend == 'torch':
+        return registry.get('yolo')
+    if backend != 'onnx':
+        raise ValueError(f"未知的人物检测后端: {backend}")
+
+    name = f"yolo_onnx_{input_size}{'_int8' if quantize else ''}_{threads or default_threads()}t"
+    with _register_lock:
+        # 每种配置只注册一次，重复注册会丢弃已加载的模型
+        if not registry.is_registered(name):
+            registry.register(name, lambda: _load_onnx_detector(input_size, quantize, threads))
+    return registry.get(name)
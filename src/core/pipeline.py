@@ -0,0 +1,228 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from core import instrumentation
+from core.analysis_cache import cached_person_segments, cached_subtitles, cached_voice_segments
+from core.intervals import clean_segments, union_segments
+from core.subtitle_processing import burn_subtitles_to_video, cut_and_burn_subtitles, write_srt_file
+from core.video_processing import cut_video_by_segments
+
+# --- 处理流程 ---
+# 组合分析与剪辑步骤的完整操作，供 GUI、批处理引擎等调用方直接使用。
+
+# GUI 中人声检测使用的参数。流式 VAD 的结果与一次性解码相同，但内存占用不随视频长度增长
+VOICE_PARAMS = {'threshold': 0.35, 'min_silence_duration_ms': 500, 'streaming': True}
+# 剪辑前的片段后处理参数 (见 intervals.clean_segments)：合并短暂的中断、丢弃零星的误检，
+# 人声片段两端各留一点余量，避免切掉字头字尾
+VOICE_CLEANUP = {'min_gap': 0.3, 'min_length': 0.2, 'padding': 0.1}
+PERSON_CLEANUP = {'min_gap': 0.5, 'min_length': 0.3}
+# 烧录字幕的默认样式，与 GUI 中的默认设置一致
+DEFAULT_SUBTITLE_STYLE = {'font': 'Arial', 'fontsize': 48, 'color': '#ffffff'}
+
+
+class JobCancelled(Exception):
+    """批处理被取消时，在下一个阶段开始前抛出。"""
+
+
+# --- 阶段控制 ---
+# 批处理工作进程通过 configure_worker 设置以下状态；普通调用时它们为空，stage() 不做任何事。
+_stage_semaphores: Dict[str, Any] = {}
+_cancel_event = None
+_stage_callback: Optional[Callable[[str], None]] = None
+# run_operation 执行期间各阶段的累计耗时（秒）
+_stage_timings: Dict[str, float] = {}
+
+
+def configure_worker(stage_semaphores: Optional[Dict[str, Any]] = None, cancel_event=None,
+                     stage_callback: Optional[Callable[[str], None]] = None) -> None:
+    """
+    设置当前进程的阶段控制。
+
+    :param stage_semaphores: {阶段名称: 信号量}，限制所有工作进程中同一阶段的并发数
+    :param cancel_event: 被设置后，下一个阶段开始前抛出 JobCancelled
+    :param stage_callback: 每个阶段开始时以阶段名称调用，用于上报进度
+    """
+    global _stage_semaphores, _cancel_event, _stage_callback
+    _stage_semaphores = dict(stage_semaphores or {})
+    _cancel_event = cancel_event
+    _stage_callback = stage_callback
+
+
+def set_stage_callback(stage_callback: Optional[Callable[[str], None]]) -> None:
+    """只替换阶段回调，保留其它阶段控制设置。"""
+    global _stage_callback
+    _stage_callback = stage_callback
+
+
+@contextmanager
+def stage(name: str):
+    """标记一个处理阶段：检查取消、上报进度，并在配置了并发限制时占用一个名额。"""
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise JobCancelled()
+    if _stage_callback:
+        _stage_callback(name)
+    semaphore = _stage_semaphores.get(name)
+    if semaphore is not None:
+        semaphore.acquire()
+    # 只统计阶段本身的耗时，不包括等待并发名额的时间
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_timings[name] = _stage_timings.get(name, 0.0) + time.perf_counter() - start
+        if semaphore is not None:
+            semaphore.release()
+
+
+# --- 操作 ---
+
+def keep_voice(video_path: str, output_path: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    只保留视频中包含人声的片段。
+
+    :return: 包含 voice_segments（检测到的片段数量）、cut_segments（后处理后实际剪辑的片段数量）
+             和 copied（未检测到人声，直接复制了原文件）的字典
+    """
+    with stage('detect_voice'):
+        detected = cached_voice_segments(video_path, use_cache=use_cache, **VOICE_PARAMS)
+    voice_segments = clean_segments(detected, **VOICE_CLEANUP)
+
+    result = {'voice_segments': len(detected), 'cut_segments': len(voice_segments), 'copied': not voice_segments}
+    with stage('encode'):
+        if not voice_segments:
+            print(f"'{os.path.basename(video_path)}' 中未检测到人声片段，直接复制原文件。")
+            shutil.copy(video_path, output_path)
+        else:
+            cut_video_by_segments(video_path, voice_segments, output_path, keep_segments=True)
+    return result
+
+
+def smart_remove(video_path: str, output_path: str, use_proxy: bool = False,
+                 motion_threshold: Optional[float] = None, adaptive: bool = False, backend: str = 'torch',
+                 quantize: bool = False, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    智能去除：移除视频中包含人声或人物的片段。
+
+    人声检测在原始文件上进行，人物检测在 use_proxy 为 True 时使用低分辨率代理文件；
+    两组片段取并集后只调用一次 cut_video_by_segments 从原始文件渲染输出，避免中间文件的二次编码和画质损失。
+
+    :param motion_threshold: 人物检测的运动门控阈值，见 get_person_segments
+    :param adaptive: 人物检测使用由粗到细的自适应采样，见 get_person_segments
+    :param backend: 人物检测后端 ('torch' 或 'onnx')，quantize 为 ONNX 后端是否使用 INT8 模型
+    :return: 包含 voice_segments、person_segments、removed_segments（片段数量）
+             以及 copied（未检测到任何片段，直接复制了原文件）的字典
+    """
+    with stage('detect_voice'):
+        voice_segments = cached_voice_segments(video_path, use_cache=use_cache, **VOICE_PARAMS)
+    with stage('detect_person'):
+        detected_persons = cached_person_segments(video_path, use_cache=use_cache, use_proxy=use_proxy,
+                                                  motion_threshold=motion_threshold, adaptive=adaptive,
+                                                  backend=backend, quantize=quantize)
+    remove_segments = union_segments(clean_segments(voice_segments, **VOICE_CLEANUP),
+                                     clean_segments(detected_persons, **PERSON_CLEANUP))
+
+    result = {
+        'voice_segments': len(voice_segments),
+        'person_segments': len(detected_persons),
+        'removed_segments': len(remove_segments),
+        'copied': not remove_segments,
+    }
+    with stage('encode'):
+        if not remove_segments:
+            print(f"'{os.path.basename(video_path)}' 中未检测到人声或人物片段，直接复制原文件。")
+            shutil.copy(video_path, output_path)
+        else:
+            cut_video_by_segments(video_path, remove_segments, output_path, keep_segments=False)
+    return result
+
+
+def subtitles(video_path: str, output_path: str, model_name: str = "base", vad_gated: bool = False,
+              workers: int = 1, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    生成字幕并保存为 SRT 文件。
+
+    :param vad_gated: 只识别人声区域，参见 generate_subtitles
+    :param workers: vad_gated 模式下并行识别的进程数
+    :return: 包含 subtitle_segments（字幕条数）的字典
+    """
+    with stage('transcribe'):
+        segments = cached_subtitles(video_path, use_cache=use_cache, model_name=model_name,
+                                    vad_gated=vad_gated, workers=workers)
+    if not segments:
+        raise RuntimeError("未能生成字幕")
+    write_srt_file(segments, output_path)
+    return {'subtitle_segments': len(segments)}
+
+
+def burn(video_path: str, output_path: str, model_name: str = "base", style: Optional[Dict[str, Any]] = None,
+         vad_gated: bool = False, workers: int = 1, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    生成字幕并烧录到视频中。
+
+    :param style: 字幕样式，参见 burn_subtitles_to_video 的 style_options，未指定的项使用默认样式
+    :param vad_gated: 只识别人声区域，参见 generate_subtitles
+    :param workers: vad_gated 模式下并行识别的进程数
+    :return: 包含 subtitle_segments（字幕条数）的字典
+    """
+    with stage('transcribe'):
+        segments = cached_subtitles(video_path, use_cache=use_cache, model_name=model_name,
+                                    vad_gated=vad_gated, workers=workers)
+    if not segments:
+        raise RuntimeError("未能生成字幕")
+    with stage('encode'):
+        burn_subtitles_to_video(video_path, segments, output_path, {**DEFAULT_SUBTITLE_STYLE, **(style or {})})
+    return {'subtitle_segments': len(segments)}
+
+
+def keep_voice_burn(video_path: str, output_path: str, model_name: str = "base", style: Optional[Dict[str, Any]] = None,
+                    vad_gated: bool = False, workers: int = 1, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    只保留人声片段并烧录字幕，剪辑和烧录在同一次编码中完成。
+
+    字幕在原视频上识别，再换算到剪辑后的时间轴。
+
+    :return: 包含 voice_segments、subtitle_segments（数量）的字典
+    """
+    with stage('detect_voice'):
+        voice_segments = clean_segments(cached_voice_segments(video_path, use_cache=use_cache, **VOICE_PARAMS),
+                                        **VOICE_CLEANUP)
+    if not voice_segments:
+        raise RuntimeError("未检测到人声片段")
+    with stage('transcribe'):
+        segments = cached_subtitles(video_path, use_cache=use_cache, model_name=model_name,
+                                    vad_gated=vad_gated, workers=workers)
+    if not segments:
+        raise RuntimeError("未能生成字幕")
+    with stage('encode'):
+        cut_and_burn_subtitles(video_path, voice_segments, segments, output_path,
+                               {**DEFAULT_SUBTITLE_STYLE, **(style or {})}, keep_segments=True)
+    return {'voice_segments': len(voice_segments), 'subtitle_segments': len(segments)}
+
+
+# 操作名称 -> 处理函数，函数签名为 (input_path, output_path, **params) -> 结果字典
+OPERATIONS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'keep_voice': keep_voice,
+    'smart_remove': smart_remove,
+    'subtitles': subtitles,
+    'burn': burn,
+    'keep_voice_burn': keep_voice_burn,
+}
+
+
+def run_operation(operation: str, input_path: str, output_path: str, **params) -> Dict[str, Any]:
+    """
+    按名称执行一个操作，返回的结果字典中额外包含各阶段耗时 stage_timings
+    和本次操作的性能埋点汇总 metrics (参见 instrumentation.summary)。
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"未知的操作: {operation}")
+    _stage_timings.clear()
+    instrumentation.reset()
+    with instrumentation.span(operation, file=input_path):
+        result = OPERATIONS[operation](input_path, output_path, **params)
+    result['stage_timings'] = dict(_stage_timings)
+    result['metrics'] = instrumentation.summary()
+    return result
@@ -0,0 +1,195 @@
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from core.disk_cache import file_fingerprint, get_cache_dir, touch
+from core.ffmpeg_utils import probe_media, run_ffmpeg
+from core.instrumentation import span
+
+# --- 低分辨率代理文件 ---
+# 导入视频后在后台生成一个低分辨率、短 GOP 的代理文件：预览播放和拖动进度条时解码压力小得多，
+# 人物检测也可以选择在代理文件上进行。最终渲染 (cut_video_by_segments 等) 始终读取原始文件。
+#
+# 代理文件保留原视频的全部帧和时间戳，因此在代理文件上得到的时间可以直接对应回原视频。
+# 代理文件按源文件内容指纹保存在缓存目录中，总大小上限可通过环境变量 AUTOCLIP_PROXY_CACHE_MB 配置。
+_DEFAULT_PROXY_CACHE_MB = 4096
+# 代理文件的高度（像素），宽度按比例缩放
+PROXY_HEIGHT = 360
+# 短 GOP 且不使用 B 帧，任意位置定位时只需要解码很少的帧
+_PROXY_GOP = 6
+# 正在生成的代理文件使用该后缀，生成完成后才替换为正式文件名
+_PART_SUFFIX = '.part.mp4'
+
+
+class ProxyStore:
+    """
+    管理代理文件：查询、同步生成、后台生成，以及按 LRU 淘汰。
+
+    每个代理文件旁有一个同名的 .json 元数据文件，记录源文件路径和两者的起始时间，
+    元数据文件写入完成才表示代理文件可用。
+    """
+
+    def __init__(self, root: str, max_bytes: int, height: int = PROXY_HEIGHT):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.height = height
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        # 同一时间只生成一个代理文件，避免与前台的分析和导出抢占 CPU
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autoclip-proxy')
+
+    def _paths(self, fingerprint: str):
+        base = os.path.join(self.root, f"{fingerprint}_{self.height}p")
+        return base + '.mp4', base + '.json'
+
+    def get(self, source_path: str) -> Optional[str]:
+        """返回已生成的代理文件路径，尚未生成时返回 None。"""
+        try:
+            proxy_path, meta_path = self._paths(file_fingerprint(source_path))
+        except OSError:
+            return None
+        if os.path.exists(proxy_path) and os.path.exists(meta_path):
+            touch(proxy_path)
+            touch(meta_path)
+            return proxy_path
+        return None
+
+    def get_metadata(self, proxy_path: str) -> Dict:
+        with open(os.path.splitext(proxy_path)[0] + '.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def ensure(self, source_path: str) -> Optional[str]:
+        """返回代理文件路径，尚未生成时等待生成完成（与正在进行的后台生成合并）。生成失败时返回 None。"""
+        proxy_path = self.get(source_path)
+        if proxy_path:
+            return proxy_path
+        return self.request(source_path).result()
+
+    def request(self, source_path: str, on_ready: Optional[Callable[[str, Optional[str]], None]] = None) -> Future:
+        """
+        在后台生成代理文件，同一个源文件的重复请求会合并。
+
+        :param on_ready: 完成后在后台线程中以 (源文件路径, 代理文件路径或 None) 调用
+        """
+        with self._lock:
+            future = self._pending.get(source_path)
+            if future is None:
+                future = self._executor.submit(self._create, source_path)
+                self._pending[source_path] = future
+                future.add_done_callback(lambda _: self._forget(source_path))
+        if on_ready:
+            future.add_done_callback(lambda f: on_ready(source_path, None if f.exception() else f.result()))
+        return future
+
+    def _forget(self, source_path: str) -> None:
+        with self._lock:
+            self._pending.pop(source_path, None)
+
+    def prune(self) -> int:
+        """
+        按最近使用时间淘汰代理文件，直到总大小不超过上限，返回删除的代理文件数。
+
+        代理文件与其元数据文件作为一个整体统计和删除；正在生成的临时文件 (可能属于其他进程) 不统计也不删除。
+        """
+        entries: Dict[str, List] = {}
+        for filename in os.listdir(self.root):
+            if filename.endswith(_PART_SUFFIX):
+                continue
+            base, ext = os.path.splitext(filename)
+            if ext not in ('.mp4', '.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, filename))
+            except OSError:
+                continue
+            entry = entries.setdefault(base, [0.0, 0])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+
+        total = sum(size for _, size in entries.values())
+        removed = 0
+        for base, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            # 先删除元数据文件：没有元数据的代理文件不会被 get() 返回
+            for ext in ('.json', '.mp4'):
+                try:
+                    os.remove(os.path.join(self.root, base + ext))
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+    def _create(self, source_path: str) -> Optional[str]:
+        existing = self.get(source_path)
+        if existing:
+            return existing
+        try:
+            source_info = probe_media(source_path)
+            proxy_path, meta_path = self._paths(file_fingerprint(source_path))
+            temp_path = proxy_path + _PART_SUFFIX
+            args = ['-y', '-i', source_path, '-map', '0:v:0', '-map', '0:a:0?',
+                    # 保留原始帧率和时间戳，代理文件的时间与原视频一一对应
+                    '-fps_mode', 'passthrough',
+                    '-vf', f"scale=-2:{min(self.height, source_info['height'] or self.height)}",
+                    '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28', '-tune', 'fastdecode',
+                    '-g', str(_PROXY_GOP), '-bf', '0', '-pix_fmt', 'yuv420p',
+                    '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart', temp_path]
+            print(f"正在生成代理文件: {os.path.basename(source_path)}")
+            with span('proxy', file=source_path):
+                run_ffmpeg(args)
+            os.replace(temp_path, proxy_path)
+            proxy_info = probe_media(proxy_path)
+            metadata = {'source': os.path.abspath(source_path),
+                        'source_start': source_info['start_time'] or 0.0,
+                        'proxy_start': proxy_info['start_time'] or 0.0,
+                        'duration': source_info['duration'],
+                        'width': proxy_info['width'], 'height': proxy_info['height']}
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False)
+            self.prune()
+            print(f"代理文件已生成: {proxy_path}")
+            return proxy_path
+        except subprocess.CalledProcessError as e:
+            print(f"生成代理文件时 ffmpeg 执行失败: {e.stderr}")
+        except Exception as e:
+            print(f"生成代理文件时出错: {e}")
+        if 'temp_path' in locals() and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+
+def map_proxy_segments(segments: List[Dict[str, float]], metadata: Dict) -> List[Dict[str, float]]:
+    """
+    把在代理文件上得到的片段时间换算回原视频的时间轴。
+
+    分析得到的时间都从各自文件的第一帧算起；代理文件保留了全部帧的时间戳，
+    只需修正两者起始时间的差异，并限制在原视频的时长内。
+    """
+    offset = (metadata['proxy_start'] or 0.0) - (metadata['source_start'] or 0.0)
+    duration = metadata['duration']
+    mapped = []
+    for segment in segments:
+        start = max(0.0, segment['start'] + offset)
+        end = segment['end'] + offset
+        if duration:
+            end = min(duration, end)
+        if end > start:
+            mapped.append({**segment, 'start': start, 'end': end})
+    return mapped
+
+
+_store: Optional[ProxyStore] = None
+
+
+def get_proxy_store() -> ProxyStore:
+    global _store
+    if _store is None:
+        max_mb = int(os.environ.get('AUTOCLIP_PROXY_CACHE_MB', _DEFAULT_PROXY_CACHE_MB))
+        _store = ProxyStore(get_cache_dir('proxies'), max_bytes=max_mb * 1024 * 1024)
+    return _store
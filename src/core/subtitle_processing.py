@@ -1,11 +1,79 @@
-import whisper
+import multiprocessing
 import os
+import shutil
 import subprocess
-from typing import List, Dict, Any
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union
 import imageio_ffmpeg
+import numpy as np
+from core.audio_processing import SAMPLE_RATE, get_voice_segments, load_audio
+from core.ffmpeg_utils import probe_media, run_ffmpeg
+from core.instrumentation import count, span
+from core.intervals import complement_segments, union_segments
+from core.model_registry import LRUModelCache
 
-def _write_srt_file(subtitles: List[Dict[str, Any]], srt_path: str):
-    """将字幕数据写入临时的 SRT 文件"""
+# --- Whisper 模型缓存 ---
+# 已加载的模型按 (模型名称, 设备) 缓存，批量生成字幕或在 model_combo 中来回切换模型时无需重新从磁盘加载。
+# 缓存的总内存超出预算时淘汰最久未使用的模型，预算可通过环境变量 AUTOCLIP_WHISPER_CACHE_MB 配置。
+_DEFAULT_WHISPER_CACHE_MB = 4096
+
+
+def _load_whisper_model(key):
+    # whisper 会导入 torch，推迟到真正生成字幕时再导入
+    import whisper
+    model_name, device = key
+    print(f"正在加载 Whisper 模型 '{model_name}' ({device})...")
+    return whisper.load_model(model_name, device=device)
+
+
+def _whisper_model_size(model) -> int:
+    """估算模型占用的内存（参数与缓冲区的字节数）。"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _release_whisper_model(key):
+    _, device = key
+    if device.startswith('cuda'):
+        import torch
+        torch.cuda.empty_cache()
+
+
+_whisper_cache = LRUModelCache(
+    _load_whisper_model,
+    max_bytes=int(os.environ.get('AUTOCLIP_WHISPER_CACHE_MB', _DEFAULT_WHISPER_CACHE_MB)) * 1024 * 1024,
+    size_of=_whisper_model_size,
+    on_evict=_release_whisper_model,
+)
+
+
+def get_whisper_model(model_name: str = "base", device: Optional[str] = None):
+    """
+    从缓存中获取 Whisper 模型，未缓存时加载。
+
+    :param model_name: 模型名称，例如 "base"、"small"
+    :param device: 运行设备，默认有 CUDA 时使用 "cuda"，否则使用 "cpu"
+    """
+    if device is None:
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    return _whisper_cache.get((model_name, device))
+
+
+def set_whisper_cache_budget(max_mb: int) -> None:
+    """设置 Whisper 模型缓存的内存预算（MB），超出部分立即淘汰。"""
+    _whisper_cache.set_max_bytes(int(max_mb) * 1024 * 1024)
+
+
+def clear_whisper_cache() -> None:
+    """释放所有已缓存的 Whisper 模型。"""
+    _whisper_cache.clear()
+
+
+def write_srt_file(subtitles: List[Dict[str, Any]], srt_path: str):
+    """将字幕数据写入 SRT 文件"""
     def _format_time(seconds):
         millis = int((seconds - int(seconds)) * 1000)
         seconds = int(seconds)
@@ -24,47 +92,197 @@ def _write_srt_file(subtitles: List[Dict[str, Any]], srt_path: str):
             f.write(f"{start_time} --> {end_time}\n")
             f.write(f"{text}\n\n")
 
-def generate_subtitles(audio_path: str, model_name: str = "base") -> List[Dict[str, Any]]:
+def generate_subtitles(audio: Union[str, np.ndarray], model_name: str = "base", device: Optional[str] = None,
+                       vad_gated: bool = False, workers: int = 1, max_chunk_seconds: float = 30.0) -> List[Dict[str, Any]]:
     """
-    使用 Whisper 模型生成字幕
+    使用 Whisper 模型生成字幕（模型从缓存中获取，不会重复加载）
+
+    :param audio: 音频文件路径，或 load_audio 返回的 16 kHz 单声道 float32 数组（Whisper 不再重复解码）
+    :param vad_gated: True 则先用 get_voice_segments 找出人声区域，只识别这些区域，跳过静音部分
+    :param workers: vad_gated 模式下并行识别的进程数，每个进程各自加载一份模型
+    :param max_chunk_seconds: vad_gated 模式下每次送入 Whisper 的音频长度上限（秒）
     """
-    if not os.path.exists(audio_path):
-        print(f"错误: 音频文件未找到 at {audio_path}")
+    if isinstance(audio, str) and not os.path.exists(audio):
+        print(f"错误: 音频文件未找到 at {audio}")
         return None
 
+    if vad_gated:
+        return _generate_subtitles_vad_gated(audio, model_name, device, workers, max_chunk_seconds)
+
     try:
-        model = whisper.load_model(model_name)
-        result = model.transcribe(audio_path, fp16=False) # fp16=False can improve compatibility
+        source = audio if isinstance(audio, str) else None
+        if source:
+            # 自行解码（与 Whisper 内部的解码方式相同），识别时长直接由样本数得到，不必再探测一次文件
+            audio = load_audio(source)
+            if audio is None:
+                return None
+        model = get_whisper_model(model_name, device)
+        with span('transcribe', file=source, model=model_name):
+            result = model.transcribe(audio, fp16=False) # fp16=False can improve compatibility
+        count('audio_seconds_transcribed', len(audio) / SAMPLE_RATE)
         return result["segments"]
     except Exception as e:
         print(f"生成字幕时出错: {e}")
         return None
 
+
+# --- 人声门控的并行识别 ---
+# 人声区域前后各保留的余量（秒），避免切掉词语的开头和结尾
+_SPEECH_PADDING = 0.2
+# 间隔小于该值的人声区域合并为一个区域
+_SPEECH_MERGE_GAP = 1.0
+# 同一块中相邻区域之间插入的静音（秒），帮助 Whisper 断句
+_CHUNK_SPACER = 0.3
+
+
+def plan_speech_chunks(speech_segments: List[Dict[str, float]], duration: float,
+                       max_chunk_seconds: float = 30.0) -> List[List[Tuple[float, float]]]:
+    """
+    把人声区域分组为若干识别块。
+
+    区域先加上余量并合并相近的区域，超过 max_chunk_seconds 的区域按该长度切开；
+    然后按顺序把区域装入块中，每块（含区域间插入的静音）总长度不超过 max_chunk_seconds。
+
+    :return: 块列表，每块是按时间排序的 (开始, 结束) 区域列表（原音频中的绝对时间）
+    """
+    padded = [(max(0.0, s['start'] - _SPEECH_PADDING), min(duration, s['end'] + _SPEECH_PADDING))
+              for s in speech_segments]
+    merged = union_segments([(start, end + _SPEECH_MERGE_GAP) for start, end in padded])
+    # 合并时临时加上的间隔需要去掉，并重新限制在音频范围内
+    regions = []
+    for start, end in merged:
+        end = min(duration, end - _SPEECH_MERGE_GAP)
+        while end - start > max_chunk_seconds:
+            regions.append((start, start + max_chunk_seconds))
+            start += max_chunk_seconds
+        if end > start:
+            regions.append((start, end))
+
+    chunks: List[List[Tuple[float, float]]] = []
+    chunk_length = 0.0
+    for start, end in regions:
+        length = end - start
+        if chunks and chunk_length + _CHUNK_SPACER + length <= max_chunk_seconds:
+            chunks[-1].append((start, end))
+            chunk_length += _CHUNK_SPACER + length
+        else:
+            chunks.append([(start, end)])
+            chunk_length = length
+    return chunks
+
+
+def _assemble_chunk(audio: np.ndarray, regions: List[Tuple[float, float]]) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """
+    拼接一个块中各区域的音频，返回 (音频, 时间映射)。
+    时间映射为 [(块内偏移, 原音频中的开始时间, 区域长度)]，用于把识别结果换算回绝对时间。
+    """
+    spacer = np.zeros(int(_CHUNK_SPACER * SAMPLE_RATE), dtype=np.float32)
+    pieces = []
+    mapping = []
+    offset = 0
+    for i, (start, end) in enumerate(regions):
+        if i > 0:
+            pieces.append(spacer)
+            offset += len(spacer)
+        piece = np.asarray(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)], dtype=np.float32)
+        mapping.append((offset / SAMPLE_RATE, start, len(piece) / SAMPLE_RATE))
+        pieces.append(piece)
+        offset += len(piece)
+    return np.concatenate(pieces), mapping
+
+
+def _map_chunk_time(time: float, mapping: List[Tuple[float, float, float]]) -> float:
+    """把块内时间换算为原音频中的时间，落在插入的静音中的时间映射到前一区域的末尾。"""
+    index = max(0, bisect_right([offset for offset, _, _ in mapping], time) - 1)
+    offset, start, length = mapping[index]
+    return start + min(max(0.0, time - offset), length)
+
+
+def _transcribe_chunk(model_name: str, device: Optional[str], chunk_audio: np.ndarray) -> List[Dict[str, Any]]:
+    model = get_whisper_model(model_name, device)
+    return model.transcribe(chunk_audio, fp16=False)["segments"]
+
+
+def _init_transcription_worker(threads: int) -> None:
+    # 多个进程同时识别时限制每个进程的线程数，避免互相争抢 CPU
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _generate_subtitles_vad_gated(audio: Union[str, np.ndarray], model_name: str, device: Optional[str],
+                                  workers: int, max_chunk_seconds: float) -> Optional[List[Dict[str, Any]]]:
+    name = os.path.basename(audio) if isinstance(audio, str) else "音频数据"
+    try:
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+            if audio is None:
+                return None
+        duration = len(audio) / SAMPLE_RATE
+        chunks = plan_speech_chunks(get_voice_segments(audio), duration, max_chunk_seconds)
+        speech_seconds = sum(end - start for regions in chunks for start, end in regions)
+        print(f"'{name}' 中人声约 {speech_seconds:.0f}/{duration:.0f} 秒，分为 {len(chunks)} 块进行识别。")
+        if not chunks:
+            return []
+
+        assembled = [_assemble_chunk(audio, regions) for regions in chunks]
+        workers = max(1, min(workers, len(chunks)))
+        with span('transcribe', file=name, model=model_name, vad_gated=True, workers=workers):
+            if workers == 1:
+                chunk_results = [_transcribe_chunk(model_name, device, chunk_audio) for chunk_audio, _ in assembled]
+            else:
+                # spawn 方式启动的子进程不继承 GUI / CUDA 状态；每个进程只加载一次模型
+                threads = max(1, (os.cpu_count() or 1) // workers)
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_transcription_worker, initargs=(threads,)) as executor:
+                    chunk_results = list(executor.map(_transcribe_chunk, [model_name] * len(assembled),
+                                                      [device] * len(assembled),
+                                                      [chunk_audio for chunk_audio, _ in assembled]))
+        count('audio_seconds_transcribed', speech_seconds)
+
+        subtitles = []
+        for (_, mapping), segments in zip(assembled, chunk_results):
+            for segment in segments:
+                segment = dict(segment)
+                segment['start'] = _map_chunk_time(segment['start'], mapping)
+                segment['end'] = max(segment['start'], _map_chunk_time(segment['end'], mapping))
+                segment['id'] = len(subtitles)
+                subtitles.append(segment)
+        return subtitles
+    except Exception as e:
+        print(f"生成字幕时出错: {e}")
+        return None
+
+def _subtitles_filter(srt_path: str, style_options: Dict[str, Any]) -> str:
+    """构建带 force_style 的 subtitles 滤镜。"""
+    # 注意：ffmpeg 的颜色格式是 &HBBGGRR
+    font_color = style_options.get('color', '#FFFFFF')[1:] # 去掉 '#'
+    font_color_ffmpeg = f"&H{font_color[4:6]}{font_color[2:4]}{font_color[0:2]}"
+    
+    style_params = [
+        f"FontName={style_options.get('font', 'Arial')}",
+        f"FontSize={style_options.get('fontsize', 24)}",
+        f"PrimaryColour={font_color_ffmpeg}",
+        # Add more style mappings here if needed (e.g., border, shadow)
+    ]
+    
+    # ffmpeg -vf subtitles filter needs path with escaped backslashes for Windows
+    escaped_srt_path = srt_path.replace('\\', '\\\\').replace(':', '\\:')
+    
+    return f"subtitles={escaped_srt_path}:force_style='{','.join(style_params)}'"
+
 def burn_subtitles_to_video(video_path: str, subtitles: List[Dict[str, Any]], output_path: str, style_options: Dict[str, Any]):
     """
     使用 ffmpeg 将字幕烧录到视频中。
     """
-    srt_path = "temp_subtitle.srt"
+    # 使用唯一的临时文件名，多个导出任务并行执行时不会互相覆盖
+    fd, srt_path = tempfile.mkstemp(prefix='autoclip_subtitle_', suffix='.srt')
+    os.close(fd)
     try:
         # 1. 创建临时的 SRT 文件
-        _write_srt_file(subtitles, srt_path)
+        write_srt_file(subtitles, srt_path)
 
-        # 2. 构建 ffmpeg 的 force_style 字符串
-        # 注意：ffmpeg 的颜色格式是 &HBBGGRR
-        font_color = style_options.get('color', '#FFFFFF')[1:] # 去掉 '#'
-        font_color_ffmpeg = f"&H{font_color[4:6]}{font_color[2:4]}{font_color[0:2]}"
-        
-        style_params = [
-            f"FontName={style_options.get('font', 'Arial')}",
-            f"FontSize={style_options.get('fontsize', 24)}",
-            f"PrimaryColour={font_color_ffmpeg}",
-            # Add more style mappings here if needed (e.g., border, shadow)
-        ]
-        
-        # ffmpeg -vf subtitles filter needs path with escaped backslashes for Windows
-        escaped_srt_path = srt_path.replace('\\', '\\\\').replace(':', '\\:')
-        
-        video_filter = f"subtitles={escaped_srt_path}:force_style='{','.join(style_params)}'"
+        # 2. 构建 subtitles 滤镜
+        video_filter = _subtitles_filter(srt_path, style_options)
 
         # 3. 构建并执行 ffmpeg 命令
         ffmpeg_executable = imageio_ffmpeg.get_ffmpeg_exe()
@@ -80,7 +298,9 @@ def burn_subtitles_to_video(video_path: str, subtitles: List[Dict[str, Any]], ou
         print(f"正在执行 ffmpeg 命令: {' '.join(command)}")
         
         # 使用 subprocess.PIPE 来捕获输出，可以更好地进行调试
-        process = subprocess.run(command, check=True, capture_output=True, text=True)
+        with span('burn', file=video_path):
+            process = subprocess.run(command, check=True, capture_output=True, text=True)
+        count('bytes_written', os.path.getsize(output_path))
         print("ffmpeg process completed.")
         print("STDOUT:", process.stdout)
         print("STDERR:", process.stderr)
@@ -99,4 +319,132 @@ def burn_subtitles_to_video(video_path: str, subtitles: List[Dict[str, Any]], ou
     finally:
         # 4. 清理临时的 SRT 文件
         if os.path.exists(srt_path):
-            os.remove(srt_path)
\ No newline at end of file
+            os.remove(srt_path)
+
+
+def shift_subtitles_to_timeline(subtitles: List[Dict[str, Any]], kept_segments: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+    """
+    把原视频时间轴上的字幕换算到剪辑后的时间轴上。
+
+    :param subtitles: 原视频时间轴上的字幕
+    :param kept_segments: 按时间排序、互不重叠的保留片段 (开始, 结束)
+    :return: 新的字幕列表。被剪掉部分的字幕被丢弃；跨越剪辑点的字幕在输出中连续显示
+    """
+    # 每个保留片段在输出中的起始时间
+    output_starts = []
+    position = 0.0
+    for start, end in kept_segments:
+        output_starts.append(position)
+        position += end - start
+
+    shifted = []
+    for subtitle in subtitles:
+        pieces = []
+        for (start, end), output_start in zip(kept_segments, output_starts):
+            overlap_start, overlap_end = max(start, subtitle['start']), min(end, subtitle['end'])
+            if overlap_end > overlap_start:
+                pieces.append((output_start + overlap_start - start, output_start + overlap_end - start))
+        if pieces:
+            # 跨越剪辑点的各部分在输出中首尾相接，合并为一条字幕
+            shifted.append({**subtitle, 'start': pieces[0][0], 'end': pieces[-1][1]})
+    return shifted
+
+
+def _trim_concat_graph(kept: List[Tuple[float, float]], media_info: Dict[str, Any], video_tail: str) -> List[str]:
+    """
+    构建 trim + concat 滤镜图：每个保留片段一条 trim / atrim 链，按顺序拼接后再接上 video_tail 滤镜。
+
+    视频按帧序号、音频按样本序号截取（半开区间，帧序号的取整方式与 cut_video_by_segments 相同），
+    不改变帧率，输出的帧数和音视频时长与 cut_video_by_segments 一致。
+
+    :param kept: 需要保留的、互不重叠的有序 (开始, 结束) 列表，按帧边界对齐
+    :return: 滤镜图的各条链，输出标签为 [v] 和（有音频时）[a]
+    """
+    fps = media_info['fps']
+    sample_rate = media_info['sample_rate']
+    has_audio = media_info['audio_codec'] is not None
+    count = len(kept)
+    graph = [f"[0:v:0]split={count}" + ''.join(f"[sv{i}]" for i in range(count))]
+    if has_audio:
+        graph.append(f"[0:a:0]asplit={count}" + ''.join(f"[sa{i}]" for i in range(count)))
+    inputs = []
+    for i, (start, end) in enumerate(kept):
+        if fps:
+            video_trim = f"trim=start_frame={round(start * fps)}:end_frame={round(end * fps)}"
+        else:
+            video_trim = f"trim=start={start:.6f}:end={end:.6f}"
+        graph.append(f"[sv{i}]{video_trim},setpts=PTS-STARTPTS[v{i}]")
+        inputs.append(f"[v{i}]")
+        if has_audio:
+            if sample_rate:
+                audio_trim = f"atrim=start_sample={round(start * sample_rate)}:end_sample={round(end * sample_rate)}"
+            else:
+                audio_trim = f"atrim=start={start:.6f}:end={end:.6f}"
+            graph.append(f"[sa{i}]{audio_trim},asetpts=PTS-STARTPTS[a{i}]")
+            inputs.append(f"[a{i}]")
+    graph.append(f"{''.join(inputs)}concat=n={count}:v=1:a={int(has_audio)}[cv]" + ("[a]" if has_audio else ""))
+    graph.append(f"[cv]{video_tail}[v]")
+    return graph
+
+
+def cut_and_burn_subtitles(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]],
+                           subtitles: List[Dict[str, Any]], output_path: str, style_options: Dict[str, Any],
+                           keep_segments: bool = True) -> None:
+    """
+    一次编码完成剪辑和字幕烧录，不产生中间视频文件。
+
+    使用一个 ffmpeg 滤镜图：每个保留片段按帧 / 样本精确 trim 后 concat 拼接，再用 subtitles 滤镜
+    烧录已换算到剪辑后时间轴的字幕。
+
+    :param video_path: 原始视频路径
+    :param segments: (开始, 结束) 时间段列表，含义同 cut_video_by_segments
+    :param subtitles: 原视频时间轴上的字幕
+    :param keep_segments: True 则保留列表中的片段，False 则移除列表中的片段
+    """
+    media_info = probe_media(video_path)
+    duration = media_info['duration']
+    if keep_segments:
+        kept = [(max(0.0, start), min(duration, end)) for start, end in union_segments(segments)]
+        kept = [(start, end) for start, end in kept if end > start]
+    else:
+        kept = complement_segments(segments, duration)
+    fps = media_info['fps']
+    if fps:
+        # 剪辑点对齐到帧边界，字幕按对齐后的时间换算
+        kept = [(round(start * fps) / fps, round(end * fps) / fps) for start, end in kept]
+        kept = [(start, end) for start, end in kept if end > start]
+    if not kept:
+        print("没有可用于拼接的视频片段。")
+        return
+
+    # 字幕文件和滤镜脚本都使用唯一的临时文件，多个导出任务可以并行执行
+    temp_dir = tempfile.mkdtemp(prefix='autoclip_export_')
+    try:
+        srt_path = os.path.join(temp_dir, 'subtitles.srt')
+        write_srt_file(shift_subtitles_to_timeline(subtitles, kept), srt_path)
+
+        has_audio = media_info['audio_codec'] is not None
+        graph = _trim_concat_graph(kept, media_info, _subtitles_filter(srt_path, style_options))
+        # 片段很多时滤镜图会很长，写入脚本文件以避免超出命令行长度限制
+        script_path = os.path.join(temp_dir, 'filter_graph.txt')
+        with open(script_path, 'w', encoding='utf-8') as f:
+            f.write(';\n'.join(graph))
+
+        args = ['-y', '-i', video_path, '-filter_complex_script', script_path, '-map', '[v]']
+        if has_audio:
+            args += ['-map', '[a]', '-c:a', 'aac']
+        if fps:
+            # concat 输出不带帧率信息，按原视频帧率输出，否则编码器默认 25 fps 会丢帧或重复帧
+            args += ['-r', f"{fps}"]
+        args += ['-c:v', 'libx264', '-preset', 'medium', '-crf', '18', '-movflags', '+faststart', output_path]
+
+        print(f"正在一次编码完成剪辑 ({len(kept)} 个片段) 和字幕烧录...")
+        with span('cut_burn', file=video_path, segments=len(kept)):
+            run_ffmpeg(args)
+        count('bytes_written', os.path.getsize(output_path))
+        print(f"剪辑并烧录字幕的视频已保存至: {output_path}")
+    except subprocess.CalledProcessError as e:
+        print(f"导出视频时 ffmpeg 执行失败: {e.stderr}")
+        raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
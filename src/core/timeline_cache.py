@@ -0,0 +1,290 @@
+import json
+import math
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.audio_processing import SAMPLE_RATE, iter_audio_blocks
+from core.disk_cache import file_fingerprint, get_cache_dir, touch
+from core.ffmpeg_utils import probe_media, run_ffmpeg
+from core.instrumentation import span
+from core.proxy_store import get_proxy_store
+
+# --- 时间轴波形与缩略图缓存 ---
+# 每个文件在后台生成一次，之后时间轴在任意缩放级别下的读取量只与显示宽度有关，与文件长度无关:
+#   waveform.bin   音频 min/max 峰值金字塔 (int16)，第 0 层每 WAVEFORM_BASE_SAMPLES 个采样点一对，
+#                  之后每层把相邻两对合并，所有层依次保存在同一个文件中，读取时使用内存映射
+#   sprite_NNN.jpg 缩略图拼图，每隔 THUMBNAIL_INTERVAL 秒一张，每张拼图 THUMBNAIL_COLUMNS x THUMBNAIL_ROWS 格
+#   manifest.json  各层的位置和缩略图布局，最后写入，存在即表示缓存完整
+#
+# 每个文件的缓存是一个以内容指纹命名的目录，总大小超出上限 (AUTOCLIP_TIMELINE_CACHE_MB) 时按目录整体淘汰最久未使用的。
+_DEFAULT_TIMELINE_CACHE_MB = 1024
+# 第 0 层每对峰值覆盖的采样点数 (16 kHz 下为 4 毫秒)
+WAVEFORM_BASE_SAMPLES = 64
+# 波形分块读取的单位：每块包含的峰值对数
+WAVEFORM_TILE_BINS = 1024
+THUMBNAIL_INTERVAL = 2.0
+THUMBNAIL_SIZE = (160, 90)
+THUMBNAIL_COLUMNS = 10
+THUMBNAIL_ROWS = 10
+
+_MANIFEST = 'manifest.json'
+_WAVEFORM = 'waveform.bin'
+# 解码音频时每次处理的采样点数，必须是 WAVEFORM_BASE_SAMPLES 的整数倍
+_DECODE_BLOCK_SAMPLES = WAVEFORM_BASE_SAMPLES * 8192
+_REDUCE_CHUNK_BINS = 1 << 16
+
+
+class TimelineCache:
+    """已生成的单个文件的波形金字塔与缩略图拼图，只读。"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, _MANIFEST), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.duration = self.manifest['duration']
+        self.levels = self.manifest['levels']
+        self._peaks = None
+        if self.levels:
+            total = sum(level['count'] for level in self.levels)
+            self._peaks = np.memmap(os.path.join(directory, _WAVEFORM), dtype=np.int16, mode='r', shape=(total, 2))
+
+    def level_for(self, seconds_per_pixel: float) -> int:
+        """选择每对峰值覆盖时间不超过 seconds_per_pixel 的最粗一层，使每个像素最多合并两对峰值。"""
+        chosen = 0
+        for index, level in enumerate(self.levels):
+            if level['seconds_per_bin'] <= seconds_per_pixel:
+                chosen = index
+        return chosen
+
+    def waveform_tile(self, level: int, tile_index: int) -> np.ndarray:
+        """返回第 level 层第 tile_index 块的峰值 (形状为 (n, 2) 的 int16 视图，不复制数据)。"""
+        info = self.levels[level]
+        start = min(tile_index * WAVEFORM_TILE_BINS, info['count'])
+        end = min(start + WAVEFORM_TILE_BINS, info['count'])
+        return self._peaks[info['offset'] + start:info['offset'] + end]
+
+    def peaks(self, start: float, end: float, pixels: int) -> Optional[np.ndarray]:
+        """
+        返回 [start, end) 秒内按 pixels 个像素列合并后的峰值，形状为 (pixels, 2)，取值范围 [-1, 1]。
+        没有音轨或区间为空时返回 None；超出音频范围的像素为 0。
+        """
+        if self._peaks is None or pixels <= 0 or end <= start:
+            return None
+        info = self.levels[self.level_for((end - start) / pixels)]
+        # 每个像素列对应的峰值下标区间 [edges[i], edges[i + 1])
+        edges = np.floor(np.linspace(start, end, pixels + 1) / info['seconds_per_bin']).astype(np.int64)
+        first = max(0, int(edges[0]))
+        last = min(info['count'], max(int(edges[-1]), first + 1))
+        result = np.zeros((pixels, 2), dtype=np.float32)
+        if last <= first:
+            return result
+        bins = np.asarray(self._peaks[info['offset'] + first:info['offset'] + last], dtype=np.float32) / 32767.0
+        # reduceat 在相邻起点之间合并，起点相同 (像素比第 0 层的一对峰值还窄) 时取起点处的值
+        starts = np.clip(edges[:-1] - first, 0, len(bins) - 1)
+        valid = (edges[:-1] < info['count']) & (edges[1:] > 0)
+        result[valid, 0] = np.minimum.reduceat(bins[:, 0], starts)[valid]
+        result[valid, 1] = np.maximum.reduceat(bins[:, 1], starts)[valid]
+        return result
+
+    def thumbnail(self, time: float) -> Optional[Tuple[str, int, int, int, int]]:
+        """返回 time 秒处的缩略图：(拼图路径, x, y, 宽, 高)，没有缩略图时返回 None。"""
+        thumbs = self.manifest['thumbnails']
+        if not thumbs['count']:
+            return None
+        index = min(max(0, int(time / thumbs['interval'])), thumbs['count'] - 1)
+        per_sheet = thumbs['columns'] * thumbs['rows']
+        sheet, cell = divmod(index, per_sheet)
+        row, column = divmod(cell, thumbs['columns'])
+        width, height = thumbs['width'], thumbs['height']
+        return (os.path.join(self.directory, thumbs['sheets'][sheet]), column * width, row * height, width, height)
+
+
+class TimelineCacheStore:
+    """管理所有文件的时间轴缓存：查询、后台生成和按目录整体淘汰。"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autoclip-timeline')
+
+    def get(self, source_path: str) -> Optional[TimelineCache]:
+        """返回已生成的缓存，尚未生成时返回 None。"""
+        try:
+            directory = os.path.join(self.root, file_fingerprint(source_path))
+        except OSError:
+            return None
+        manifest_path = os.path.join(directory, _MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            cache = TimelineCache(directory)
+        except (OSError, ValueError) as e:
+            print(f"读取时间轴缓存失败: {e}")
+            return None
+        touch(manifest_path)
+        return cache
+
+    def request(self, source_path: str,
+                on_ready: Optional[Callable[[str, Optional[TimelineCache]], None]] = None) -> Future:
+        """
+        在后台生成缓存，同一个源文件的重复请求会合并。
+
+        :param on_ready: 完成后在后台线程中以 (源文件路径, TimelineCache 或 None) 调用
+        """
+        with self._lock:
+            future = self._pending.get(source_path)
+            if future is None:
+                future = self._executor.submit(self._create, source_path)
+                self._pending[source_path] = future
+                future.add_done_callback(lambda _: self._forget(source_path))
+        if on_ready:
+            future.add_done_callback(lambda f: on_ready(source_path, None if f.exception() else f.result()))
+        return future
+
+    def _forget(self, source_path: str) -> None:
+        with self._lock:
+            self._pending.pop(source_path, None)
+
+    def _create(self, source_path: str) -> Optional[TimelineCache]:
+        existing = self.get(source_path)
+        if existing:
+            return existing
+        fingerprint = file_fingerprint(source_path)
+        directory = os.path.join(self.root, fingerprint)
+        temp_dir = f"{directory}.{os.getpid()}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        try:
+            info = probe_media(source_path)
+            with span('timeline_cache', file=source_path):
+                levels = _build_waveform(source_path, os.path.join(temp_dir, _WAVEFORM)) \
+                    if info['audio_codec'] else []
+                # 已有代理文件时从代理文件抽取缩略图，解码快得多
+                thumbnails = _build_thumbnails(get_proxy_store().get(source_path) or source_path,
+                                               temp_dir, info['duration'] or 0.0) if info['video_codec'] else \
+                    {'count': 0, 'sheets': []}
+            manifest = {'source': os.path.abspath(source_path), 'duration': info['duration'],
+                        'levels': levels, 'thumbnails': thumbnails}
+            with open(os.path.join(temp_dir, _MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(temp_dir, directory)
+        except subprocess.CalledProcessError as e:
+            print(f"生成时间轴缩略图时 ffmpeg 执行失败: {e.stderr}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return None
+        except Exception as e:
+            print(f"生成时间轴缓存时出错: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return None
+        self.prune(keep=fingerprint)
+        return TimelineCache(directory)
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """
+        总大小超出上限时按最近使用时间 (manifest 的 mtime) 整体删除最久未使用的缓存目录。
+
+        :param keep: 不删除的目录名（刚生成的缓存）
+        :return: 删除的目录数
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            directory = os.path.join(self.root, name)
+            manifest_path = os.path.join(directory, _MANIFEST)
+            if not os.path.isdir(directory) or not os.path.exists(manifest_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+            entries.append((os.path.getmtime(manifest_path), size, name))
+            total += size
+
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def _build_waveform(media_path: str, output_path: str) -> List[Dict]:
+    """流式解码音轨并写出峰值金字塔，内存占用与文件长度无关。返回各层的 offset / count / seconds_per_bin。"""
+    levels = []
+    with open(output_path, 'wb') as f:
+        # 第 0 层：直接由采样点计算
+        count = 0
+        for block in iter_audio_blocks(media_path, _DECODE_BLOCK_SAMPLES):
+            usable = len(block) - len(block) % WAVEFORM_BASE_SAMPLES
+            bins = [block[:usable].reshape(-1, WAVEFORM_BASE_SAMPLES)] if usable else []
+            if usable < len(block):
+                # 最后一块的剩余采样点单独成为一对峰值
+                bins.append(block[usable:].reshape(1, -1))
+            for chunk in bins:
+                peaks = np.stack([chunk.min(axis=1), chunk.max(axis=1)], axis=1)
+                f.write(_to_int16(peaks).tobytes())
+                count += len(peaks)
+        levels.append({'offset': 0, 'count': count, 'seconds_per_bin': WAVEFORM_BASE_SAMPLES / SAMPLE_RATE})
+
+    # 之后每层由上一层相邻两对合并，直到一块即可容纳整层
+    while levels[-1]['count'] > WAVEFORM_TILE_BINS:
+        previous = levels[-1]
+        source = np.memmap(output_path, dtype=np.int16, mode='r',
+                           offset=previous['offset'] * 4, shape=(previous['count'], 2))
+        count = 0
+        with open(output_path, 'ab') as f:
+            for start in range(0, previous['count'], _REDUCE_CHUNK_BINS * 2):
+                chunk = np.asarray(source[start:start + _REDUCE_CHUNK_BINS * 2])
+                if len(chunk) % 2:
+                    chunk = np.concatenate([chunk, chunk[-1:]])
+                pairs = chunk.reshape(-1, 2, 2)
+                merged = np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+                f.write(merged.astype(np.int16).tobytes())
+                count += len(merged)
+        del source
+        levels.append({'offset': previous['offset'] + previous['count'], 'count': count,
+                       'seconds_per_bin': previous['seconds_per_bin'] * 2})
+    return levels
+
+
+def _to_int16(peaks: np.ndarray) -> np.ndarray:
+    return (np.clip(peaks, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def _build_thumbnails(media_path: str, output_dir: str, duration: float) -> Dict:
+    """用 ffmpeg 的 fps + tile 滤镜一次解码生成全部缩略图拼图。"""
+    width, height = THUMBNAIL_SIZE
+    expected = max(1, math.ceil(duration / THUMBNAIL_INTERVAL))
+    video_filter = (f"fps=1/{THUMBNAIL_INTERVAL},"
+                    f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                    f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+                    f"tile={THUMBNAIL_COLUMNS}x{THUMBNAIL_ROWS}")
+    run_ffmpeg(['-y', '-i', media_path, '-an', '-sn', '-vf', video_filter, '-q:v', '5',
+                os.path.join(output_dir, 'sprite_%03d.jpg')])
+    sheets = sorted(name for name in os.listdir(output_dir) if name.startswith('sprite_'))
+    # fps 滤镜按时间取整，实际张数可能比按时长估算的少一张
+    thumbnail_count = min(expected, len(sheets) * THUMBNAIL_COLUMNS * THUMBNAIL_ROWS)
+    return {'interval': THUMBNAIL_INTERVAL, 'width': width, 'height': height, 'columns': THUMBNAIL_COLUMNS,
+            'rows': THUMBNAIL_ROWS, 'count': thumbnail_count, 'sheets': sheets}
+
+
+_store: Optional[TimelineCacheStore] = None
+
+
+def get_timeline_store() -> TimelineCacheStore:
+    global _store
+    if _store is None:
+        max_mb = int(os.environ.get('AUTOCLIP_TIMELINE_CACHE_MB', _DEFAULT_TIMELINE_CACHE_MB))
+        _store = TimelineCacheStore(get_cache_dir('timeline'), max_bytes=max_mb * 1024 * 1024)
+    return _store
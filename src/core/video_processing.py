@@ -1,22 +1,47 @@
 import os
-import cv2
+import bisect
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import imageio_ffmpeg
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from ultralytics import YOLO
-from typing import List, Dict, Tuple, Union
-from moviepy import concatenate_videoclips
-# --- Moviepy 配置 ---
-# 通过代码直接修改 moviepy 的配置，确保在任何 moviepy 函数调用前执行
-# 这在打包或虚拟环境中尤其有用，可以确保 moviepy 找到正确的 ffmpeg 执行文件
-# This is the NEW way for moviepy v2.0+
-import moviepy.config as mpy_config
-import imageio_ffmpeg
-
-try:
-    mpy_config.FFMPEG_BINARY = imageio_ffmpeg.get_ffmpeg_exe()
-    print("Moviepy FFMPEG_BINARY set successfully.")
-except Exception as e:
-    print(f"Could not set FFMPEG_BINARY for moviepy: {e}")
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from core.checkpoint import Journal, get_journal
+from core.chunk_cache import ChunkCache, get_chunk_cache
+from core.disk_cache import file_fingerprint
+from core.ffmpeg_utils import probe_media, get_keyframe_times, run_ffmpeg
+from core.frame_source import iter_sampled_frames
+from core.instrumentation import count, span
+from core.intervals import complement_segments, union_segments
+from core.model_registry import registry
+from core.person_detector import get_person_detector
+from core.proxy_store import get_proxy_store, map_proxy_segments
+
+# cv2、moviepy 和 ultralytics (会导入 torch) 的导入都很慢，
+# 因此推迟到第一次真正用到时再导入，以加快 GUI 启动。
+
+_moviepy_configured = False
+
+
+def _configure_moviepy() -> None:
+    """在第一次使用 moviepy 前设置其 ffmpeg 路径。"""
+    # --- Moviepy 配置 ---
+    # 通过代码直接修改 moviepy 的配置，确保在任何 moviepy 函数调用前执行
+    # 这在打包或虚拟环境中尤其有用，可以确保 moviepy 找到正确的 ffmpeg 执行文件
+    # This is the NEW way for moviepy v2.0+
+    global _moviepy_configured
+    if _moviepy_configured:
+        return
+    import moviepy.config as mpy_config
+    try:
+        mpy_config.FFMPEG_BINARY = imageio_ffmpeg.get_ffmpeg_exe()
+        print("Moviepy FFMPEG_BINARY set successfully.")
+    except Exception as e:
+        print(f"Could not set FFMPEG_BINARY for moviepy: {e}")
+    _moviepy_configured = True
 
 
 def extract_audio(video_path: str, output_audio_path: str = "temp_audio.wav") -> Union[str, None]:
@@ -28,6 +53,9 @@ def extract_audio(video_path: str, output_audio_path: str = "temp_audio.wav") ->
     :param output_audio_path: 输出的音频文件路径
     :return: 成功则返回音频文件路径，否则返回 None
     """
+    _configure_moviepy()
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
     try:
         # 使用 with 语句可以自动关闭 video_clip，无需手动调用 .close()
         with VideoFileClip(video_path) as video_clip:
@@ -37,7 +65,9 @@ def extract_audio(video_path: str, output_audio_path: str = "temp_audio.wav") ->
             
             # 提取音频并写入文件
             audio_clip = video_clip.audio
-            audio_clip.write_audiofile(output_audio_path, codec='pcm_s16le', logger='bar')
+            with span('extract_audio', file=video_path):
+                audio_clip.write_audiofile(output_audio_path, codec='pcm_s16le', logger='bar')
+        count('bytes_written', os.path.getsize(output_audio_path))
         
         print(f"音频成功提取并保存至: {output_audio_path}")
         return output_audio_path
@@ -50,7 +80,18 @@ def extract_audio(video_path: str, output_audio_path: str = "temp_audio.wav") ->
         return None
 
 
-def cut_video_by_segments(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]], output_path: str, keep_segments: bool = True) -> None:
+def _resolve_target_segments(segments: List[Union[Dict[str, float], Tuple[float, float]]], duration: float, keep_segments: bool) -> List[Tuple[float, float]]:
+    """
+    将输入的片段列表统一为需要保留的、互不重叠的有序 (开始, 结束) 元组列表。
+    keep_segments 为 False 时，对片段取反得到需要保留的部分。
+    """
+    if keep_segments:
+        return [(max(0.0, start), min(duration, end)) for start, end in union_segments(segments)
+                if min(duration, end) > max(0.0, start)]
+    return complement_segments(segments, duration)
+
+
+def cut_video_by_segments(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]], output_path: str, keep_segments: bool = True, mode: str = "smart", use_cache: bool = True, workers: Optional[int] = None) -> None:
     """
     根据时间段列表对视频进行剪辑。
     (使用 with 语句确保资源被正确释放)
@@ -59,32 +100,43 @@ def cut_video_by_segments(video_path: str, segments: List[Union[Dict[str, float]
     :param segments: (开始, 结束) 时间段列表, 可以是 {'start': s, 'end': e} 或 (s, e)
     :param output_path: 输出视频路径
     :param keep_segments: True 则保留列表中的片段，False 则移除列表中的片段
+    :param mode: "smart" 只重编码剪辑点附近不完整的 GOP，其余部分直接流复制；
+                 "reencode" 把保留的片段切成时长相近的子片段，由多个 ffmpeg 进程并行完整重编码。
+                 编码格式无法流复制时 "smart" 会自动回退到 "reencode"；无法读取视频信息时使用 moviepy 重编码。
+    :param use_cache: 是否复用已缓存的重编码子片段（见 core.chunk_cache），重新导出时只编码新增或改变的部分
+    :param workers: "reencode" 模式下并行编码的 ffmpeg 进程数，默认可用核心数的一半
     """
-    try:
-        with VideoFileClip(video_path) as video_clip:
-            duration = video_clip.duration
+    with span('cut', file=video_path, mode=mode) as attrs:
+        try:
+            media_info = probe_media(video_path)
+        except Exception as e:
+            print(f"读取视频信息失败，回退到 moviepy 重编码: {e}")
+            media_info = None
+        if mode == "smart" and media_info is not None and not _can_smart_cut(media_info):
+            print(f"视频编码 ({media_info['video_codec']}) 不支持流复制，回退到完整重编码。")
+            mode = attrs['mode'] = "reencode"
+
+        if mode == "smart" and media_info is not None:
+            _smart_cut_video(video_path, segments, output_path, keep_segments, media_info, use_cache)
+        elif media_info is not None and _can_parallel_encode(media_info):
+            _parallel_reencode_cut_video(video_path, segments, output_path, keep_segments, media_info,
+                                         workers, use_cache)
+        else:
+            attrs['mode'] = "moviepy"
+            _reencode_cut_video(video_path, segments, output_path, keep_segments)
+    if output_path and os.path.exists(output_path):
+        count('bytes_written', os.path.getsize(output_path))
 
-            # 检查并转换 segments 格式，使其统一为元组列表
-            if segments and isinstance(segments[0], dict):
-                proc_segments = [(s['start'], s['end']) for s in segments]
-            else:
-                proc_segments = segments
 
-            # 对时间戳进行排序和边界检查
-            proc_segments = sorted([(max(0, s), min(duration, e)) for s, e in proc_segments])
+def _reencode_cut_video(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]], output_path: str, keep_segments: bool) -> None:
+    """使用 moviepy 拼接并完整重编码所有保留的片段。"""
+    _configure_moviepy()
+    from moviepy import concatenate_videoclips
+    from moviepy.video.io.VideoFileClip import VideoFileClip
 
-            target_segments = []
-            if keep_segments:
-                target_segments = proc_segments
-            else:
-                # 反转时间段，生成需要保留的片段
-                last_end = 0
-                for start, end in proc_segments:
-                    if start > last_end:
-                        target_segments.append((last_end, start))
-                    last_end = max(last_end, end)
-                if last_end < duration:
-                    target_segments.append((last_end, duration))
+    try:
+        with VideoFileClip(video_path) as video_clip:
+            target_segments = _resolve_target_segments(segments, video_clip.duration, keep_segments)
             
             if not target_segments:
                 print("没有可用于拼接的视频片段。")
@@ -112,29 +164,507 @@ def cut_video_by_segments(video_path: str, segments: List[Union[Dict[str, float]
         print(f"剪辑视频时出错: {e}")
 
 
+# --- 智能剪辑 (流复制 + 边界重编码) ---
+# 视频编码 -> (边界重编码使用的编码器, 转为 Annex B 的 bitstream filter, 编码器参数)
+# 中间片段统一转为 Annex B 并在每个关键帧前内联参数集 (SPS/PPS)，
+# 这样流复制片段与重编码片段拼接后，解码器可以正确处理编码参数的切换。
+_SMART_CUT_VIDEO_CODECS = {
+    'h264': ('libx264', 'h264_mp4toannexb', ['-x264-params', 'repeat-headers=1']),
+    'hevc': ('libx265', 'hevc_mp4toannexb', ['-x265-params', 'repeat-headers=1']),
+}
+
+def _can_smart_cut(media_info: Dict) -> bool:
+    """判断视频是否可以使用流复制方式剪辑（剪辑点按帧对齐，需要帧率）。音频总是统一重编码，不限制编码格式。"""
+    return (media_info['video_codec'] in _SMART_CUT_VIDEO_CODECS and bool(media_info['fps'])
+            and media_info['duration'] is not None)
+
+
+def _plan_smart_cut(target_frames: List[Tuple[int, int]], keyframes: List[int]) -> List[Tuple[str, int, int]]:
+    """
+    将每个保留片段 [第一帧, 结束帧) 拆分为 ('encode' | 'copy', 第一帧, 结束帧) 三元组。
+    片段内第一个关键帧与最后一个关键帧之间的完整 GOP 直接流复制，
+    两端不完整的 GOP 重编码。片段内不足一个完整 GOP 时整段重编码。
+    """
+    plan = []
+    for first, last in target_frames:
+        first_idx = bisect.bisect_left(keyframes, first)
+        last_idx = bisect.bisect_right(keyframes, last) - 1
+        if first_idx >= len(keyframes) or last_idx < 0 or keyframes[first_idx] >= keyframes[last_idx]:
+            plan.append(('encode', first, last))
+            continue
+
+        copy_start, copy_end = keyframes[first_idx], keyframes[last_idx]
+        if copy_start > first:
+            plan.append(('encode', first, copy_start))
+        plan.append(('copy', copy_start, copy_end))
+        if last > copy_end:
+            plan.append(('encode', copy_end, last))
+    return plan
+
+
+def _smart_cut_video(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]], output_path: str, keep_segments: bool, media_info: Dict, use_cache: bool = True) -> None:
+    """
+    流复制完整 GOP，仅重编码剪辑点处的不完整 GOP（已缓存的直接复用），最后无损拼接。
+
+    所有子片段都按帧数精确截止，拼接处不重复也不丢帧。音频与视频分开处理：每个保留片段的音频按同样的帧范围
+    截取为 PCM，拼接时一次性编码为 AAC，避免每段单独编码 AAC 在拼接处引入编码器延迟。
+    """
+    temp_dir = None
+    cache = get_chunk_cache() if use_cache else None
+    try:
+        target_segments = _resolve_target_segments(segments, media_info['duration'], keep_segments)
+        fps = media_info['fps']
+        target_frames = [(round(start * fps), round(end * fps)) for start, end in target_segments]
+        target_frames = [(first, last) for first, last in target_frames if last > first]
+        if not target_frames:
+            print("没有可用于拼接的视频片段。")
+            return
+
+        start_time = media_info['start_time'] or 0.0
+        keyframes = sorted({round((t - start_time) * fps) for t in get_keyframe_times(video_path)})
+        plan = _plan_smart_cut(target_frames, keyframes)
+        copied = sum(last - first for kind, first, last in plan if kind == 'copy')
+        total = sum(last - first for first, last in target_frames)
+        print(f"将要拼接 {len(target_frames)} 个片段 ({len(plan)} 个子片段)，"
+              f"其中 {copied / fps:.1f}/{total / fps:.1f} 秒直接流复制...")
+
+        encoder, bsf, encoder_params = _SMART_CUT_VIDEO_CODECS[media_info['video_codec']]
+        has_audio = media_info['audio_codec'] is not None
+        audio_format = []
+        if media_info['sample_rate']:
+            audio_format += ['-ar', str(media_info['sample_rate'])]
+        if media_info['channels']:
+            audio_format += ['-ac', str(media_info['channels'])]
+        temp_dir = tempfile.mkdtemp(prefix='autoclip_cut_', dir=os.path.dirname(os.path.abspath(output_path)))
+
+        fingerprint = file_fingerprint(video_path) if cache is not None else None
+        piece_paths = []
+        reused = encoded = 0
+        for i, (kind, first, last) in enumerate(plan):
+            frame_count = last - first
+            if kind == 'copy':
+                # 流复制从关键帧开始：定位到关键帧之后半帧，ffmpeg 会回到该关键帧；
+                # 片段只含视频，可以直接用 -frames:v 按帧数截止
+                piece_path = os.path.join(temp_dir, f"piece_{i:05d}.nut")
+                run_ffmpeg(['-y', '-ss', f"{(first + 0.5) / fps:.6f}", '-i', video_path, '-map', '0:v:0',
+                            '-c', 'copy', '-frames:v', str(frame_count), '-bsf:v', bsf,
+                            '-avoid_negative_ts', 'make_zero', '-f', 'nut', piece_path])
+                piece_paths.append(piece_path)
+                continue
+
+            seek, lead = _frame_seek(first, fps)
+            args = ['-t', f"{lead + frame_count / fps + 1 / fps:.6f}", '-vf', _video_trim_filter(frame_count),
+                    '-map', '0:v:0', '-c:v', encoder, '-preset', 'medium', '-crf', '18'] + encoder_params
+            if media_info['pix_fmt']:
+                args += ['-pix_fmt', media_info['pix_fmt']]
+            args += ['-r', f"{fps}", '-bsf:v', bsf, '-avoid_negative_ts', 'make_zero', '-f', 'nut']
+            command = ['-y', '-ss', f"{seek:.6f}", '-i', video_path] + args
+            if cache is None:
+                piece_path = os.path.join(temp_dir, f"piece_{i:05d}.nut")
+                run_ffmpeg(command + [piece_path])
+            else:
+                piece_path, hit = _encode_cached(cache, cache.key(fingerprint, first / fps, last / fps, args), command)
+                reused += hit
+                encoded += not hit
+            piece_paths.append(piece_path)
+
+        audio_pieces = None
+        if has_audio:
+            audio_pieces = []
+            for i, (first, last) in enumerate(target_frames):
+                seek, lead = _frame_seek(first, fps)
+                duration = (last - first) / fps
+                audio_path = os.path.join(temp_dir, f"audio_{i:05d}.wav")
+                run_ffmpeg(['-y', '-ss', f"{seek:.6f}", '-i', video_path, '-map', '0:a:0',
+                            '-af', _audio_trim_filter(lead, duration), '-c:a', 'pcm_s16le'] + audio_format
+                           + [audio_path])
+                audio_pieces.append((audio_path, duration))
+
+        if cache is not None:
+            count('chunks_reused', reused)
+            count('chunks_encoded', encoded)
+            print(f"重编码子片段: 复用缓存 {reused} 个，新编码 {encoded} 个")
+        _concat_pieces(piece_paths, output_path, has_audio, temp_dir,
+                       ['-c:a', 'aac'] + audio_format if has_audio else None,
+                       [(last - first) / fps for _, first, last in plan], audio_pieces)
+        print(f"视频已成功剪辑并保存至: {output_path}")
+
+    except subprocess.CalledProcessError as e:
+        print(f"剪辑视频时 ffmpeg 执行失败: {e.stderr}")
+    except Exception as e:
+        print(f"剪辑视频时出错: {e}")
+    finally:
+        if temp_dir and os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        # 拼接完成后再淘汰；本次用到的片段最近被访问过，最后才会被淘汰
+        if cache is not None:
+            cache.prune()
+
+
+def _encode_cached(cache: ChunkCache, key: str, args: List[str]) -> Tuple[str, bool]:
+    """
+    命中缓存时直接返回 (片段路径, True)，否则执行 ffmpeg 编码并存入缓存，返回 (片段路径, False)。
+
+    :param args: 不含输出路径的 ffmpeg 参数
+    """
+    path = cache.get(key)
+    if path is not None:
+        return path, True
+    temp_path = cache.temp_path()
+    try:
+        run_ffmpeg(args + [temp_path])
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return cache.put(key, temp_path), False
+
+
+def _write_concat_list(list_path: str, paths: List[str], durations: Optional[List[float]]) -> str:
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for i, path in enumerate(paths):
+            escaped = path.replace('\\', '/').replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            if durations:
+                f.write(f"duration {durations[i]:.6f}\n")
+    return list_path
+
+
+def _concat_pieces(piece_paths: List[str], output_path: str, has_audio: bool, list_dir: str,
+                   audio_args: Optional[List[str]] = None, durations: Optional[List[float]] = None,
+                   audio_pieces: Optional[List[Tuple[str, float]]] = None) -> None:
+    """
+    使用 concat demuxer 将多个片段无损拼接为一个文件。
+
+    :param audio_args: 拼接时音频的编码参数，默认音频与视频一样直接流复制
+    :param durations: 每个片段的准确时长。片段的容器时长包含 B 帧延迟等偏移，
+                      指定后下一个片段紧接着上一个片段的准确结束时间开始，拼接处没有间隙
+    :param audio_pieces: 与视频分开保存的 (音频片段路径, 时长) 列表，按顺序拼接为输出的音频（需要 audio_args）
+    """
+    args = ['-y', '-f', 'concat', '-safe', '0', '-i',
+            _write_concat_list(os.path.join(list_dir, 'concat_list.txt'), piece_paths, durations)]
+    if audio_pieces:
+        audio_list = _write_concat_list(os.path.join(list_dir, 'concat_audio.txt'),
+                                        [path for path, _ in audio_pieces], [duration for _, duration in audio_pieces])
+        args += ['-f', 'concat', '-safe', '0', '-i', audio_list, '-map', '0:v', '-map', '1:a', '-c:v', 'copy'] + audio_args
+    elif audio_args:
+        args += ['-c:v', 'copy'] + audio_args
+    else:
+        args += ['-c', 'copy']
+        if has_audio:
+            args += ['-bsf:a', 'aac_adtstoasc']
+    args += ['-movflags', '+faststart', output_path]
+    run_ffmpeg(args)
+
+
+# --- 并行分块重编码 ---
+# 把保留的片段按帧边界切成时长相近的子片段，由多个 ffmpeg 进程并行编码，最后无损拼接。
+# 每个进程只用少量线程编码一段，比单个 x264 进程使用全部核心的扩展性好得多。
+# 子片段中的音频保存为 PCM，拼接时才一次性编码为 AAC：
+# 每段单独编码 AAC 会在每个拼接处引入编码器延迟，造成停顿或爆音。
+_PARALLEL_PIECE_MIN_SECONDS = 4.0
+_PARALLEL_PIECE_MAX_SECONDS = 64.0
+
+
+def _can_parallel_encode(media_info: Dict) -> bool:
+    """并行分块需要按帧率对齐切分点。"""
+    return media_info['video_codec'] is not None and bool(media_info['fps']) and media_info['duration'] is not None
+
+
+def _encode_core_budget() -> int:
+    """本进程可用于编码的核心数：批处理工作进程中为 OMP_NUM_THREADS，否则为全部核心。"""
+    value = os.environ.get('OMP_NUM_THREADS')
+    if value and value.isdigit() and int(value) > 0:
+        return int(value)
+    return os.cpu_count() or 1
+
+
+def _frame_seek(first_frame: int, fps: float) -> Tuple[float, float]:
+    """
+    返回 (定位时间, 第一帧相对定位点的时间)：定位到 first_frame 之前半帧处（第 0 帧时为 0），
+    按时间选择帧时不会因浮点误差丢掉第一帧。结束位置按帧数截止（见 _video_trim_filter），
+    -t 只作为多留一帧余量的上限。
+    """
+    lead = min(0.5, first_frame) / fps
+    return first_frame / fps - lead, lead
+
+
+def _video_trim_filter(frame_count: int) -> str:
+    """
+    从定位后的第一帧起只保留 frame_count 帧，时间戳从 0 开始。
+    不使用 -frames:v：它一达到帧数就结束整个输出文件，会截掉尚未写入的音频。
+    """
+    return f"trim=end_frame={frame_count},setpts=PTS-STARTPTS"
+
+
+def _audio_trim_filter(lead: float, duration: float) -> str:
+    """
+    从定位点之后 lead 秒处截取 duration 秒音频，时间戳从 0 开始；源音频提前结束时补静音，使音频与视频时长一致。
+    """
+    return f"atrim=start={lead:.6f}:duration={duration:.6f},asetpts=PTS-STARTPTS,apad=whole_dur={duration:.6f}"
+
+
+def _plan_parallel_pieces(target_segments: List[Tuple[float, float]], fps: float, workers: int) -> List[Tuple[int, int]]:
+    """
+    把保留片段切成 (第一帧, 帧数) 子片段，使各进程的工作量相近。
+
+    子片段时长取 2 的幂秒（约为总时长 / (2 x 进程数)，限制在上下限之间），片段内的切分位置只取决于
+    片段的起点，调整其他剪辑点后仍能复用已缓存的子片段。
+    """
+    total = sum(end - start for start, end in target_segments)
+    piece_seconds = _PARALLEL_PIECE_MIN_SECONDS
+    while piece_seconds < min(_PARALLEL_PIECE_MAX_SECONDS, total / (2 * workers)):
+        piece_seconds *= 2
+    piece_frames = round(piece_seconds * fps)
+
+    pieces = []
+    for start, end in target_segments:
+        first, last = round(start * fps), round(end * fps)
+        for frame in range(first, last, piece_frames):
+            pieces.append((frame, min(piece_frames, last - frame)))
+    return pieces
+
+
+def _parallel_reencode_cut_video(video_path: str, segments: List[Union[Dict[str, float], Tuple[float, float]]],
+                                 output_path: str, keep_segments: bool, media_info: Dict,
+                                 workers: Optional[int] = None, use_cache: bool = True) -> None:
+    """由多个 ffmpeg 进程并行完整重编码所有保留的片段，再无损拼接视频、统一编码音频。"""
+    temp_dir = None
+    cache = get_chunk_cache() if use_cache else None
+    try:
+        target_segments = _resolve_target_segments(segments, media_info['duration'], keep_segments)
+        if not target_segments:
+            print("没有可用于拼接的视频片段。")
+            return
+
+        cores = _encode_core_budget()
+        workers = workers or max(1, cores // 2)
+        fps = media_info['fps']
+        pieces = _plan_parallel_pieces(target_segments, fps, workers)
+        if not pieces:
+            print("没有可用于拼接的视频片段。")
+            return
+        workers = max(1, min(workers, len(pieces)))
+        threads = max(1, cores // workers)
+        print(f"将要拼接 {len(target_segments)} 个片段，分为 {len(pieces)} 个子片段由 {workers} 个 ffmpeg 进程编码...")
+
+        encoder, bsf, encoder_params = _SMART_CUT_VIDEO_CODECS['h264']
+        has_audio = media_info['audio_codec'] is not None
+        audio_format = []
+        if media_info['sample_rate']:
+            audio_format += ['-ar', str(media_info['sample_rate'])]
+        if media_info['channels']:
+            audio_format += ['-ac', str(media_info['channels'])]
+        args = ['-map', '0:v:0']
+        if has_audio:
+            args += ['-map', '0:a:0', '-c:a', 'pcm_s16le'] + audio_format
+        args += ['-c:v', encoder, '-preset', 'medium', '-crf', '18'] + encoder_params + ['-pix_fmt', 'yuv420p',
+                 '-bsf:v', bsf, '-avoid_negative_ts', 'make_zero', '-f', 'nut']
+        fingerprint = file_fingerprint(video_path) if cache is not None else None
+        temp_dir = tempfile.mkdtemp(prefix='autoclip_cut_', dir=os.path.dirname(os.path.abspath(output_path)))
+
+        def encode(index: int) -> Tuple[str, bool]:
+            first_frame, frame_count = pieces[index]
+            seek, lead = _frame_seek(first_frame, fps)
+            duration = frame_count / fps
+            bounds = ['-t', f"{lead + duration + 1 / fps:.6f}", '-vf', _video_trim_filter(frame_count)]
+            if has_audio:
+                bounds += ['-af', _audio_trim_filter(lead, duration)]
+            # 线程数只影响速度，不计入缓存键
+            command = ['-y', '-ss', f"{seek:.6f}", '-i', video_path] + bounds + ['-threads', str(threads)] + args
+            if cache is None:
+                piece_path = os.path.join(temp_dir, f"piece_{index:05d}.nut")
+                run_ffmpeg(command + [piece_path])
+                return piece_path, False
+            key = cache.key(fingerprint, first_frame / fps, (first_frame + frame_count) / fps, bounds + args)
+            return _encode_cached(cache, key, command)
+
+        # 先提交较长的子片段，缩短最后一个进程单独运行的时间
+        order = sorted(range(len(pieces)), key=lambda index: -pieces[index][1])
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='autoclip-encode') as executor:
+            results = dict(zip(order, executor.map(encode, order)))
+        piece_paths = [results[index][0] for index in range(len(pieces))]
+
+        if cache is not None:
+            reused = sum(hit for _, hit in results.values())
+            count('chunks_reused', reused)
+            count('chunks_encoded', len(pieces) - reused)
+            print(f"重编码子片段: 复用缓存 {reused} 个，新编码 {len(pieces) - reused} 个")
+        _concat_pieces(piece_paths, output_path, has_audio, temp_dir,
+                       ['-c:a', 'aac'] + audio_format if has_audio else None,
+                       [frame_count / fps for _, frame_count in pieces])
+        print(f"视频已成功剪辑并保存至: {output_path}")
+
+    except subprocess.CalledProcessError as e:
+        print(f"剪辑视频时 ffmpeg 执行失败: {e.stderr}")
+    except Exception as e:
+        print(f"剪辑视频时出错: {e}")
+    finally:
+        if temp_dir and os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        if cache is not None:
+            cache.prune()
+
+
 # --- YOLOv8 模型加载与人物检测 ---
 # 这部分代码与 moviepy 版本无关，保持原样即可
 
-try:
+def _load_yolo_model():
+    from ultralytics import YOLO
     model = YOLO('yolov8n.pt')  # 使用 nano 版本，速度快
     print("YOLOv8 模型加载成功。")
-except Exception as e:
-    print(f"加载 YOLOv8 模型失败: {e}")
-    model = None
+    return model
+
+
+registry.register('yolo', _load_yolo_model)
 
-def get_person_segments(video_path: str, confidence_threshold: float = 0.5, process_every_n_frames: int = 1) -> List[Dict[str, float]]:
+# 解码线程与推理之间的帧队列长度上限，限制预读帧占用的内存
+_FRAME_QUEUE_SIZE = 32
+
+
+def get_person_segments(video_path: str, confidence_threshold: float = 0.5, process_every_n_frames: int = 1,
+                        batch_size: int = 8, pipelined: bool = True, sample_rate: Optional[float] = None,
+                        input_size: int = 640, use_proxy: bool = False, motion_threshold: Optional[float] = None,
+                        motion_max_interval: float = 2.0, adaptive: bool = False,
+                        coarse_interval: float = 1.0, backend: str = 'torch', quantize: bool = False,
+                        threads: Optional[int] = None, checkpoint: bool = True) -> List[Dict[str, float]]:
     """
     分析视频，返回包含人物的片段列表。
 
     :param video_path: 视频文件路径
     :param confidence_threshold: 人物检测的置信度阈值
     :param process_every_n_frames: 每隔 n 帧处理一次，以提高性能。1 表示处理每一帧。
+    :param batch_size: 每次送入模型推理的帧数
+    :param pipelined: True 则由独立的解码线程预读帧，解码与推理并行进行
+    :param sample_rate: 每秒采样的帧数。设置后由 ffmpeg 在解码端抽帧并缩放，忽略 process_every_n_frames
+    :param input_size: 模型输入尺寸，sample_rate 模式下帧会预先缩放到该尺寸
+    :param use_proxy: True 则在低分辨率代理文件上检测（尚未生成时先生成），时间换算回原视频
+    :param motion_threshold: 运动门控阈值。设置后，与上一次推理的帧相比画面变化（缩小后灰度图的平均差值，0-255）
+                             低于该值的帧直接复用上一次的检测结果，不送入模型。静止镜头较多时建议 2~4
+    :param motion_max_interval: 运动门控下最多连续复用多少秒，超过后强制重新推理一次
+    :param adaptive: 由粗到细的自适应采样：先每隔 coarse_interval 秒检测一帧，再在结果发生变化的相邻采样之间
+                     二分查找，得到精确到帧的边界。忽略 process_every_n_frames 和 sample_rate。
+                     持续时间短于 coarse_interval 且前后状态相同的变化可能被漏掉
+    :param coarse_interval: 自适应采样的粗扫间隔（秒）
+    :param backend: 检测后端，'torch' 为 ultralytics 默认路径，'onnx' 为 ONNX Runtime CPU 推理（按 input_size 导出模型）
+    :param quantize: ONNX 后端是否使用 INT8 量化模型
+    :param threads: ONNX 后端的推理线程数，默认见 person_detector.default_threads()
+    :param checkpoint: 定期把检测进度（已处理到的位置、未结束的片段、已完成的片段）写入进度日志
+                       (见 core.checkpoint)，中断后以相同参数重新运行时从上次保存的位置继续。
+                       自适应采样本身很快，不保存进度
     :return: 包含人物的 {'start': start_time, 'end': end_time} 字典列表
     """
+    model = get_person_detector(backend, input_size, quantize, threads)
     if not model:
         print("YOLO 模型不可用，无法进行人物检测。")
         return []
 
+    proxy_metadata = None
+    analysis_path = video_path
+    if use_proxy:
+        store = get_proxy_store()
+        proxy_path = store.ensure(video_path)
+        if proxy_path:
+            analysis_path = proxy_path
+            proxy_metadata = store.get_metadata(proxy_path)
+        else:
+            print("代理文件不可用，改为在原始文件上检测人物。")
+
+    journal = None
+    if checkpoint and not adaptive:
+        # 只有影响结果的参数才计入日志的键，与分析结果缓存一致
+        journal = get_journal('person_segments', file_fingerprint(video_path), {
+            'confidence_threshold': confidence_threshold, 'sample_rate': sample_rate,
+            'process_every_n_frames': None if sample_rate else process_every_n_frames,
+            'input_size': input_size, 'use_proxy': proxy_metadata is not None, 'motion_threshold': motion_threshold,
+            'motion_max_interval': motion_max_interval, 'backend': backend, 'quantize': quantize})
+
+    gate = MotionGate(motion_threshold, motion_max_interval) if motion_threshold is not None else None
+    with span('detect_person', file=video_path, sample_rate=sample_rate, backend=backend,
+              proxy=proxy_metadata is not None) as span_attrs:
+        if adaptive:
+            segments = _get_person_segments_adaptive(model, analysis_path, confidence_threshold, coarse_interval,
+                                                     batch_size, input_size, gate)
+        elif sample_rate:
+            segments = _get_person_segments_sampled(model, analysis_path, confidence_threshold, sample_rate,
+                                                    batch_size, pipelined, input_size, gate, journal)
+        else:
+            segments = _get_person_segments_capture(model, analysis_path, confidence_threshold,
+                                                    process_every_n_frames, batch_size, pipelined, input_size, gate,
+                                                    journal)
+        if gate is not None:
+            span_attrs.update(gate.stats(max(1, batch_size)))
+            print(gate.describe(max(1, batch_size)))
+    if journal is not None:
+        journal.clear()
+    return map_proxy_segments(segments, proxy_metadata) if proxy_metadata else segments
+
+
+def _get_person_segments_capture(model, video_path: str, confidence_threshold: float, process_every_n_frames: int,
+                                 batch_size: int, pipelined: bool, input_size: int,
+                                 gate: Optional['MotionGate'] = None,
+                                 journal: Optional[Journal] = None) -> List[Dict[str, float]]:
+    """使用 OpenCV 逐帧（或跳帧）读取原始分辨率的帧进行人物检测。"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"无法打开视频文件: {video_path}")
+        return []
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps == 0:
+        print(f"无法获取视频 '{video_path}' 的帧率。")
+        cap.release()
+        return []
+
+    resume_state = _load_checkpoint(journal)
+    start_frame = round(resume_state['position'] * fps) + max(1, process_every_n_frames) if resume_state else 0
+    try:
+        frames = _read_capture_frames(cap, process_every_n_frames, start_frame)
+        if pipelined:
+            frames = _prefetch_frames(frames, _FRAME_QUEUE_SIZE)
+        detections = _detect_persons_in_batches(model, frames, confidence_threshold, max(1, batch_size), input_size,
+                                                gate, lambda frame_index: frame_index / fps)
+        # 循环结束后，如果仍在人物片段中，则以视频末尾作为最后一个片段的结束
+        segments = _build_person_segments(
+            ((frame_index / fps, person_detected) for frame_index, person_detected in detections),
+            lambda: cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps, journal, resume_state)
+    finally:
+        cap.release()
+
+    print(f"在 '{os.path.basename(video_path)}' 中检测到 {len(segments)} 个人物片段。")
+    return segments
+
+
+def _get_person_segments_sampled(model, video_path: str, confidence_threshold: float, sample_rate: float,
+                                batch_size: int, pipelined: bool, input_size: int,
+                                gate: Optional['MotionGate'] = None,
+                                journal: Optional[Journal] = None) -> List[Dict[str, float]]:
+    """按固定采样率从 ffmpeg 管道读取已缩放的帧进行人物检测。"""
+    try:
+        media_info = probe_media(video_path)
+    except Exception as e:
+        print(f"无法打开视频文件: {video_path} ({e})")
+        return []
+
+    resume_state = _load_checkpoint(journal)
+    start_time = resume_state['position'] + 1 / sample_rate if resume_state else 0.0
+    frames = iter_sampled_frames(video_path, sample_rate, max_side=input_size, start_time=start_time,
+                                 media_info=media_info)
+    if pipelined:
+        frames = _prefetch_frames(frames, _FRAME_QUEUE_SIZE)
+    detections = _detect_persons_in_batches(model, frames, confidence_threshold, max(1, batch_size), input_size,
+                                            gate, lambda timestamp: timestamp)
+    segments = _build_person_segments(detections, lambda: media_info['duration'], journal, resume_state)
+
+    print(f"在 '{os.path.basename(video_path)}' 中检测到 {len(segments)} 个人物片段。")
+    return segments
+
+
+def _get_person_segments_adaptive(model, video_path: str, confidence_threshold: float, coarse_interval: float,
+                                  batch_size: int, input_size: int,
+                                  gate: Optional['MotionGate'] = None) -> List[Dict[str, float]]:
+    """粗扫 + 二分细化：推理次数约为 时长/粗扫间隔 + 变化次数 x log2(粗扫间隔帧数)。"""
+    import cv2
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         print(f"无法打开视频文件: {video_path}")
@@ -146,45 +676,295 @@ def get_person_segments(video_path: str, confidence_threshold: float = 0.5, proc
         cap.release()
         return []
 
-    segments = []
-    in_person_segment = False
-    start_time = 0
-    frame_index = 0
+    batch_size = max(1, batch_size)
+    step = max(1, round(coarse_interval * fps))
+    try:
+        # 第一遍：顺序解码，每 step 帧取一帧检测
+        coarse_frames = _CoarseFrameReader(cap, step)
+        states = dict(_detect_persons_in_batches(model, coarse_frames, confidence_threshold, batch_size,
+                                                 input_size, gate, lambda frame_index: frame_index / fps))
+        if not states:
+            return []
+        # 最后一帧不在粗扫采样点上时补检一次，避免漏掉结尾处的变化
+        last_index = coarse_frames.last_index
+        if last_index not in states:
+            states.update(_detect_persons_at(model, cap, [last_index], confidence_threshold, batch_size, input_size))
+
+        # 第二遍：所有发生变化的区间同时二分，每一轮把各区间的中点合并为一批推理
+        samples = sorted(states.items())
+        intervals = [(low, high) for (low, low_state), (high, high_state) in zip(samples, samples[1:])
+                     if low_state != high_state and high - low > 1]
+        refined = 0
+        while intervals:
+            midpoints = [(low + high) // 2 for low, high in intervals]
+            results = _detect_persons_at(model, cap, midpoints, confidence_threshold, batch_size, input_size)
+            refined += len(midpoints)
+            next_intervals = []
+            for (low, high), middle in zip(intervals, midpoints):
+                states[middle] = results[middle]
+                low, high = (middle, high) if results[middle] == states[low] else (low, middle)
+                if high - low > 1:
+                    next_intervals.append((low, high))
+            intervals = next_intervals
+
+        # 每个变化点都有相邻两帧的结果，片段的起止时间精确到帧
+        detections = ((frame_index / fps, person_detected) for frame_index, person_detected in sorted(states.items()))
+        segments = _build_person_segments(detections, lambda: (last_index + 1) / fps)
+    finally:
+        cap.release()
 
+    print(f"在 '{os.path.basename(video_path)}' 中检测到 {len(segments)} 个人物片段 "
+          f"(粗扫 {len(states) - refined} 帧，细化 {refined} 帧)。")
+    return segments
+
+
+class _CoarseFrameReader:
+    """顺序读取每 step 帧中的第一帧，生成 (帧序号, 帧)；跳过的帧只 grab 不转换。读完后 last_index 为最后一帧的序号。"""
+
+    def __init__(self, cap, step: int):
+        self.cap = cap
+        self.step = step
+        self.last_index = -1
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        frame_index = 0
+        while True:
+            if frame_index % self.step == 0:
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                count('frames_decoded')
+                yield frame_index, frame
+            elif not self.cap.grab():
+                break
+            self.last_index = frame_index
+            frame_index += 1
+
+
+def _detect_persons_at(model, cap, frame_indices: List[int], confidence_threshold: float, batch_size: int,
+                       input_size: int) -> Dict[int, bool]:
+    """定位到指定的帧并检测，返回 {帧序号: 是否检测到人物}。"""
+    import cv2
+
+    def _frames():
+        for frame_index in sorted(frame_indices):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ret, frame = cap.read()
+            if not ret:
+                raise RuntimeError(f"无法读取第 {frame_index} 帧")
+            count('frames_decoded')
+            yield frame_index, frame
+
+    return dict(_detect_persons_in_batches(model, _frames(), confidence_threshold, batch_size, input_size))
+
+
+def _read_capture_frames(cap, process_every_n_frames: int, start_frame: int = 0) -> Iterator[Tuple[int, Any]]:
+    """按跳帧设置从 start_frame 开始依次读取帧，生成 (帧序号, 帧) 元组。"""
+    import cv2
+    frame_index = start_frame
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
     while cap.isOpened():
         # 如果设置了 process_every_n_frames > 1，则跳帧
-        if process_every_n_frames > 1 and frame_index > 0:
+        if process_every_n_frames > 1 and frame_index > start_frame:
             frame_index += process_every_n_frames - 1
             cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
 
         ret, frame = cap.read()
         if not ret:
             break
+        count('frames_decoded')
+        yield frame_index, frame
+        frame_index += 1
 
-        current_time = frame_index / fps
-        
-        # 使用 YOLO 模型进行预测
-        # verbose=False 可以让输出更干净
-        results = model(frame, classes=[0], conf=confidence_threshold, verbose=False) # classes=[0] 表示只检测 'person'
-        
-        person_detected = len(results[0].boxes) > 0
 
+def _prefetch_frames(frames: Iterator[Tuple[int, Any]], max_queued: int) -> Iterator[Tuple[int, Any]]:
+    """
+    在后台线程中消费 frames，通过有界队列交给调用方，使解码与推理重叠进行。
+    解码线程中的异常会在调用方线程重新抛出。
+    """
+    frame_queue = queue.Queue(maxsize=max_queued)
+    stop_event = threading.Event()
+    end_marker = object()
+
+    def _put(item) -> bool:
+        # 调用方提前退出时，避免解码线程永远阻塞在 put 上
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode():
+        try:
+            for item in frames:
+                if not _put(item):
+                    return
+        except Exception as e:
+            _put(e)
+        _put(end_marker)
+
+    decoder = threading.Thread(target=_decode, name='autoclip-frame-decoder', daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is end_marker:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        decoder.join()
+
+
+def _detect_persons_in_batches(model, frames: Iterator[Tuple[Any, Any]], confidence_threshold: float, batch_size: int,
+                               input_size: int, gate: Optional['MotionGate'] = None,
+                               time_of: Optional[Callable[[Any], float]] = None) -> Iterator[Tuple[Any, bool]]:
+    """
+    将帧按 batch_size 分批送入 YOLO 模型，按原顺序生成 (标记, 是否检测到人物)。
+    标记是帧序号或时间戳，原样透传。
+
+    设置了 gate 时，画面与上一次推理的帧相比变化很小的帧不送入模型，直接复用那一帧的结果；
+    time_of 把标记换算为秒，用于强制重新推理的间隔。
+    """
+    if gate is None:
+        batch = []
+        for item in frames:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from _detect_persons_batch(model, batch, confidence_threshold, input_size)
+                batch = []
+        if batch:
+            yield from _detect_persons_batch(model, batch, confidence_threshold, input_size)
+        return
+
+    # pending 按原顺序保存 (标记, 结果来源的推理帧标记)，推理帧的结果出来后依次输出
+    pending = deque()
+    results = {}
+    batch = []
+    for tag, frame in frames:
+        if gate.should_infer(time_of(tag), frame):
+            batch.append((tag, frame))
+            reference = tag
+        pending.append((tag, reference))
+        if len(batch) >= batch_size:
+            results.update(_detect_persons_batch(model, batch, confidence_threshold, input_size))
+            batch = []
+            while pending and pending[0][1] in results:
+                pending_tag, reference_tag = pending.popleft()
+                yield pending_tag, results[reference_tag]
+            # 之后的帧只会引用最近的推理帧，更早的结果可以丢弃
+            results = {reference: results[reference]} if reference in results else {}
+    if batch:
+        results.update(_detect_persons_batch(model, batch, confidence_threshold, input_size))
+    for pending_tag, reference_tag in pending:
+        yield pending_tag, results[reference_tag]
+
+
+class MotionGate:
+    """
+    运动门控：用缩小后的灰度图与上一次推理的帧比较，变化很小时跳过推理。
+
+    与上一次推理的帧（而不是相邻帧）比较，缓慢的累积变化最终也会触发重新推理；
+    距离上一次推理超过 max_interval 秒时无论画面是否变化都重新推理。
+    """
+
+    # 比较用的缩略图尺寸
+    _SIZE = (64, 36)
+
+    def __init__(self, threshold: float, max_interval: float):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self._reference = None
+        self._reference_time = 0.0
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def score(self, frame) -> Tuple[Any, float]:
+        """返回 (缩略灰度图, 与参考帧的平均差值)，没有参考帧时差值为无穷大。"""
+        import cv2
+        import numpy as np
+        small = cv2.resize(frame, self._SIZE, interpolation=cv2.INTER_AREA)
+        gray = small.mean(axis=2, dtype=np.float32) if small.ndim == 3 else small.astype(np.float32)
+        if self._reference is None:
+            return gray, float('inf')
+        return gray, float(np.abs(gray - self._reference).mean())
+
+    def should_infer(self, timestamp: float, frame) -> bool:
+        self.frames_seen += 1
+        gray, difference = self.score(frame)
+        if difference < self.threshold and timestamp - self._reference_time < self.max_interval:
+            self.frames_skipped += 1
+            count('frames_motion_skipped')
+            return False
+        self._reference = gray
+        self._reference_time = timestamp
+        return True
+
+    def stats(self, batch_size: int) -> Dict[str, int]:
+        """门控统计：检查的帧数、跳过的帧数，以及按 batch_size 估算节省的推理调用次数。"""
+        calls_without_gate = -(-self.frames_seen // batch_size)
+        calls_with_gate = -(-(self.frames_seen - self.frames_skipped) // batch_size)
+        return {'frames_checked': self.frames_seen, 'frames_skipped': self.frames_skipped,
+                'inference_calls_saved': calls_without_gate - calls_with_gate}
+
+    def describe(self, batch_size: int) -> str:
+        stats = self.stats(batch_size)
+        ratio = stats['frames_skipped'] / stats['frames_checked'] if stats['frames_checked'] else 0.0
+        return (f"运动门控: 跳过 {stats['frames_skipped']}/{stats['frames_checked']} 帧 ({ratio:.0%})，"
+                f"节省 {stats['inference_calls_saved']} 次推理调用。")
+
+
+def _detect_persons_batch(model, batch: List[Tuple[Any, Any]], confidence_threshold: float, input_size: int) -> Iterator[Tuple[Any, bool]]:
+    # 使用 YOLO 模型进行预测
+    # verbose=False 可以让输出更干净，classes=[0] 表示只检测 'person'
+    results = model([frame for _, frame in batch], classes=[0], conf=confidence_threshold,
+                    imgsz=input_size, verbose=False)
+    count('frames_inferred', len(batch))
+    count('inference_calls')
+    for (tag, _), result in zip(batch, results):
+        yield tag, len(result.boxes) > 0
+
+
+def _load_checkpoint(journal: Optional[Journal]) -> Optional[Dict[str, Any]]:
+    """读取人物检测的进度日志，没有可恢复的进度时返回 None。"""
+    state = journal.load() if journal is not None else None
+    if state is not None:
+        print(f"从检查点恢复人物检测: 已处理到 {state['position']:.1f} 秒，已有 {len(state['segments'])} 个片段。")
+    return state
+
+
+def _build_person_segments(detections: Iterable[Tuple[float, bool]], get_end_time: Callable[[], float],
+                           journal: Optional[Journal] = None,
+                           resume_state: Optional[Dict[str, Any]] = None) -> List[Dict[str, float]]:
+    """
+    根据按时间顺序排列的 (时间, 是否检测到人物) 序列生成人物片段。
+    get_end_time 只在视频结束时仍处于人物片段中才会被调用。
+
+    :param journal: 定期把已处理到的时间、未结束片段的开始时间和已完成的片段写入该进度日志
+    :param resume_state: 从进度日志中读出的状态，detections 应从该状态记录的时间之后开始
+    """
+    segments = list(resume_state['segments']) if resume_state else []
+    in_person_segment = bool(resume_state) and resume_state['open_start'] is not None
+    start_time = resume_state['open_start'] if in_person_segment else 0
+
+    for current_time, person_detected in detections:
         if person_detected and not in_person_segment:
             in_person_segment = True
             start_time = current_time
         elif not person_detected and in_person_segment:
             in_person_segment = False
             segments.append({'start': start_time, 'end': current_time})
+        if journal is not None:
+            journal.save({'position': current_time, 'open_start': start_time if in_person_segment else None,
+                          'segments': segments})
 
-        frame_index += 1
-
-    # 循环结束后，如果仍在人物片段中，则添加最后一个片段
     if in_person_segment:
-        end_time = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
-        segments.append({'start': start_time, 'end': end_time})
-
-    cap.release()
-    print(f"在 '{os.path.basename(video_path)}' 中检测到 {len(segments)} 个人物片段。")
+        segments.append({'start': start_time, 'end': get_end_time()})
     return segments
 
 
@@ -206,8 +986,8 @@ if __name__ == '__main__':
         # extract_audio(video_file_path, "output_audio.wav")
 
         # 2. 获取包含人物的视频片段
-        # process_every_n_frames=30 表示大约每秒检测一次，可以极大提高速度
-        person_segments = get_person_segments(video_file_path, process_every_n_frames=30)
+        # sample_rate=1 表示每秒检测一次，由 ffmpeg 在解码端抽帧，可以极大提高速度
+        person_segments = get_person_segments(video_file_path, sample_rate=1)
 
         # 3. 根据检测到的片段进行剪辑
         if person_segments:
@@ -0,0 +1,41 @@
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from core.batch_engine import BatchEngine
+
+
+class BatchWorker(QObject):
+    """
+    在 QThread 中运行 BatchEngine，把进度事件转换为 Qt 信号发送回 GUI 线程。
+    """
+    file_started = pyqtSignal(int, str)        # 文件序号, 输入路径
+    file_stage = pyqtSignal(int, str)          # 文件序号, 阶段名称
+    file_finished = pyqtSignal(int, dict)      # 文件序号, 结果字典
+    batch_finished = pyqtSignal(list)          # 全部结果
+
+    def __init__(self, jobs, max_workers=None, stage_limits=None):
+        super().__init__()
+        self.jobs = jobs
+        self.engine = BatchEngine(max_workers=max_workers, stage_limits=stage_limits, on_event=self._on_event)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            results = self.engine.run(self.jobs)
+        except Exception as e:
+            results = [{'index': i, 'input': job['input'], 'output': job['output'], 'status': 'error',
+                        'error': str(e), 'result': None, 'elapsed': 0.0} for i, job in enumerate(self.jobs)]
+        self.batch_finished.emit(results)
+
+    def cancel(self):
+        self.engine.cancel()
+
+    def terminate(self):
+        self.engine.terminate()
+
+    def _on_event(self, event):
+        if event['type'] == 'started':
+            self.file_started.emit(event['index'], event['input'])
+        elif event['type'] == 'stage':
+            self.file_stage.emit(event['index'], event['stage'])
+        elif event['type'] == 'finished':
+            self.file_finished.emit(event['index'], event['result'])
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QFileDialog, QMessageBox, QGroupBox, QGridLayout, QLabel,
                              QFontComboBox, QSpinBox, QComboBox, QCheckBox, QColorDialog,
@@ -7,13 +8,40 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPu
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 from PyQt5.QtGui import QColor, QFont, QPalette
-from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtCore import Qt, QUrl, QTimer, QThread, pyqtSignal
+
+from core.analysis_cache import cached_voice_segments, cached_subtitles, invalidate_analysis_cache
+from core import instrumentation, pipeline
+from core.intervals import IntervalIndex, clean_segments
+from core.video_processing import cut_video_by_segments
+from core.subtitle_processing import burn_subtitles_to_video
+from core.model_registry import registry
+from core.proxy_store import get_proxy_store
+from core.timeline_cache import get_timeline_store
+from gui.batch_worker import BatchWorker
+from gui.timeline_widget import TimelineWidget
+
+# 批处理阶段名称的中文显示
+BATCH_STAGE_NAMES = {'started': "准备", 'detect_voice': "人声检测", 'detect_person': "人物检测",
+                     'transcribe': "字幕识别", 'encode': "编码"}
+# 关闭窗口时等待批处理在当前阶段结束后退出的时间（毫秒），超时则强制结束工作进程
+BATCH_CLOSE_TIMEOUT_MS = 3000
+
+
+@lru_cache(maxsize=1024)
+def _render_subtitle_html(style, text):
+    """按 (样式, 文本) 缓存字幕预览的 HTML。"""
+    return f"<div style='{style}'>{text}</div>"
 
-from core.audio_processing import get_voice_segments
-from core.video_processing import extract_audio, cut_video_by_segments, get_person_segments
-from core.subtitle_processing import generate_subtitles, burn_subtitles_to_video
 
 class MainWindow(QMainWindow):
+    # 后台线程不能直接操作界面，通过信号把状态栏消息转发到 GUI 线程
+    status_message = pyqtSignal(str)
+    # 后台代理文件生成完成: (源文件路径, 代理文件路径，失败时为空字符串)
+    proxy_ready = pyqtSignal(str, str)
+    # 后台时间轴缓存生成完成: (源文件路径, TimelineCache 或 None)
+    timeline_ready = pyqtSignal(str, object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("AutoClip v2 - 自动化剪辑工具")
@@ -23,10 +51,22 @@ class MainWindow(QMainWindow):
         self.subtitles = None
         self.media_player = None
         self.current_subtitle_index = -1
+        self.subtitle_index = None
+        # 当前预览结果的有效时间窗口 (秒)，播放位置仍在窗口内时跳过查找
+        self._preview_window = (0.0, -1.0)
+        # 字幕样式 (CSS, 对齐方式)，只在样式控件变化时重新计算
+        self._preview_style = None
+        # 上一次写入标签的 (字幕下标, CSS, 文本)
+        self._preview_rendered = None
+        self.batch_thread = None
+        self.batch_worker = None
 
         self._init_ui()
         self._connect_signals()
 
+        # 窗口显示之后再在后台预加载模型，不阻塞启动
+        QTimer.singleShot(0, self._warm_up_models)
+
     def _init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -45,8 +85,21 @@ class MainWindow(QMainWindow):
         clip_layout = QVBoxLayout(clip_group)
         self.btn_keep_voice = QPushButton("只保留有人声的片段")
         self.btn_smart_remove = QPushButton("智能去除 (人声+人物)")
+        self.btn_clear_cache = QPushButton("清除分析缓存")
         clip_layout.addWidget(self.btn_keep_voice)
         clip_layout.addWidget(self.btn_smart_remove)
+        clip_layout.addWidget(self.btn_clear_cache)
+
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(QLabel("并行任务数:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(max(1, (os.cpu_count() or 2) // 2))
+        workers_layout.addWidget(self.workers_spin)
+        clip_layout.addLayout(workers_layout)
+        self.btn_cancel_batch = QPushButton("取消批量处理")
+        self.btn_cancel_batch.setEnabled(False)
+        clip_layout.addWidget(self.btn_cancel_batch)
         left_layout.addWidget(clip_group)
 
         self.subtitle_style_group = QGroupBox("字幕功能与样式")
@@ -73,6 +126,8 @@ class MainWindow(QMainWindow):
         self.timeline_slider = QSlider(Qt.Horizontal)
         self.timeline_slider.setRange(0, 0)
         center_layout.addWidget(self.timeline_slider)
+        self.timeline_widget = TimelineWidget()
+        center_layout.addWidget(self.timeline_widget)
         
         self._create_player_controls(center_layout)
         main_layout.addWidget(center_panel)
@@ -100,7 +155,10 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.model_combo, 0, 1)
 
         self.btn_auto_subtitle = QPushButton("1. 生成字幕")
-        layout.addWidget(self.btn_auto_subtitle, 1, 0, 1, 2)
+        layout.addWidget(self.btn_auto_subtitle, 1, 0)
+        self.vad_gated_checkbox = QCheckBox("只识别人声 (并行)")
+        self.vad_gated_checkbox.setToolTip("先检测人声，跳过静音部分，并按“并行任务数”使用多个进程同时识别")
+        layout.addWidget(self.vad_gated_checkbox, 1, 1)
 
         layout.addWidget(QLabel("字体:"), 2, 0)
         self.font_combo = QFontComboBox()
@@ -156,12 +214,18 @@ class MainWindow(QMainWindow):
         parent_layout.addWidget(controls_widget)
 
     def _connect_signals(self):
+        self.status_message.connect(lambda message: self.statusBar().showMessage(message, 5000))
+        self.proxy_ready.connect(self._on_proxy_ready)
+        self.timeline_ready.connect(self._on_timeline_ready)
+        self.timeline_widget.seek_requested.connect(self.set_position)
         self.btn_import.clicked.connect(self.import_video)
         self.play_btn.clicked.connect(self.toggle_play)
         self.timeline_slider.sliderMoved.connect(self.set_position)
         
         self.btn_keep_voice.clicked.connect(self.auto_keep_voice)
         self.btn_smart_remove.clicked.connect(self.smart_remove)
+        self.btn_clear_cache.clicked.connect(self.clear_analysis_cache)
+        self.btn_cancel_batch.clicked.connect(self.cancel_batch)
 
         self.btn_auto_subtitle.clicked.connect(self.auto_generate_subtitles)
         self.btn_burn_subtitles.clicked.connect(self.burn_subtitles)
@@ -169,11 +233,12 @@ class MainWindow(QMainWindow):
         style_controls = [self.font_combo, self.font_size_spin, self.pos_combo, self.bg_checkbox, self.stroke_checkbox]
         for control in style_controls:
             if isinstance(control, QComboBox) or isinstance(control, QFontComboBox):
-                control.currentIndexChanged.connect(self.update_subtitle_preview)
+                control.currentIndexChanged.connect(self._on_subtitle_style_changed)
             elif isinstance(control, QSpinBox):
-                control.valueChanged.connect(self.update_subtitle_preview)
+                control.valueChanged.connect(self._on_subtitle_style_changed)
             elif isinstance(control, QCheckBox):
-                control.toggled.connect(self.update_subtitle_preview)
+                control.toggled.connect(self._on_subtitle_style_changed)
+        self.subtitle_table.itemChanged.connect(self._on_subtitle_item_changed)
         
         self.font_color_btn.clicked.connect(lambda: self.select_color('font'))
         self.bg_checkbox.toggled.connect(self.bg_color_btn.setEnabled)
@@ -181,6 +246,18 @@ class MainWindow(QMainWindow):
         self.stroke_checkbox.toggled.connect(self.stroke_color_btn.setEnabled)
         self.stroke_color_btn.clicked.connect(lambda: self.select_color('stroke'))
 
+    def _warm_up_models(self):
+        self.statusBar().showMessage("正在后台加载模型...")
+
+        def _on_finished(status):
+            failed = [name for name, ok in status.items() if not ok]
+            if failed:
+                self.status_message.emit(f"部分模型加载失败: {', '.join(failed)}")
+            else:
+                self.status_message.emit("模型加载完成。")
+
+        registry.warm_up(['silero_vad', 'yolo'], on_finished=_on_finished)
+
     def import_video(self):
         paths, _ = QFileDialog.getOpenFileNames(self, "选择一个或多个视频文件", "", "视频文件 (*.mp4 *.avi *.mov)")
         if paths:
@@ -194,11 +271,18 @@ class MainWindow(QMainWindow):
                 self.media_player.durationChanged.connect(self.duration_changed)
                 self.media_player.stateChanged.connect(self.media_state_changed)
 
-            self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(preview_path)))
+            # 已有代理文件时直接用它预览，否则先播放原始文件，代理文件在后台生成好后再切换
+            store = get_proxy_store()
+            self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(store.get(preview_path) or preview_path)))
             self.play_btn.setEnabled(True)
+            # 时间轴的波形和缩略图在代理文件生成后再生成（缩略图从代理文件抽取更快），见 _on_proxy_ready
+            self.timeline_widget.set_cache(get_timeline_store().get(preview_path))
+            for path in self.video_paths:
+                store.request(path, on_ready=lambda source, proxy: self.proxy_ready.emit(source, proxy or ''))
             
             self.subtitles = None
             self.subtitle_table.setRowCount(0)
+            self._rebuild_subtitle_index()
             self.btn_burn_subtitles.setEnabled(False)
             
             if len(self.video_paths) == 1:
@@ -206,6 +290,30 @@ class MainWindow(QMainWindow):
             else:
                 QMessageBox.information(self, "成功", f"已导入 {len(self.video_paths)} 个视频。\n预览窗口将显示第一个视频。")
 
+    def _on_proxy_ready(self, source_path, proxy_path):
+        if not self.video_paths or source_path != self.video_paths[0]:
+            return
+        if self.timeline_widget.cache is None:
+            get_timeline_store().request(source_path,
+                                         on_ready=lambda source, cache: self.timeline_ready.emit(source, cache))
+        if not proxy_path:
+            return
+        current = self.media_player.currentMedia().canonicalUrl().toLocalFile()
+        if os.path.normcase(current) == os.path.normcase(proxy_path):
+            return
+        # 代理文件与原视频时间轴一致，切换后恢复原来的播放位置和状态
+        position = self.media_player.position()
+        was_playing = self.media_player.state() == QMediaPlayer.PlayingState
+        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(proxy_path)))
+        self.media_player.setPosition(position)
+        if was_playing:
+            self.media_player.play()
+        self.statusBar().showMessage("预览已切换为代理文件。", 3000)
+
+    def _on_timeline_ready(self, source_path, cache):
+        if cache is not None and self.video_paths and source_path == self.video_paths[0]:
+            self.timeline_widget.set_cache(cache)
+
     def toggle_play(self):
         if self.media_player.state() == QMediaPlayer.PlayingState:
             self.media_player.pause()
@@ -220,11 +328,13 @@ class MainWindow(QMainWindow):
 
     def position_changed(self, position):
         self.timeline_slider.setValue(position)
+        self.timeline_widget.set_position(position)
         self.update_time_label(position, self.media_player.duration())
         self.update_subtitle_preview()
 
     def duration_changed(self, duration):
         self.timeline_slider.setRange(0, duration)
+        self.timeline_widget.set_duration(duration)
         self.update_time_label(self.media_player.position(), duration)
 
     def set_position(self, position):
@@ -245,22 +355,71 @@ class MainWindow(QMainWindow):
             elif target == 'bg': self.bg_color = color
             else: self.stroke_color = color
             button.setStyleSheet(f"background-color: {color.name()};")
+            self._on_subtitle_style_changed()
+
+    def _rebuild_subtitle_index(self):
+        self.subtitle_index = IntervalIndex(self.subtitles) if self.subtitles else None
+        self.current_subtitle_index = -1
+        self._preview_window = (0.0, -1.0)
+        self._preview_rendered = None
+        self.subtitle_preview_label.clear()
+        self.subtitle_preview_label.hide()
+        self.update_subtitle_preview()
+
+    def _on_subtitle_style_changed(self, *args):
+        self._preview_style = None
+        self._preview_rendered = None
+        self.update_subtitle_preview()
+
+    def _on_subtitle_item_changed(self, item):
+        # 修改高亮背景色也会触发 itemChanged，只处理内容真正变化的情况
+        if not self.subtitles or item.row() >= len(self.subtitles):
+            return
+        segment = self.subtitles[item.row()]
+        if item.column() == 2:
+            if segment['text'] == item.text():
+                return
+            segment['text'] = item.text()
+            self._preview_rendered = None
             self.update_subtitle_preview()
+        else:
+            key = 'start' if item.column() == 0 else 'end'
+            try:
+                value = float(item.text())
+            except ValueError:
+                return
+            if value != segment[key]:
+                segment[key] = value
+                self._rebuild_subtitle_index()
+
+    def _get_preview_style(self):
+        if self._preview_style is None:
+            font = self.font_combo.currentFont()
+            font.setPointSize(self.font_size_spin.value())
+
+            style = f"font-family:'{font.family()}'; font-size:{font.pointSize()}pt; color:{self.font_color.name()};"
+            if self.bg_checkbox.isChecked():
+                style += f" background-color:rgba({self.bg_color.red()},{self.bg_color.green()},{self.bg_color.blue()},{self.bg_color.alpha()});"
+
+            pos_map = {"顶部": "top", "中部": "center", "底部": "bottom"}
+            v_align = pos_map.get(self.pos_combo.currentText(), "bottom")
+            alignment = {"top": Qt.AlignTop | Qt.AlignHCenter, "center": Qt.AlignCenter, "bottom": Qt.AlignBottom | Qt.AlignHCenter}[v_align]
+            self._preview_style = (style, alignment)
+        return self._preview_style
 
     def update_subtitle_preview(self):
-        if not self.subtitles or not self.media_player:
+        # positionChanged 在播放时频繁触发：当前字幕和样式都没有变化时不做任何事
+        if not self.subtitle_index or not self.media_player:
             return
 
         current_time = self.media_player.position() / 1000.0
-        
-        found_segment = None
-        found_index = -1
-        for i, seg in enumerate(self.subtitles):
-            if seg['start'] <= current_time < seg['end']:
-                found_segment = seg
-                found_index = i
-                break
-        
+        window_start, window_end = self._preview_window
+        if window_start <= current_time < window_end and self._preview_rendered is not None:
+            return
+
+        found_index, window_start, window_end = self.subtitle_index.lookup(current_time)
+        self._preview_window = (window_start, window_end)
+
         if self.current_subtitle_index != found_index:
             if self.current_subtitle_index != -1:
                 self.subtitle_table.item(self.current_subtitle_index, 2).setBackground(QColor('white'))
@@ -269,24 +428,28 @@ class MainWindow(QMainWindow):
                 self.subtitle_table.scrollToItem(self.subtitle_table.item(found_index, 0))
             self.current_subtitle_index = found_index
 
-        if found_segment:
-            text = self.subtitle_table.item(found_index, 2).text()
-            font = self.font_combo.currentFont()
-            font.setPointSize(self.font_size_spin.value())
-            
-            style = f"font-family:'{font.family()}'; font-size:{font.pointSize()}pt; color:{self.font_color.name()};"
-            if self.bg_checkbox.isChecked():
-                style += f" background-color:rgba({self.bg_color.red()},{self.bg_color.green()},{self.bg_color.blue()},{self.bg_color.alpha()});"
-            
-            pos_map = {"顶部": "top", "中部": "center", "底部": "bottom"}
-            v_align = pos_map.get(self.pos_combo.currentText(), "bottom")
-            
-            self.subtitle_preview_label.setText(f"<div style='{style}'>{text}</div>")
-            self.subtitle_preview_label.setAlignment({"top": Qt.AlignTop | Qt.AlignHCenter, "center": Qt.AlignCenter, "bottom": Qt.AlignBottom | Qt.AlignHCenter}[v_align])
+        if found_index != -1:
+            text = self.subtitles[found_index]['text']
+            style, alignment = self._get_preview_style()
+            rendered = (found_index, style, alignment, text)
+            if rendered == self._preview_rendered:
+                return
+            self.subtitle_preview_label.setText(_render_subtitle_html(style, text))
+            self.subtitle_preview_label.setAlignment(alignment)
             self.subtitle_preview_label.show()
-        else:
+            self._preview_rendered = rendered
+        elif self._preview_rendered != ():
             self.subtitle_preview_label.clear()
             self.subtitle_preview_label.hide()
+            self._preview_rendered = ()
+
+    def clear_analysis_cache(self):
+        # 已导入视频时只清除这些视频的缓存，否则清空全部缓存
+        if self.video_paths:
+            removed = sum(invalidate_analysis_cache(path) for path in self.video_paths if os.path.exists(path))
+        else:
+            removed = invalidate_analysis_cache()
+        self.statusBar().showMessage(f"已清除 {removed} 条分析缓存。", 5000)
 
     def auto_keep_voice(self):
         self._batch_process("keep_voice")
@@ -296,14 +459,9 @@ class MainWindow(QMainWindow):
         
         if not silent:
             QMessageBox.information(self, "提示", "正在处理人声，请稍候...")
-        temp_audio_path = f"temp_audio_{os.path.basename(input_path)}.wav"
-        audio_file = extract_audio(input_path, temp_audio_path)
-        if not audio_file:
-            if not silent: QMessageBox.critical(self, "错误", "提取音频失败！")
-            return False
-
-        voice_segments = get_voice_segments(audio_file, threshold=0.35, min_silence_duration_ms=500)
-        if os.path.exists(audio_file): os.remove(audio_file)
+        instrumentation.reset()
+        # 分析结果按文件内容和参数缓存，未命中缓存时才解码音频并运行 VAD
+        voice_segments = cached_voice_segments(input_path, **pipeline.VOICE_PARAMS)
 
         if not voice_segments:
             if not silent: QMessageBox.warning(self, "警告", "未检测到任何人声片段。")
@@ -311,26 +469,12 @@ class MainWindow(QMainWindow):
             shutil.copy(input_path, output_path)
             return True
 
+        voice_segments = clean_segments(voice_segments, **pipeline.VOICE_CLEANUP)
         cut_video_by_segments(input_path, voice_segments, output_path, keep_segments=keep_segments)
+        self._show_metrics_summary()
         if not silent: QMessageBox.information(self, "完成", f"人声处理完成！文件保存在: {output_path}")
         return True
 
-    def _process_person_cut(self, input_path, output_path, silent=False):
-        if not input_path: return False
-        
-        if not silent: QMessageBox.information(self, "提示", "正在进行人物检测，请稍候...")
-        person_segments = get_person_segments(input_path)
-        
-        if not person_segments:
-            if not silent: QMessageBox.warning(self, "警告", "未检测到任何人物片段。")
-            import shutil
-            shutil.copy(input_path, output_path)
-            return True
-            
-        cut_video_by_segments(input_path, person_segments, output_path, keep_segments=False)
-        if not silent: QMessageBox.information(self, "完成", f"人物处理完成！视频已保存至: {output_path}")
-        return True
-
     def smart_remove(self):
         self._batch_process("smart_remove")
 
@@ -343,68 +487,145 @@ class MainWindow(QMainWindow):
             if operation_name == 'smart_remove':
                 self.smart_remove_single()
             elif operation_name == 'keep_voice':
-                self._process_voice_cut(True, self.video_paths[0], None, silent=False)
+                output_path, _ = QFileDialog.getSaveFileName(self, "保存(保留人声后)视频", "", "MP4 (*.mp4)")
+                if not output_path: return
+                self._process_voice_cut(True, self.video_paths[0], output_path, silent=False)
             return
 
         output_dir = QFileDialog.getExistingDirectory(self, "选择一个文件夹来保存所有处理后的视频")
         if not output_dir:
             return
 
-        QMessageBox.information(self, "开始处理", f"将对 {len(self.video_paths)} 个视频进行批量处理，请稍候...")
-
-        total_files = len(self.video_paths)
-        for i, video_path in enumerate(self.video_paths):
-            base_name = os.path.basename(video_path)
-            name, ext = os.path.splitext(base_name)
-            
-            self.statusBar().showMessage(f"正在处理第 {i+1}/{total_files} 个文件: {base_name}")
-
-            if operation_name == "smart_remove":
-                output_path = os.path.join(output_dir, f"{name}_smart_removed{ext}")
-                temp_path = os.path.join(output_dir, f"temp_{name}{ext}")
-                
-                voice_ok = self._process_voice_cut(False, video_path, temp_path, silent=True)
-                if voice_ok:
-                    self._process_person_cut(temp_path, output_path, silent=True)
-                if os.path.exists(temp_path): os.remove(temp_path)
-
-            elif operation_name == "keep_voice":
-                output_path = os.path.join(output_dir, f"{name}_voice_kept{ext}")
-                self._process_voice_cut(True, video_path, output_path, silent=True)
-        
-        self.statusBar().showMessage(f"批量处理完成！", 5000)
-        QMessageBox.information(self, "全部完成", f"所有视频已处理完毕并保存至:\n{output_dir}")
+        QMessageBox.information(self, "开始处理", f"将对 {len(self.video_paths)} 个视频进行批量处理，进度会显示在状态栏中。")
+
+        suffix = {"smart_remove": "_smart_removed", "keep_voice": "_voice_kept"}[operation_name]
+        jobs = []
+        for video_path in self.video_paths:
+            name, ext = os.path.splitext(os.path.basename(video_path))
+            jobs.append({'operation': operation_name, 'input': video_path,
+                         'output': os.path.join(output_dir, f"{name}{suffix}{ext}")})
+        self._start_batch(jobs, output_dir)
+
+    def _start_batch(self, jobs, output_dir):
+        # 批处理在工作进程池中执行，GUI 线程只负责接收进度信号
+        self.batch_jobs = jobs
+        self.batch_output_dir = output_dir
+        self.batch_stages = {}
+        self.batch_done = 0
+
+        self.batch_thread = QThread(self)
+        self.batch_worker = BatchWorker(jobs, max_workers=self.workers_spin.value())
+        self.batch_worker.moveToThread(self.batch_thread)
+        self.batch_thread.started.connect(self.batch_worker.run)
+        self.batch_worker.file_started.connect(self._on_batch_file_started)
+        self.batch_worker.file_stage.connect(self._on_batch_file_stage)
+        self.batch_worker.file_finished.connect(self._on_batch_file_finished)
+        self.batch_worker.batch_finished.connect(self._on_batch_finished)
+        # 直接在工作线程中结束事件循环：关闭窗口时 GUI 线程阻塞在 wait() 中，无法处理排队的信号
+        self.batch_worker.batch_finished.connect(self.batch_thread.quit, Qt.DirectConnection)
+
+        self._set_batch_running(True)
+        self.batch_thread.start()
+
+    def _set_batch_running(self, running):
+        for widget in (self.btn_import, self.btn_keep_voice, self.btn_smart_remove, self.workers_spin):
+            widget.setEnabled(not running)
+        self.btn_cancel_batch.setEnabled(running)
+
+    def cancel_batch(self):
+        if self.batch_worker is not None:
+            self.batch_worker.cancel()
+            self.btn_cancel_batch.setEnabled(False)
+            self.statusBar().showMessage("正在取消批量处理，等待当前阶段结束...")
+
+    def _show_batch_progress(self):
+        running = ", ".join(f"{os.path.basename(self.batch_jobs[i]['input'])}({BATCH_STAGE_NAMES.get(stage, stage)})"
+                            for i, stage in sorted(self.batch_stages.items()))
+        self.statusBar().showMessage(f"批量处理 {self.batch_done}/{len(self.batch_jobs)} 已完成" + (f"，进行中: {running}" if running else ""))
+
+    def _on_batch_file_started(self, index, input_path):
+        self.batch_stages[index] = 'started'
+        self._show_batch_progress()
+
+    def _on_batch_file_stage(self, index, stage):
+        self.batch_stages[index] = stage
+        self._show_batch_progress()
+
+    def _on_batch_file_finished(self, index, result):
+        self.batch_stages.pop(index, None)
+        self.batch_done += 1
+        if result['status'] == 'error':
+            print(f"处理 '{result['input']}' 失败: {result['error']}")
+        self._show_batch_progress()
+
+    def _on_batch_finished(self, results):
+        self._set_batch_running(False)
+        self.batch_worker = None
+
+        failed = [r for r in results if r and r['status'] == 'error']
+        cancelled = [r for r in results if r and r['status'] == 'cancelled']
+        succeeded = len(results) - len(failed) - len(cancelled)
+        metrics = instrumentation.merge_summaries([(r['result'] or {}).get('metrics') for r in results if r])
+        summary = instrumentation.format_summary(metrics)
+        self.statusBar().showMessage(f"批量处理结束：成功 {succeeded}，失败 {len(failed)}，取消 {len(cancelled)}"
+                                     + (f"。{summary}" if summary else ""))
+
+        message = f"成功处理 {succeeded} 个视频，保存至:\n{self.batch_output_dir}"
+        resumed = sum(1 for r in results if r and r.get('resumed'))
+        if resumed:
+            message += f"\n（其中 {resumed} 个在上次中断前已完成）"
+        if failed:
+            message += "\n\n处理失败:\n" + "\n".join(f"{os.path.basename(r['input'])}: {r['error']}" for r in failed)
+        if cancelled:
+            message += f"\n\n已取消 {len(cancelled)} 个视频。"
+        if failed:
+            QMessageBox.warning(self, "批量处理结束", message)
+        else:
+            QMessageBox.information(self, "全部完成", message)
+
+    def _show_metrics_summary(self):
+        # 在状态栏中保留最近一次处理的耗时汇总，直到出现下一条消息
+        summary = instrumentation.format_summary()
+        if summary:
+            self.statusBar().showMessage(summary)
+
+    def closeEvent(self, event):
+        # 关闭窗口时取消正在进行的批处理。工作线程阻塞在 BatchEngine.run 中，不会处理 quit()；
+        # run 返回后 batch_finished 会结束线程的事件循环，这里只等待有限的时间，超时则强制结束工作进程
+        if self.batch_worker is not None:
+            self.batch_worker.cancel()
+            if not self.batch_thread.wait(BATCH_CLOSE_TIMEOUT_MS):
+                self.batch_worker.terminate()
+                self.batch_thread.wait(BATCH_CLOSE_TIMEOUT_MS)
+        super().closeEvent(event)
 
     def smart_remove_single(self):
         if not self.video_paths: return QMessageBox.warning(self, "警告", "请先导入一个视频文件！")
         output_path, _ = QFileDialog.getSaveFileName(self, "保存(智能去除后)视频", "", "MP4 (*.mp4)")
         if not output_path: return
         
-        temp_path = os.path.join(os.path.dirname(output_path), "temp_" + os.path.basename(output_path))
-        voice_removed_ok = self._process_voice_cut(False, self.video_paths[0], temp_path, silent=False)
+        QMessageBox.information(self, "提示", "正在进行人声与人物检测，请稍候...")
+        instrumentation.reset()
+        result = pipeline.smart_remove(self.video_paths[0], output_path)
+        self._show_metrics_summary()
         
-        if not voice_removed_ok:
-            if os.path.exists(temp_path): os.remove(temp_path)
-            return
-
-        person_removed_ok = self._process_person_cut(temp_path, output_path, silent=False)
-        if os.path.exists(temp_path): os.remove(temp_path)
-        
-        if person_removed_ok:
-            QMessageBox.information(self, "全部完成", f"智能去除处理完成！\n最终视频已保存至: {output_path}")
+        if result['copied']:
+            QMessageBox.warning(self, "警告", "未检测到任何人声或人物片段，已直接复制原视频。")
+        QMessageBox.information(self, "全部完成", f"智能去除处理完成！\n最终视频已保存至: {output_path}")
 
     def auto_generate_subtitles(self):
-        if not self.video_path: return QMessageBox.warning(self, "警告", "请先导入一个视频文件！")
+        if not self.video_paths: return QMessageBox.warning(self, "警告", "请先导入一个视频文件！")
         
         selected_model = self.model_combo.currentText()
         QMessageBox.information(self, "提示", f"正在使用 '{selected_model}' 模型生成字幕，请稍候...\n更大的模型需要更长时间，并可能需要下载。")
         
-        temp_audio_path = "temp_audio.wav"
-        audio_file = extract_audio(self.video_path, temp_audio_path)
-        if not audio_file: return QMessageBox.critical(self, "错误", "提取音频失败！")
-        
-        self.subtitles = generate_subtitles(audio_file, model_name=selected_model)
-        if os.path.exists(audio_file): os.remove(audio_file)
+        instrumentation.reset()
+        if self.vad_gated_checkbox.isChecked():
+            self.subtitles = cached_subtitles(self.video_paths[0], model_name=selected_model,
+                                              vad_gated=True, workers=self.workers_spin.value())
+        else:
+            self.subtitles = cached_subtitles(self.video_paths[0], model_name=selected_model)
+        self._show_metrics_summary()
 
         if not self.subtitles:
             return QMessageBox.warning(self, "警告", "未能生成字幕。")
@@ -414,16 +635,22 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "完成", "字幕已生成并显示在右侧列表中。")
 
     def populate_subtitle_table(self):
-        self.subtitle_table.setRowCount(0)
-        if not self.subtitles: return
-        self.subtitle_table.setRowCount(len(self.subtitles))
-        for i, seg in enumerate(self.subtitles):
-            self.subtitle_table.setItem(i, 0, QTableWidgetItem(f"{seg['start']:.2f}"))
-            self.subtitle_table.setItem(i, 1, QTableWidgetItem(f"{seg['end']:.2f}"))
-            self.subtitle_table.setItem(i, 2, QTableWidgetItem(seg['text']))
+        # 填充表格时不触发 itemChanged，避免对每个单元格重建一次索引
+        self.subtitle_table.blockSignals(True)
+        try:
+            self.subtitle_table.setRowCount(0)
+            if self.subtitles:
+                self.subtitle_table.setRowCount(len(self.subtitles))
+                for i, seg in enumerate(self.subtitles):
+                    self.subtitle_table.setItem(i, 0, QTableWidgetItem(f"{seg['start']:.2f}"))
+                    self.subtitle_table.setItem(i, 1, QTableWidgetItem(f"{seg['end']:.2f}"))
+                    self.subtitle_table.setItem(i, 2, QTableWidgetItem(seg['text']))
+        finally:
+            self.subtitle_table.blockSignals(False)
+        self._rebuild_subtitle_index()
 
     def burn_subtitles(self):
-        if not self.video_path or not self.subtitles: return QMessageBox.warning(self, "警告", "请先导入视频并生成字幕！")
+        if not self.video_paths or not self.subtitles: return QMessageBox.warning(self, "警告", "请先导入视频并生成字幕！")
         output_path, _ = QFileDialog.getSaveFileName(self, "保存带字幕的视频", "", "MP4 (*.mp4)")
         if not output_path: return
         
@@ -443,7 +670,9 @@ class MainWindow(QMainWindow):
             for i in range(self.subtitle_table.rowCount()):
                 self.subtitles[i]['text'] = self.subtitle_table.item(i, 2).text()
             
-            burn_subtitles_to_video(self.video_path, self.subtitles, output_path, style_options)
+            instrumentation.reset()
+            burn_subtitles_to_video(self.video_paths[0], self.subtitles, output_path, style_options)
+            self._show_metrics_summary()
             QMessageBox.information(self, "完成", f"带字幕的视频已保存至: {output_path}")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"烧录字幕时发生错误: {e}")
\ No newline at end of file
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QColor, QPainter, QPen, QPixmap
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+
+# 同时保留在内存中的缩略图拼图数量
+_SPRITE_CACHE_SIZE = 8
+_THUMBNAIL_HEIGHT = 45
+_WAVEFORM_HEIGHT = 50
+# 可见范围 (秒) 的缩放上下限
+_MIN_VISIBLE_SECONDS = 1.0
+
+
+class TimelineWidget(QWidget):
+    """
+    显示缩略图条和音频波形的时间轴，数据来自 core.timeline_cache 生成的缓存。
+
+    滚轮缩放（以鼠标位置为中心），点击或拖动跳转。每次重绘只读取与控件宽度相当的数据量，
+    与视频长度和缩放级别无关。
+    """
+
+    # 用户点击或拖动时请求跳转到的位置 (毫秒)
+    seek_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(_THUMBNAIL_HEIGHT + _WAVEFORM_HEIGHT)
+        self.cache = None
+        self.duration = 0.0
+        self.position = 0.0
+        # 可见范围 [view_start, view_start + view_span) 秒
+        self.view_start = 0.0
+        self.view_span = 0.0
+        self._sprites = OrderedDict()
+
+    def set_cache(self, cache):
+        self.cache = cache
+        self._sprites.clear()
+        if cache is not None and cache.duration and not self.duration:
+            self.set_duration(int(cache.duration * 1000))
+        self.update()
+
+    def set_duration(self, duration_ms):
+        self.duration = duration_ms / 1000
+        self.view_start = 0.0
+        self.view_span = self.duration
+        self.update()
+
+    def set_position(self, position_ms):
+        self.position = position_ms / 1000
+        # 播放位置移出可见范围时翻页
+        if self.view_span and not self.view_start <= self.position < self.view_start + self.view_span:
+            self.view_start = self._clamp_start(self.position)
+        self.update()
+
+    def _clamp_start(self, start):
+        return min(max(0.0, start), max(0.0, self.duration - self.view_span))
+
+    def _time_at(self, x):
+        return self.view_start + x / max(1, self.width()) * self.view_span
+
+    def wheelEvent(self, event):
+        if not self.duration:
+            return
+        anchor = self._time_at(event.x())
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        self.view_span = min(self.duration, max(_MIN_VISIBLE_SECONDS, self.view_span * factor))
+        # 保持鼠标下的时间点不动
+        self.view_start = self._clamp_start(anchor - event.x() / max(1, self.width()) * self.view_span)
+        self.update()
+
+    def mousePressEvent(self, event):
+        if self.duration and event.button() == Qt.LeftButton:
+            self.seek_requested.emit(int(self._time_at(event.x()) * 1000))
+
+    def mouseMoveEvent(self, event):
+        if self.duration and event.buttons() & Qt.LeftButton:
+            self.seek_requested.emit(int(min(max(0.0, self._time_at(event.x())), self.duration) * 1000))
+
+    def _sprite(self, path):
+        pixmap = self._sprites.get(path)
+        if pixmap is None:
+            pixmap = QPixmap(path)
+            self._sprites[path] = pixmap
+            if len(self._sprites) > _SPRITE_CACHE_SIZE:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(path)
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(30, 30, 30))
+        width = self.width()
+        if not self.view_span or width <= 0:
+            return
+
+        if self.cache is not None:
+            self._paint_thumbnails(painter, width)
+            self._paint_waveform(painter, width)
+
+        x = int((self.position - self.view_start) / self.view_span * width)
+        painter.setPen(QPen(QColor(255, 80, 80), 2))
+        painter.drawLine(x, 0, x, self.height())
+
+    def _paint_thumbnails(self, painter, width):
+        thumbnails = self.cache.manifest['thumbnails']
+        if not thumbnails['count']:
+            return
+        # 缩略图按高度等比缩放，铺满整行；缩小视图时相邻格子自然跳过中间的缩略图
+        cell_width = max(1, int(thumbnails['width'] * _THUMBNAIL_HEIGHT / thumbnails['height']))
+        for left in range(0, width, cell_width):
+            thumbnail = self.cache.thumbnail(self._time_at(left + cell_width / 2))
+            if thumbnail is None:
+                continue
+            path, sx, sy, sw, sh = thumbnail
+            painter.drawPixmap(QRect(left, 0, cell_width, _THUMBNAIL_HEIGHT), self._sprite(path), QRect(sx, sy, sw, sh))
+
+    def _paint_waveform(self, painter, width):
+        peaks = self.cache.peaks(self.view_start, self.view_start + self.view_span, width)
+        if peaks is None:
+            return
+        top = _THUMBNAIL_HEIGHT
+        height = self.height() - top
+        middle = top + height / 2
+        half = height / 2
+        painter.setPen(QColor(90, 180, 255))
+        for x, (low, high) in enumerate(peaks):
+            painter.drawLine(x, int(middle - high * half), x, int(middle - low * half))
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 # 尝试在 QApplication 初始化前设置环境变量，以选择更兼容的媒体后端
 # 这对于解决在某些 Windows 系统上因缺少解码器而无法播放视频的问题特别有用
@@ -18,4 +19,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    # 批处理使用 spawn 方式的工作进程池，打包为可执行文件后需要此调用
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
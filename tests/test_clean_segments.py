@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from core.intervals import clean_segments, merge
+
+
+def test_merge_with_gap():
+    merged = merge(np.array([[0.0, 1.0], [1.3, 2.0], [3.0, 4.0]]), gap=0.5)
+    assert merged.tolist() == [[0.0, 2.0], [3.0, 4.0]]
+
+
+def test_merge_gap_is_inclusive():
+    assert merge(np.array([[0.0, 1.0], [1.5, 2.0]]), gap=0.5).tolist() == [[0.0, 2.0]]
+
+
+def test_merge_unsorted_with_contained_segment():
+    merged = merge(np.array([[5.0, 6.0], [0.0, 10.0], [2.0, 3.0], [11.0, 12.0]]))
+    assert merged.tolist() == [[0.0, 10.0], [11.0, 12.0]]
+
+
+def test_merge_empty():
+    assert merge(np.empty((0, 2))).shape == (0, 2)
+
+
+def test_clean_bridges_short_gaps_before_dropping_short_segments():
+    # 三个短片段之间的间隔都很短，先合并再按长度过滤，因此保留
+    segments = [(0.0, 0.1), (0.2, 0.3), (0.4, 0.5), (5.0, 5.1)]
+    assert clean_segments(segments, min_gap=0.15, min_length=0.3) == [(0.0, 0.5)]
+
+
+def test_clean_padding_merges_and_clamps_to_duration():
+    segments = [(0.05, 1.0), (1.15, 2.0), (9.0, 9.95)]
+    cleaned = clean_segments(segments, duration=10.0, padding=0.1)
+    assert cleaned == pytest.approx([(0.0, 2.1), (8.9, 10.0)])
+
+
+def test_clean_without_options_only_merges():
+    assert clean_segments([{'start': 1, 'end': 2}, {'start': 2, 'end': 3}]) == [(1.0, 3.0)]
+
+
+def test_clean_everything_filtered():
+    assert clean_segments([(0.0, 0.1)], min_length=0.2) == []
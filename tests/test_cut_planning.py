@@ -0,0 +1,63 @@
+from core.video_processing import _PARALLEL_PIECE_MIN_SECONDS, _plan_parallel_pieces, _plan_smart_cut
+
+KEYFRAMES = [0, 50, 100, 150, 200]
+
+
+def _covered_frames(plan):
+    return [frame for _, first, last in plan for frame in range(first, last)]
+
+
+def test_smart_cut_copies_full_gops_and_encodes_edges():
+    plan = _plan_smart_cut([(30, 170)], KEYFRAMES)
+    assert plan == [('encode', 30, 50), ('copy', 50, 150), ('encode', 150, 170)]
+
+
+def test_smart_cut_segment_on_keyframes_is_copied_only():
+    assert _plan_smart_cut([(50, 150)], KEYFRAMES) == [('copy', 50, 150)]
+
+
+def test_smart_cut_single_frame_edges_are_encoded():
+    plan = _plan_smart_cut([(49, 151)], KEYFRAMES)
+    assert plan == [('encode', 49, 50), ('copy', 50, 150), ('encode', 150, 151)]
+
+
+def test_smart_cut_without_a_full_gop_is_encoded():
+    assert _plan_smart_cut([(55, 140)], KEYFRAMES) == [('encode', 55, 140)]
+    # 只包含一个关键帧时同样没有完整的 GOP
+    assert _plan_smart_cut([(40, 60)], KEYFRAMES) == [('encode', 40, 60)]
+
+
+def test_smart_cut_after_last_keyframe_is_encoded():
+    assert _plan_smart_cut([(210, 230)], KEYFRAMES) == [('encode', 210, 230)]
+
+
+def test_smart_cut_covers_every_frame_exactly_once():
+    segments = [(0, 49), (49, 120), (130, 131), (160, 260)]
+    plan = _plan_smart_cut(segments, KEYFRAMES)
+    assert _covered_frames(plan) == [frame for first, last in segments for frame in range(first, last)]
+
+
+def test_parallel_pieces_cover_segments_without_gaps():
+    fps = 25.0
+    segments = [(1.3, 5.7), (8.1, 9.0), (11.04, 60.0)]
+    pieces = _plan_parallel_pieces(segments, fps, workers=2)
+    frames = [frame for first, count in pieces for frame in range(first, first + count)]
+    expected = [frame for start, end in segments for frame in range(round(start * fps), round(end * fps))]
+    assert frames == expected
+
+
+def test_parallel_piece_split_depends_only_on_segment_start():
+    fps = 30.0
+    short = _plan_parallel_pieces([(10.0, 30.0), (40.0, 50.0)], fps, workers=1)
+    longer = _plan_parallel_pieces([(10.0, 30.0), (40.0, 52.0)], fps, workers=1)
+    # 只稍微改变第二个片段的结尾（子片段时长不变），第一个片段的子片段保持不变，可以复用缓存
+    assert [piece for piece in short if piece[0] < 30 * fps] == [piece for piece in longer if piece[0] < 30 * fps]
+
+
+def test_parallel_piece_length_is_power_of_two_seconds():
+    fps = 25.0
+    pieces = _plan_parallel_pieces([(0.0, 600.0)], fps, workers=4)
+    piece_seconds = pieces[0][1] / fps
+    assert piece_seconds >= _PARALLEL_PIECE_MIN_SECONDS
+    assert piece_seconds.is_integer() and int(piece_seconds) & (int(piece_seconds) - 1) == 0
+    assert all(count == pieces[0][1] for _, count in pieces[:-1])
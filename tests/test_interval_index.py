@@ -0,0 +1,55 @@
+from core.intervals import IntervalIndex
+
+
+def test_find_uses_half_open_bounds():
+    index = IntervalIndex([(1.0, 2.0), (2.0, 3.0)])
+    assert index.find(0.999) == -1
+    assert index.find(1.0) == 0
+    assert index.find(1.999) == 0
+    assert index.find(2.0) == 1
+    assert index.find(3.0) == -1
+
+
+def test_find_returns_index_in_original_order():
+    index = IntervalIndex([{'start': 5, 'end': 6}, {'start': 0, 'end': 1}])
+    assert index.find(0.5) == 1
+    assert index.find(5.5) == 0
+
+
+def test_find_in_gap_between_segments():
+    index = IntervalIndex([(0, 1), (4, 5)])
+    assert index.find(2.5) == -1
+
+
+def test_find_overlapping_prefers_latest_start():
+    index = IntervalIndex([(0, 10), (2, 3)])
+    assert index.find(2.5) == 1
+    # 后开始的片段已结束，需要回溯到仍然覆盖该时刻的长片段
+    assert index.find(3.0) == 0
+    assert index.find(9.9) == 0
+
+
+def test_find_on_empty_index():
+    index = IntervalIndex([])
+    assert len(index) == 0
+    assert index.find(1.0) == -1
+    assert index.lookup(1.0) == (-1, float('-inf'), float('inf'))
+
+
+def test_lookup_window_at_boundaries():
+    index = IntervalIndex([(1.0, 2.0), (3.0, 4.0)])
+    assert index.lookup(0.5) == (-1, float('-inf'), 1.0)
+    assert index.lookup(1.0) == (0, 1.0, 2.0)
+    assert index.lookup(2.0) == (-1, 2.0, 3.0)
+    assert index.lookup(4.0) == (-1, 4.0, float('inf'))
+
+
+def test_lookup_result_is_constant_within_window():
+    index = IntervalIndex([(0, 10), (2, 3), (2.5, 6), (8, 12)])
+    for step in range(0, 120):
+        time = step / 10
+        found, window_start, window_end = index.lookup(time)
+        assert window_start <= time < window_end
+        assert index.find(window_start) == found
+        if window_end != float('inf'):
+            assert index.find((time + window_end) / 2) == found
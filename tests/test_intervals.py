@@ -0,0 +1,55 @@
+from core.intervals import complement_segments, intersect_segments, union_segments
+
+
+def test_union_merges_overlapping_and_touching_segments():
+    assert union_segments([(5, 6), (0, 1), (1, 2), (1.5, 3)]) == [(0, 3), (5, 6)]
+
+
+def test_union_accepts_dicts_and_multiple_lists():
+    assert union_segments([{'start': 0, 'end': 1}], [(3, 4)], [(0.5, 2)]) == [(0, 2), (3, 4)]
+
+
+def test_union_drops_empty_and_reversed_segments():
+    assert union_segments([(1, 1), (3, 2), (4, 5)]) == [(4, 5)]
+    assert union_segments([]) == []
+
+
+def test_union_keeps_contained_segment_end():
+    assert union_segments([(0, 10), (2, 3), (9, 11)]) == [(0, 11)]
+
+
+def test_intersect_basic_overlaps():
+    assert intersect_segments([(0, 5), (8, 12)], [(3, 9), (11, 20)]) == [(3, 5), (8, 9), (11, 12)]
+
+
+def test_intersect_touching_segments_is_empty():
+    assert intersect_segments([(0, 1)], [(1, 2)]) == []
+
+
+def test_intersect_one_segment_spanning_many():
+    assert intersect_segments([(0, 10)], [(1, 2), (3, 4), (9, 15)]) == [(1, 2), (3, 4), (9, 10)]
+
+
+def test_intersect_with_empty_list():
+    assert intersect_segments([(0, 1)], []) == []
+    assert intersect_segments([], [(0, 1)]) == []
+
+
+def test_complement_inner_gaps():
+    assert complement_segments([(1, 2), (4, 5)], 6) == [(0, 1), (2, 4), (5, 6)]
+
+
+def test_complement_segments_at_both_ends():
+    assert complement_segments([(0, 1), (5, 6)], 6) == [(1, 5)]
+
+
+def test_complement_clips_segments_outside_duration():
+    assert complement_segments([(-1, 1), (5, 8)], 6) == [(1, 5)]
+
+
+def test_complement_of_nothing_is_everything():
+    assert complement_segments([], 6) == [(0, 6)]
+
+
+def test_complement_of_everything_is_nothing():
+    assert complement_segments([(0, 3), (3, 6)], 6) == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from core.audio_processing import SAMPLE_RATE
+from core.subtitle_processing import (_CHUNK_SPACER, _SPEECH_PADDING, _assemble_chunk, _map_chunk_time,
+                                      plan_speech_chunks)
+
+
+def _chunk_length(regions):
+    return sum(end - start for start, end in regions) + _CHUNK_SPACER * (len(regions) - 1)
+
+
+def test_regions_are_padded_and_clamped_to_duration():
+    chunks = plan_speech_chunks([{'start': 0.1, 'end': 1.0}, {'start': 9.5, 'end': 9.9}], duration=10.0)
+    assert len(chunks) == 1
+    assert chunks[0][0] == pytest.approx((0.0, 1.0 + _SPEECH_PADDING))
+    assert chunks[0][1] == pytest.approx((9.5 - _SPEECH_PADDING, 10.0))
+
+
+def test_close_regions_are_merged():
+    chunks = plan_speech_chunks([{'start': 1.0, 'end': 2.0}, {'start': 2.5, 'end': 3.0}], duration=10.0)
+    assert len(chunks) == 1 and len(chunks[0]) == 1
+    assert chunks[0][0] == pytest.approx((1.0 - _SPEECH_PADDING, 3.0 + _SPEECH_PADDING))
+
+
+def test_long_region_is_split_at_max_chunk_length():
+    chunks = plan_speech_chunks([{'start': 0.0, 'end': 25.0}], duration=30.0, max_chunk_seconds=10.0)
+    regions = [region for chunk in chunks for region in chunk]
+    assert regions[0] == (0.0, 10.0)
+    assert regions[-1][1] == pytest.approx(25.0 + _SPEECH_PADDING)
+    assert all(later[0] == pytest.approx(earlier[1]) for earlier, later in zip(regions, regions[1:]))
+
+
+def test_chunks_never_exceed_max_length_including_spacers():
+    speech = [{'start': start, 'end': start + 2.0} for start in np.arange(0.0, 100.0, 5.0)]
+    chunks = plan_speech_chunks(speech, duration=100.0, max_chunk_seconds=8.0)
+    assert len(chunks) > 1
+    assert all(_chunk_length(chunk) <= 8.0 + 1e-9 for chunk in chunks)
+    flattened = [region for chunk in chunks for region in chunk]
+    assert flattened == sorted(flattened)
+
+
+def test_no_speech_gives_no_chunks():
+    assert plan_speech_chunks([], duration=10.0) == []
+
+
+def test_map_chunk_time_round_trip():
+    audio = np.zeros(20 * SAMPLE_RATE, dtype=np.float32)
+    chunk_audio, mapping = _assemble_chunk(audio, [(2.0, 4.0), (10.0, 11.5)])
+    assert len(chunk_audio) == int((2.0 + _CHUNK_SPACER + 1.5) * SAMPLE_RATE)
+    assert _map_chunk_time(0.0, mapping) == pytest.approx(2.0)
+    assert _map_chunk_time(1.5, mapping) == pytest.approx(3.5)
+    second_offset = 2.0 + _CHUNK_SPACER
+    assert _map_chunk_time(second_offset, mapping) == pytest.approx(10.0)
+    assert _map_chunk_time(second_offset + 1.0, mapping) == pytest.approx(11.0)
+
+
+def test_map_chunk_time_in_spacer_snaps_to_previous_region_end():
+    audio = np.zeros(20 * SAMPLE_RATE, dtype=np.float32)
+    _, mapping = _assemble_chunk(audio, [(2.0, 4.0), (10.0, 11.5)])
+    assert _map_chunk_time(2.0 + _CHUNK_SPACER / 2, mapping) == pytest.approx(4.0)
+
+
+def test_map_chunk_time_is_clamped_to_region_ends():
+    audio = np.zeros(20 * SAMPLE_RATE, dtype=np.float32)
+    _, mapping = _assemble_chunk(audio, [(2.0, 4.0)])
+    assert _map_chunk_time(-1.0, mapping) == pytest.approx(2.0)
+    assert _map_chunk_time(100.0, mapping) == pytest.approx(4.0)
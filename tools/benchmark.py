@@ -0,0 +1,318 @@
+"""
+AutoClip 核心处理阶段的基准测试。
+
+测试输入由 ffmpeg 的 lavfi 源在本地生成（测试图案 + 正弦 / 噪声 / 类语音的间歇音频），
+不需要准备任何素材，不同机器、不同版本之间的结果可以直接对比。
+
+每个 (阶段, 输入) 组合都在新的 Python 进程中运行，分别记录：
+  - elapsed:          阶段耗时（多次运行取中位数，不包括模型加载）
+  - load:             模型加载耗时（首次运行时测得）
+  - frames_per_s:     每秒处理的视频帧数
+  - realtime_factor:  媒体时长 / 处理耗时，大于 1 表示快于实时
+  - peak_rss_mb:      峰值内存占用（测试进程及其 ffmpeg 子进程中的最大值）
+
+用法:
+    python tools/benchmark.py                                  # 运行全部阶段，输入规格为 short
+    python tools/benchmark.py --inputs short medium --stages cut_smart burn
+    python tools/benchmark.py --output before.json             # 保存结果
+    python tools/benchmark.py --output after.json --compare before.json
+
+缺少依赖（如 torch、ultralytics）的阶段会被记录为 error 并继续运行其它阶段。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 输入规格: 名称 -> (时长秒, 宽, 高, 帧率, 音频类型)
+INPUT_SPECS = {
+    'tiny': (5, 320, 180, 25, 'speech'),
+    'short': (30, 640, 360, 25, 'speech'),
+    'medium': (120, 1280, 720, 30, 'speech'),
+    'long': (600, 1920, 1080, 30, 'speech'),
+    'tone': (30, 640, 360, 25, 'sine'),
+    'noise': (30, 640, 360, 25, 'noise'),
+}
+
+# 音频源表达式。speech 为基频抖动的谐波音，每 3 秒中前 1.8 秒发声，模拟说话与停顿交替
+_AUDIO_SOURCES = {
+    'sine': 'sine=frequency=440:sample_rate=44100',
+    'noise': 'anoisesrc=color=pink:amplitude=0.3:sample_rate=44100',
+    'speech': ("aevalsrc='0.4*lt(mod(t,3),1.8)*(sin(2*PI*(160+40*sin(2*PI*4*t))*t)"
+               "+0.5*sin(4*PI*(160+40*sin(2*PI*4*t))*t)+0.25*sin(6*PI*(160+40*sin(2*PI*4*t))*t))"
+               "+0.01*(random(0)-0.5)':s=44100"),
+}
+
+STAGES = ['extract_audio', 'load_audio', 'voice_segments', 'voice_segments_streaming', 'person_segments',
+          'person_segments_gated', 'person_segments_adaptive', 'subtitles', 'cut_smart', 'cut_reencode', 'burn',
+          'cut_burn']
+
+
+def generate_input(spec_name: str, work_dir: str) -> str:
+    """生成（或复用已生成的）测试视频，返回文件路径。"""
+    duration, width, height, fps, audio = INPUT_SPECS[spec_name]
+    path = os.path.join(work_dir, f"bench_{spec_name}_{width}x{height}_{duration}s.mp4")
+    if os.path.exists(path):
+        return path
+
+    sys.path.insert(0, os.path.join(_REPO_DIR, 'src'))
+    from core.ffmpeg_utils import run_ffmpeg
+
+    temp_path = path + '.part.mp4'
+    run_ffmpeg([
+        '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate={fps}:duration={duration}',
+        '-f', 'lavfi', '-t', str(duration), '-i', _AUDIO_SOURCES[audio],
+        '-c:v', 'libx264', '-preset', 'veryfast', '-g', str(fps * 2), '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k', '-shortest', temp_path,
+    ])
+    os.replace(temp_path, path)
+    return path
+
+
+# --- 子进程：运行单个阶段 ---
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows 上没有 resource 模块
+        return None
+    # 编码等工作由 ffmpeg 子进程完成，取本进程与子进程中较大的峰值
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 上单位为 KB，macOS 上为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _synthetic_segments(duration: float, length: float = 2.0, gap: float = 3.0):
+    """每隔 gap 秒取一段 length 秒的片段，用于剪辑和烧录阶段。"""
+    segments = []
+    start = 0.5
+    while start + length < duration:
+        segments.append({'start': start, 'end': start + length})
+        start += length + gap
+    return segments
+
+
+def _prepare_stage(stage: str, model_name: str):
+    """加载阶段需要的模型，使模型加载时间不计入阶段耗时。"""
+    # 模型在各自的模块导入时注册
+    import core.audio_processing
+    import core.video_processing
+    from core.model_registry import registry
+    if stage in ('voice_segments', 'voice_segments_streaming'):
+        return registry.get('silero_vad') is not None
+    if stage in ('person_segments', 'person_segments_gated', 'person_segments_adaptive'):
+        return registry.get('yolo') is not None
+    if stage == 'subtitles':
+        from core.subtitle_processing import get_whisper_model
+        return get_whisper_model(model_name) is not None
+    return True
+
+
+def _run_stage(stage: str, input_path: str, output_dir: str, media_info: dict, model_name: str):
+    """运行一次阶段，失败时抛出异常（核心函数出错时只打印信息并返回 None，这里统一检查返回值）。"""
+    duration = media_info['duration']
+    if stage == 'extract_audio':
+        from core.video_processing import extract_audio
+        if extract_audio(input_path, os.path.join(output_dir, 'audio.wav')) is None:
+            raise RuntimeError("extract_audio 失败")
+    elif stage == 'load_audio':
+        from core.audio_processing import load_audio
+        if load_audio(input_path) is None:
+            raise RuntimeError("load_audio 失败")
+    elif stage == 'voice_segments':
+        from core.audio_processing import get_voice_segments
+        return {'segments': len(get_voice_segments(input_path))}
+    elif stage == 'voice_segments_streaming':
+        from core.audio_processing import get_voice_segments
+        return {'segments': len(get_voice_segments(input_path, streaming=True))}
+    elif stage == 'person_segments':
+        from core.video_processing import get_person_segments
+        return {'segments': len(get_person_segments(input_path))}
+    elif stage == 'person_segments_adaptive':
+        from core import instrumentation
+        from core.video_processing import get_person_segments
+        instrumentation.reset()
+        segments = get_person_segments(input_path, adaptive=True)
+        return {'segments': len(segments),
+                'frames_inferred': int(instrumentation.summary()['counters'].get('frames_inferred', 0))}
+    elif stage == 'person_segments_gated':
+        from core import instrumentation
+        from core.video_processing import get_person_segments
+        instrumentation.reset()
+        segments = get_person_segments(input_path, motion_threshold=3.0)
+        counters = instrumentation.summary()['counters']
+        return {'segments': len(segments), 'frames_skipped': int(counters.get('frames_motion_skipped', 0)),
+                'inference_calls': int(counters.get('inference_calls', 0))}
+    elif stage == 'subtitles':
+        from core.subtitle_processing import generate_subtitles
+        subtitles = generate_subtitles(input_path, model_name=model_name)
+        if subtitles is None:
+            raise RuntimeError("generate_subtitles 失败")
+        return {'segments': len(subtitles)}
+    elif stage in ('cut_smart', 'cut_reencode'):
+        from core.video_processing import cut_video_by_segments
+        output_path = os.path.join(output_dir, f'{stage}.mp4')
+        cut_video_by_segments(input_path, _synthetic_segments(duration), output_path,
+                              keep_segments=True, mode='smart' if stage == 'cut_smart' else 'reencode')
+        if not os.path.exists(output_path):
+            raise RuntimeError("cut_video_by_segments 未生成输出文件")
+    elif stage == 'burn':
+        from core.subtitle_processing import burn_subtitles_to_video
+        subtitles = [{'start': s['start'], 'end': s['end'], 'text': f'基准测试字幕 {i}'}
+                     for i, s in enumerate(_synthetic_segments(duration))]
+        output_path = os.path.join(output_dir, 'burn.mp4')
+        burn_subtitles_to_video(input_path, subtitles, output_path,
+                                {'font': 'Arial', 'fontsize': 24, 'color': '#ffffff'})
+        if not os.path.exists(output_path):
+            raise RuntimeError("burn_subtitles_to_video 未生成输出文件")
+    elif stage == 'cut_burn':
+        from core.subtitle_processing import cut_and_burn_subtitles
+        segments = _synthetic_segments(duration)
+        subtitles = [{'start': s['start'], 'end': s['end'], 'text': f'基准测试字幕 {i}'}
+                     for i, s in enumerate(segments)]
+        output_path = os.path.join(output_dir, 'cut_burn.mp4')
+        cut_and_burn_subtitles(input_path, segments, subtitles, output_path,
+                               {'font': 'Arial', 'fontsize': 24, 'color': '#ffffff'})
+        if not os.path.exists(output_path):
+            raise RuntimeError("cut_and_burn_subtitles 未生成输出文件")
+    else:
+        raise ValueError(f"未知的阶段: {stage}")
+    return {}
+
+
+def _child_main(stage: str, input_path: str, repeat: int, model_name: str) -> None:
+    sys.path.insert(0, os.path.join(_REPO_DIR, 'src'))
+    from core.ffmpeg_utils import probe_media
+
+    record = {'stage': stage, 'status': 'ok', 'error': None}
+    try:
+        media_info = probe_media(input_path)
+        start = time.perf_counter()
+        if not _prepare_stage(stage, model_name):
+            raise RuntimeError("模型不可用")
+        record['load'] = time.perf_counter() - start
+
+        runs = []
+        with tempfile.TemporaryDirectory(prefix='autoclip_bench_') as output_dir:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                record['detail'] = _run_stage(stage, input_path, output_dir, media_info, model_name)
+                runs.append(time.perf_counter() - start)
+        record['runs'] = runs
+        record['elapsed'] = statistics.median(runs)
+        record['frames_per_s'] = media_info['duration'] * (media_info['fps'] or 0) / record['elapsed']
+        record['realtime_factor'] = media_info['duration'] / record['elapsed']
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['peak_rss_mb'] = _peak_rss_mb()
+    # 核心函数会向 stdout 打印进度，结果放在最后一行并加上标记
+    print('BENCHMARK_RESULT ' + json.dumps(record, ensure_ascii=False), flush=True)
+
+
+# --- 主进程 ---
+
+def run_stage(stage: str, input_path: str, repeat: int, model_name: str) -> dict:
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', stage, input_path,
+         '--repeat', str(repeat), '--model', model_name],
+        capture_output=True, text=True, encoding='utf-8', errors='replace')
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith('BENCHMARK_RESULT '):
+            return json.loads(line[len('BENCHMARK_RESULT '):])
+    # 子进程崩溃（如段错误）时没有结果行
+    error = (process.stderr.strip().splitlines() or [f"退出码 {process.returncode}"])[-1]
+    return {'stage': stage, 'status': 'error', 'error': error}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """打印两次运行中相同 (阶段, 输入) 的耗时对比。"""
+    old = {(r['stage'], r['input']): r for r in baseline['results']}
+    print(f"\n与 {baseline['meta'].get('commit') or '基线'} 对比 (加速比 = 旧耗时 / 新耗时):")
+    for record in results['results']:
+        previous = old.get((record['stage'], record['input']))
+        if not previous or record['status'] != 'ok' or previous['status'] != 'ok':
+            continue
+        speedup = previous['elapsed'] / record['elapsed']
+        rss = ''
+        if record.get('peak_rss_mb') and previous.get('peak_rss_mb'):
+            rss = f", 内存 {previous['peak_rss_mb']:.0f} -> {record['peak_rss_mb']:.0f} MB"
+        print(f"  {record['stage']:<16} {record['input']:<8} {previous['elapsed']:8.2f} -> "
+              f"{record['elapsed']:8.2f} 秒  x{speedup:.2f}{rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoClip 核心处理阶段的基准测试")
+    parser.add_argument('--child', nargs=2, metavar=('STAGE', 'INPUT'), help=argparse.SUPPRESS)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="要测试的阶段 (默认: 全部)")
+    parser.add_argument('--inputs', nargs='+', choices=sorted(INPUT_SPECS), default=['short'],
+                        help="输入规格 (默认: short)")
+    parser.add_argument('--repeat', type=int, default=3, help="每个阶段重复运行的次数，取中位数 (默认: 3)")
+    parser.add_argument('--model', default='base', help="Whisper 模型名称 (默认: base)")
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'autoclip_bench'),
+                        help="存放生成的测试视频的目录，重复运行时复用")
+    parser.add_argument('--output', help="保存 JSON 结果的路径")
+    parser.add_argument('--compare', help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args()
+
+    if args.child:
+        _child_main(args.child[0], args.child[1], args.repeat, args.model)
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = {
+        'meta': {
+            'commit': _git_commit(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'model': args.model,
+        },
+        'results': [],
+    }
+    for spec_name in args.inputs:
+        input_path = generate_input(spec_name, args.work_dir)
+        duration, width, height, fps, audio = INPUT_SPECS[spec_name]
+        print(f"输入 {spec_name}: {width}x{height} {fps}fps {duration}s ({audio})")
+        for stage in args.stages:
+            record = run_stage(stage, input_path, args.repeat, args.model)
+            record.update({'input': spec_name, 'duration': duration, 'width': width, 'height': height, 'fps': fps})
+            results['results'].append(record)
+            if record['status'] == 'ok':
+                rss = f"{record['peak_rss_mb']:.0f} MB" if record.get('peak_rss_mb') else '-'
+                print(f"  {stage:<16} {record['elapsed']:8.2f} 秒  {record['frames_per_s']:9.1f} 帧/秒  "
+                      f"x{record['realtime_factor']:.1f} 实时  加载 {record['load']:.2f} 秒  峰值内存 {rss}")
+            else:
+                print(f"  {stage:<16} 失败: {record['error']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+比较人物检测后端的速度与结果一致性。
+
+以 ultralytics 的 PyTorch 路径 (torch, 输入尺寸 640) 为基准，在同一组采样帧上运行各个 ONNX Runtime 配置
+（输入尺寸 x 是否 INT8 量化），记录：
+  - load:          模型加载耗时（首次运行时包括导出 / 量化）
+  - frames_per_s:  每秒推理的帧数（只计推理，不含解码）
+  - agreement:     逐帧"有人 / 无人"判断与基准一致的比例
+  - precision / recall: 以基准判为有人的帧为正例
+  - segment_iou:   生成的人物片段与基准片段在时间上的交并比
+
+用法:
+    python tools/compare_detectors.py video.mp4
+    python tools/compare_detectors.py video.mp4 --sizes 640 480 320 --threads 4 --output detectors.json
+
+需要安装 ultralytics（基准和导出）、onnxruntime 和 onnx（量化）。应使用真实素材：合成的测试图案中没有人物。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_REPO_DIR, 'src'))
+
+# 每批送入模型的帧数，与 get_person_segments 的默认值一致
+_BATCH_SIZE = 8
+
+
+def _run_detector(model, frames, input_size: int, confidence: float):
+    """返回 (逐帧结果列表, 推理耗时)。"""
+    from core.video_processing import _detect_persons_in_batches
+    start = time.perf_counter()
+    detections = list(_detect_persons_in_batches(model, iter(frames), confidence, _BATCH_SIZE, input_size))
+    return [person for _, person in detections], time.perf_counter() - start
+
+
+def _segments_iou(a, b) -> float:
+    from core.intervals import to_tuples, union_segments
+    union = sum(end - start for start, end in union_segments(a, b))
+    if not union:
+        return 1.0
+    # 两组片段各自没有重叠，交集长度 = 两者总长度之和 - 并集长度
+    total = sum(end - start for start, end in to_tuples(a) + to_tuples(b))
+    return (total - union) / union
+
+
+def _compare(reference, candidate):
+    agree = sum(r == c for r, c in zip(reference, candidate))
+    true_positive = sum(r and c for r, c in zip(reference, candidate))
+    predicted, actual = sum(candidate), sum(reference)
+    return {
+        'agreement': agree / len(reference) if reference else 1.0,
+        'precision': true_positive / predicted if predicted else 1.0,
+        'recall': true_positive / actual if actual else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较人物检测后端 (PyTorch / ONNX Runtime) 的速度与结果一致性")
+    parser.add_argument('video', help="测试视频（应包含人物出现和离开的画面）")
+    parser.add_argument('--sample-rate', type=float, default=2.0, help="每秒采样的帧数 (默认: 2)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[640, 480, 320], help="ONNX 模型输入尺寸")
+    parser.add_argument('--threads', type=int, help="ONNX Runtime 推理线程数 (默认: 全部核心)")
+    parser.add_argument('--confidence', type=float, default=0.5, help="置信度阈值 (默认: 0.5)")
+    parser.add_argument('--no-quantize', action='store_true', help="不测试 INT8 量化模型")
+    parser.add_argument('--output', help="保存 JSON 结果的路径")
+    args = parser.parse_args()
+
+    import core.video_processing  # noqa: F401  注册 yolo 模型
+    from core.frame_source import iter_sampled_frames
+    from core.person_detector import get_person_detector
+    from core.video_processing import _build_person_segments
+
+    # 所有配置使用同一组帧（按最大输入尺寸缩放），各模型内部再缩放到自己的输入尺寸
+    frames = list(iter_sampled_frames(args.video, args.sample_rate, max_side=max([640] + args.sizes)))
+    if not frames:
+        print(f"无法从 '{args.video}' 中读取帧。")
+        sys.exit(1)
+    print(f"采样 {len(frames)} 帧 ({args.sample_rate} 帧/秒)")
+    times = [timestamp for timestamp, _ in frames]
+    end_time = times[-1] + 1 / args.sample_rate
+
+    configs = [('torch', 640, False)]
+    for size in args.sizes:
+        configs.append(('onnx', size, False))
+        if not args.no_quantize:
+            configs.append(('onnx', size, True))
+
+    results = []
+    reference = reference_segments = None
+    for backend, size, quantize in configs:
+        name = backend if backend == 'torch' else f"onnx-{size}{'-int8' if quantize else ''}"
+        start = time.perf_counter()
+        try:
+            model = get_person_detector(backend, size, quantize, args.threads)
+        except Exception as e:
+            model = None
+            print(f"{name}: 加载失败 ({e})")
+        load = time.perf_counter() - start
+        if model is None:
+            results.append({'name': name, 'status': 'error'})
+            continue
+
+        # 先推理一批预热（ONNX Runtime 首次运行时分配内存），不计入耗时
+        _run_detector(model, frames[:_BATCH_SIZE], size, args.confidence)
+        persons, elapsed = _run_detector(model, frames, size, args.confidence)
+        segments = _build_person_segments(zip(times, persons), lambda: end_time)
+        record = {'name': name, 'status': 'ok', 'backend': backend, 'input_size': size, 'quantize': quantize,
+                  'load': load, 'frames_per_s': len(frames) / elapsed, 'segments': len(segments)}
+        if reference is None:
+            reference, reference_segments = persons, segments
+        record.update(_compare(reference, persons))
+        record['segment_iou'] = _segments_iou(reference_segments, segments)
+        results.append(record)
+        print(f"{name:<16} 加载 {load:6.1f}s  {record['frames_per_s']:7.1f} 帧/秒  "
+              f"一致 {record['agreement']:.1%}  精确率 {record['precision']:.1%}  召回率 {record['recall']:.1%}  "
+              f"片段 IoU {record['segment_iou']:.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'video': os.path.abspath(args.video), 'frames': len(frames), 'threads': args.threads,
+                       'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+测量 AutoClip 主窗口的启动耗时。
+
+每次测量都在新的 Python 进程中进行（不共享已导入的模块），分别记录：
+  - import:  导入 gui.main_window 的耗时
+  - show:    创建 QApplication、构造 MainWindow 并显示的耗时
+  - total:   从进程开始到窗口显示的总耗时
+
+用法:
+    python tools/measure_startup.py                      # 测量当前代码
+    python tools/measure_startup.py --src <旧版本的 src>  # 测量其他版本进行对比
+
+对比改动前后的启动时间，可以先用 `git worktree add ../autoclip-old <提交>` 检出旧版本，
+再分别对两个 src 目录运行本脚本。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD_CODE = r'''
+import json, os, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt5.QtWidgets import QApplication
+from gui.main_window import MainWindow
+t_import = time.perf_counter()
+app = QApplication(sys.argv[:1])
+window = MainWindow()
+window.show()
+app.processEvents()
+t_show = time.perf_counter()
+print(json.dumps({'import': t_import - t0, 'show': t_show - t_import, 'total': t_show - t0}), flush=True)
+# 不等待后台预加载线程，直接退出
+os._exit(0)
+'''
+
+
+def measure_once(src_dir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    process = subprocess.run([sys.executable, '-c', _CHILD_CODE, src_dir],
+                             capture_output=True, text=True, env=env, check=True)
+    # 模块导入时可能会打印其他信息，只解析最后一行的 JSON
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    default_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    parser = argparse.ArgumentParser(description="测量 AutoClip 主窗口的启动耗时")
+    parser.add_argument('--src', default=default_src, help="要测量的 src 目录 (默认: 当前仓库的 src)")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="重复测量的次数 (默认: 5)")
+    parser.add_argument('--json', action='store_true', help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    runs = [measure_once(os.path.abspath(args.src)) for _ in range(args.runs)]
+    summary = {key: {'median': statistics.median(r[key] for r in runs),
+                     'min': min(r[key] for r in runs)}
+               for key in ('import', 'show', 'total')}
+
+    if args.json:
+        print(json.dumps({'src': os.path.abspath(args.src), 'runs': runs, 'summary': summary}, indent=2))
+        return
+    print(f"src: {os.path.abspath(args.src)} ({args.runs} 次)")
+    for key, value in summary.items():
+        print(f"  {key:<7} 中位数 {value['median']:.3f} 秒, 最快 {value['min']:.3f} 秒")
+
+
+if __name__ == '__main__':
+    main()